@@ -0,0 +1,250 @@
+#!/usr/bin/python3
+
+import argparse
+import contextlib
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+from os import path
+from statistics import mean, median
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Benchmarks run headless
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+from src.utility import *
+from src.App import App
+from src.FontManager import FontManager
+from src.I18n import I18n
+from main import set_config_ui_element_dimensions, bundle_paths
+from generate_random_sprite import generate_random_png_pygame
+from generate_random_level import generate_random_level
+
+BENCHMARK_VERSION: int = 2
+
+# Time to import main.py, from a fresh interpreter
+STARTUP_BUDGET_MS: float = 400
+
+# Pan positions, as fractions of the scrollable range of the canvas
+PAN_POSITIONS: List[Tuple[float, float]] = [(0, 0), (0.5, 0.5), (1, 1)]
+
+def time_call(function: Callable, repeat: int) -> Dict[str, float]:
+    samples: List[float] = []
+    for _ in range(repeat):
+        start: float = perf_counter()
+        function()
+        samples.append((perf_counter() - start) * 1000)
+    return {
+        "samples": len(samples),
+        "min_ms": min(samples),
+        "median_ms": median(samples),
+        "mean_ms": mean(samples),
+        "max_ms": max(samples),
+    }
+
+def parse_import_times(output: str) -> Dict[str, Tuple[int, int]]:
+    """
+        (self, cumulative) microseconds per module, from the output of python -X importtime
+    """
+    import_times: Dict[str, Tuple[int, int]] = {}
+    for line in output.splitlines():
+        if line.startswith("import time:") and not line.endswith("imported package"):
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            if self_us.strip().isdigit():
+                import_times[name.strip()] = (int(self_us), int(cumulative_us))
+    return import_times
+
+def benchmark_startup(repeat: int, budget_ms: float, top: int = 15) -> Dict:
+    """
+        Imports main.py in fresh interpreters with -X importtime, and times loading config.yml
+    """
+    totals: List[float] = []
+    import_times: Dict[str, Tuple[int, int]] = {}
+    for _ in range(repeat):
+        result: subprocess.CompletedProcess = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import main"],
+            cwd=path.dirname(path.abspath(__file__)), env=os.environ, capture_output=True, text=True
+        )
+        import_times = parse_import_times(result.stderr)
+        # A failed import would otherwise be reported as a very fast one
+        if result.returncode != 0 or "main" not in import_times:
+            raise RuntimeError(f"Importing main.py failed with exit code {result.returncode}:\n{result.stderr[-2000:]}")
+        totals.append(import_times["main"][1] / 1000)
+    median_ms: float = median(totals)
+
+    import yaml
+    with open(get_resource_path("config.yml"), "r", encoding="utf8") as f:
+        config_text: str = f.read()
+    return {
+        "import_main": {
+            "samples": len(totals),
+            "min_ms": min(totals),
+            "median_ms": median_ms,
+            "max_ms": max(totals),
+            "budget_ms": budget_ms,
+            "over_budget": median_ms > budget_ms,
+        },
+        "slowest_imports": [
+            {"module": name, "self_ms": self_us / 1000, "cumulative_ms": cumulative_us / 1000}
+            for name, (self_us, cumulative_us) in sorted(import_times.items(), key=lambda item: -item[1][0])[:top]
+        ],
+        "yaml_tk_imported": [name for name in ("yaml", "tkinter", "customtkinter") if name in import_times],
+        "results": {
+            "load_config_cached": time_call(lambda : load_internal_yaml_to_dict("config.yml"), repeat),
+            "parse_config_yaml": time_call(lambda : yaml.safe_load(config_text), repeat),
+        },
+    }
+
+def get_git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=path.dirname(path.abspath(__file__)), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def parse_level(level: str) -> Tuple[int, int]:
+    nb_sprites, nb_hitboxes = level.lower().split("x")
+    return (int(nb_sprites), int(nb_hitboxes))
+
+def create_app(sprite_directory: str, output_directory: str) -> App:
+    """
+        Same configuration steps as main.py, with the defaults of config.yml and no UI prompts
+    """
+    pygame.init()
+    pygame.font.init()
+
+    config: Dict = load_internal_yaml_to_dict("config.yml")
+    I18n(config.get("language"), config.get("i18n"))
+    for field in config.get("theme_dependent_fields", []):
+        config[field] = config[f"{field}_theme"][config.get("dark_theme", True)]
+    set_config_ui_element_dimensions(config)
+    bundle_paths(config, path.dirname(path.abspath(__file__)))
+    config["sprite_directory"] = sprite_directory
+    config["map_output_directory"] = output_directory
+
+    FontManager(
+        font_path=path.join(config.get("font_directory"), config.get("font_file_name").get(config.get("language"))),
+        default_font_family=config.get("font_family")
+    )
+    return App(config, lambda : None)
+
+def benchmark_level(app: App, level: Dict, level_file_path: str, repeat: int, nb_points: int, seed: int) -> Dict:
+    drawing_area = app.drawing_area
+    results: Dict[str, Dict[str, float]] = {}
+
+    results["load_json"] = time_call(lambda : load_json_to_dict(level_file_path), repeat)
+    results["drawing_area_load_data"] = time_call(lambda : drawing_area.load_data(level), repeat)
+    app.set_map_data(level)
+
+    # Hit-testing at random points of the canvas
+    rng: random.Random = random.Random(seed)
+    world_width, world_height = drawing_area.canvas.get_size()
+    points: List[Coords] = [[rng.randrange(world_width), rng.randrange(world_height)] for _ in range(nb_points)]
+
+    def hit_test(get_at: Callable) -> Callable:
+        def run() -> None:
+            for point in points:
+                drawing_area.canvas_mouse_pos = point
+                get_at()
+        return run
+
+    results[f"get_sprite_at_x{nb_points}"] = time_call(hit_test(drawing_area.get_sprite_at), repeat)
+    results[f"get_sprite_or_tile_rect_at_x{nb_points}"] = time_call(hit_test(drawing_area.get_sprite_or_tile_rect_at), repeat)
+    results[f"get_hitbox_at_x{nb_points}"] = time_call(hit_test(drawing_area.get_hitbox_at), repeat)
+
+    # Mouse over the middle of the drawing area
+    drawing_area.relative_mouse_pos = [drawing_area.rect.width // 2, drawing_area.rect.height // 2]
+    drawing_area.canvas_mouse_pos = drawing_area.get_mouse_position_on_canvas()
+    app.set_sprite_mode()
+    results["fixed_update_sprite_mode"] = time_call(app.fixed_update, repeat)
+    app.set_delete_mode()
+    results["fixed_update_delete_mode"] = time_call(app.fixed_update, repeat)
+    app.set_sprite_mode()
+
+    scrollable_width: int = max(world_width - drawing_area.rect.width, 0)
+    scrollable_height: int = max(world_height - drawing_area.rect.height, 0)
+    for x, y in PAN_POSITIONS:
+        drawing_area.panning_offset = [-int(x * scrollable_width), -int(y * scrollable_height)]
+        drawing_area.canvas_mouse_pos = drawing_area.get_mouse_position_on_canvas()
+        results[f"drawing_area_draw_pan_{x:g}_{y:g}"] = time_call(drawing_area._draw, repeat)
+    drawing_area.panning_offset = [0, 0]
+
+    results["app_save_map_data"] = time_call(app.save_map_data, repeat)
+    results["load_saved_json"] = time_call(lambda : load_json_to_dict(app.map_output_file), repeat)
+
+    return {
+        "sprites": len(level["sprites"]),
+        "hitboxes": len(level["hitboxes"]),
+        "world_size": list(level["world_size"]),
+        "tiles": drawing_area.tile_layer.get_nb_tiles(),
+        "free_sprites": len(drawing_area.sprites),
+        "results": results,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the editor on synthetic maps and report the timings as JSON")
+    parser.add_argument("--level", action="append", metavar="SPRITESxHITBOXES", help="level size to benchmark, can be repeated (default: 1000x200 and 5000x1000)")
+    parser.add_argument("--world-size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"), help="world size in pixels (default: sized to the number of sprites)")
+    parser.add_argument("--tile-ratio", type=float, default=0.8, help="share of sprites placed on the grid")
+    parser.add_argument("--sprite-directory", help="PNG sprites to use (default: random sprites generated in a temporary directory)")
+    parser.add_argument("--repeat", type=int, default=10, help="samples per measurement")
+    parser.add_argument("--points", type=int, default=1000, help="points per hit-testing sample")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--output", help="JSON file to write (default: standard output)")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET_MS, metavar="MS", help=f"median time to import main.py over which the benchmark fails (default: {STARTUP_BUDGET_MS:g})")
+    args = parser.parse_args()
+
+    levels: List[Tuple[int, int]] = [parse_level(level) for level in (args.level or ["1000x200", "5000x1000"])]
+
+    # The sprite generator and the Logger print to standard output, keep it for the JSON
+    with tempfile.TemporaryDirectory() as temporary_directory, contextlib.redirect_stdout(sys.stderr):
+        sprite_directory: str = args.sprite_directory or path.join(temporary_directory, "sprites")
+        if not args.sprite_directory:
+            os.makedirs(sprite_directory)
+            random.seed(args.seed)
+            generate_random_png_pygame(output_path_prefix=path.join(sprite_directory, "sprite"), nb_images=8)
+        sprite_file_names: List[str] = sorted(f for f in os.listdir(sprite_directory) if f.lower().endswith(".png"))
+
+        app: App = create_app(sprite_directory, temporary_directory)
+        report: Dict = {
+            "benchmark_version": BENCHMARK_VERSION,
+            "revision": get_git_revision(),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "startup": benchmark_startup(args.repeat, args.startup_budget),
+            "levels": [],
+        }
+        for nb_sprites, nb_hitboxes in levels:
+            level: Dict = generate_random_level(
+                sprite_file_names, nb_sprites, nb_hitboxes, args.world_size,
+                app.drawing_area.canvas_grid_cell_size or 64, tile_ratio=args.tile_ratio, seed=args.seed
+            )
+            level_file_path: str = path.join(temporary_directory, f"level_{nb_sprites}x{nb_hitboxes}.json")
+            with open(level_file_path, "w") as f:
+                json.dump(level, f, indent=4)
+            print(f"Benchmarking {nb_sprites} sprites, {nb_hitboxes} hitboxes...")
+            report["levels"].append(benchmark_level(app, level, level_file_path, args.repeat, args.points, args.seed))
+        pygame.quit()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+    if report["startup"]["import_main"]["over_budget"]:
+        print(f"Importing main.py took {report['startup']['import_main']['median_ms']:.0f} ms, over the {args.startup_budget:g} ms budget", file=sys.stderr)
+        sys.exit(1)
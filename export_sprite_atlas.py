@@ -0,0 +1,40 @@
+#!/usr/bin/python3
+
+import argparse
+import os
+from typing import Dict, List, Optional
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from src.SpriteAtlas import SpriteAtlas
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack the PNG sprites of a directory into atlas pages, with a JSON index of their rects and UVs")
+    parser.add_argument("sprite_directory", help="directory of the PNG sprites")
+    parser.add_argument("output", help="path of the files to write, without extension: OUTPUT_<page>.png and OUTPUT.json")
+    parser.add_argument("--page-size", type=int, default=SpriteAtlas.page_size, help="width and height of the atlas pages")
+    parser.add_argument("--padding", type=int, default=SpriteAtlas.padding, help="transparent pixels between sprites")
+    args = parser.parse_args()
+
+    SpriteAtlas.page_size = args.page_size
+    SpriteAtlas.padding = args.padding
+
+    file_names: List[str] = SpriteAtlas.get_png_file_names(args.sprite_directory)
+    if not file_names:
+        print(f"No PNG sprites found in {args.sprite_directory}")
+        exit(1)
+
+    images: Dict[str, pygame.Surface] = {}
+    for file_name in file_names:
+        try:
+            images[file_name] = pygame.image.load(os.path.join(args.sprite_directory, file_name))
+        except pygame.error as e:
+            print(f"Skipping {file_name}: {e}")
+
+    atlas: SpriteAtlas = SpriteAtlas.build(images)
+    index_file_path: Optional[str] = atlas.save(args.output)
+    if not index_file_path:
+        exit(1)
+    stats: Dict[str, int] = atlas.get_stats()
+    print(f"Successfully packed {stats['images']} sprites into {stats['pages']} pages: {index_file_path} ({100 * (1 - stats['unused_bytes'] / stats['bytes']):.0f}% used)")
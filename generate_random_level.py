@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+
+import argparse
+import json
+import os
+import random
+from math import ceil, sqrt
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4 as u4
+
+def get_world_size(nb_sprites: int, cell_size: int) -> Tuple[int, int]:
+    # Side scroller proportions, with about twice as many cells as sprites
+    nb_cells: int = max(nb_sprites * 2, 640)
+    rows: int = max(16, ceil(sqrt(nb_cells / 4)))
+    columns: int = max(40, ceil(nb_cells / rows))
+    return (columns * cell_size, rows * cell_size)
+
+def generate_random_level(
+    sprite_file_names: List[str],
+    nb_sprites: int = 1000,
+    nb_hitboxes: int = 200,
+    world_size: Optional[Tuple[int, int]] = None,
+    cell_size: int = 64,
+    sprite_size: int = 64,
+    tile_ratio: float = 0.8,
+    seed: Optional[int] = None
+) -> Dict:
+    """
+        Grid-aligned sprites (tiles) fill distinct cells, the others are placed anywhere.
+        Hitboxes are random rects, most of them lying on the grid like hand-drawn ground.
+    """
+    rng: random.Random = random.Random(seed)
+    world_width, world_height = world_size or get_world_size(nb_sprites, cell_size)
+    columns: int = world_width // cell_size
+    rows: int = world_height // cell_size
+
+    nb_tiles: int = min(int(nb_sprites * tile_ratio), columns * rows)
+    cells: List[int] = rng.sample(range(columns * rows), nb_tiles)
+    sprites: List[Dict] = [
+        {
+            "id": str(u4()),
+            "file_name": rng.choice(sprite_file_names),
+            "coordinates": [(cell % columns) * cell_size, (cell // columns) * cell_size]
+        }
+        for cell in cells
+    ] + [
+        {
+            "id": str(u4()),
+            "file_name": rng.choice(sprite_file_names),
+            "coordinates": [rng.randint(0, world_width - sprite_size), rng.randint(0, world_height - sprite_size)]
+        }
+        for _ in range(nb_sprites - nb_tiles)
+    ]
+    rng.shuffle(sprites)
+
+    hitboxes: List[Dict] = []
+    for _ in range(nb_hitboxes):
+        if rng.random() < 0.7:
+            width: int = rng.randint(1, 8) * cell_size
+            height: int = rng.randint(1, 2) * cell_size
+            x: int = rng.randrange(0, max(world_width - width, 1), cell_size)
+            y: int = rng.randrange(0, max(world_height - height, 1), cell_size)
+        else:
+            width = rng.randint(8, cell_size * 4)
+            height = rng.randint(8, cell_size * 2)
+            x = rng.randint(0, max(world_width - width, 0))
+            y = rng.randint(0, max(world_height - height, 0))
+        hitboxes.append({"id": str(u4()), "rect": [x, y, width, height]})
+
+    return {
+        "sprites": sprites,
+        "hitboxes": hitboxes,
+        "starting_position": [cell_size // 2, cell_size // 2],
+        "world_size": [world_width, world_height]
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a random map using the PNG sprites of a directory")
+    parser.add_argument("sprite_directory", help="directory of the PNG sprites (see generate_random_sprite.py)")
+    parser.add_argument("output", help="map JSON file to write")
+    parser.add_argument("--sprites", type=int, default=1000, help="number of sprites")
+    parser.add_argument("--hitboxes", type=int, default=200, help="number of hitboxes")
+    parser.add_argument("--world-size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"), help="world size in pixels (default: sized to the number of sprites)")
+    parser.add_argument("--cell-size", type=int, default=64, help="grid cell size in pixels")
+    parser.add_argument("--tile-ratio", type=float, default=0.8, help="share of sprites placed on the grid")
+    parser.add_argument("--seed", type=int, help="random seed")
+    args = parser.parse_args()
+
+    sprite_file_names: List[str] = sorted(f for f in os.listdir(args.sprite_directory) if f.lower().endswith(".png"))
+    if not sprite_file_names:
+        print(f"No PNG sprites found in {args.sprite_directory}")
+        exit(1)
+
+    level: Dict = generate_random_level(
+        sprite_file_names, args.sprites, args.hitboxes, args.world_size, args.cell_size,
+        tile_ratio=args.tile_ratio, seed=args.seed
+    )
+    with open(args.output, "w") as f:
+        json.dump(level, f, indent=4)
+    print(f"Successfully generated level: {args.output} ({args.sprites} sprites, {args.hitboxes} hitboxes, {level['world_size'][0]}x{level['world_size'][1]})")
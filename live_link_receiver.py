@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+
+"""
+    Reference receiver for the editor's live link (see src/LiveLink.py): keeps a
+    level up to date from the map edits streamed by the editor. Set it as the game
+    executable to try the live link, or copy LiveLevel into a game.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+from time import sleep
+from typing import Dict, Iterator, Optional
+
+ENVIRONMENT_VARIABLE: str = "MAP_EDITOR_LIVE_LINK"
+DATA_TYPE_KEYS: Dict[str, str] = {"sprite": "sprites", "hitbox": "hitboxes"}
+
+class LiveLevel:
+    def __init__(self) -> None:
+        self.level: Dict = {"sprites": {}, "hitboxes": {}, "starting_position": None, "world_size": None}
+
+    def apply(self, message: Dict) -> None:
+        op: str = message["op"]
+        if op == "load":
+            self.level = {
+                "starting_position": None,
+                "world_size": None,
+                **message["map"],
+                "sprites": {sprite["id"]: sprite for sprite in message["map"]["sprites"]},
+                "hitboxes": {hitbox["id"]: hitbox for hitbox in message["map"]["hitboxes"]},
+            }
+        elif op == "add":
+            self.level[DATA_TYPE_KEYS[message["type"]]][message["data"]["id"]] = message["data"]
+        elif op == "delete":
+            self.level[DATA_TYPE_KEYS[message["type"]]].pop(message["id"], None)
+        elif op == "move":
+            self.level[DATA_TYPE_KEYS[message["type"]]][message["id"]]["coordinates"] = message["coordinates"]
+        elif op == "starting_position":
+            self.level["starting_position"] = message["coordinates"]
+
+    def get_summary(self) -> str:
+        return f"{len(self.level['sprites'])} sprites, {len(self.level['hitboxes'])} hitboxes, start at {self.level['starting_position']}"
+
+def connect(address: str, retries: int = 10) -> socket.socket:
+    host, port = address.rsplit(":", 1)
+    for attempt in range(retries):
+        try:
+            return socket.create_connection((host, int(port)))
+        except OSError:
+            if attempt == retries - 1:
+                raise
+            sleep(0.2)
+
+def receive(connection: socket.socket) -> Iterator[Dict]:
+    with connection.makefile("r", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print the level kept up to date by the editor's live link")
+    parser.add_argument("--address", default=os.environ.get(ENVIRONMENT_VARIABLE), help=f"host:port of the editor (default: ${ENVIRONMENT_VARIABLE})")
+    parser.add_argument("--output", help="JSON file to rewrite with the level after every message")
+    args = parser.parse_args()
+
+    address: Optional[str] = args.address
+    if not address:
+        print("No live link address, run from the editor or give --address")
+        sys.exit(1)
+
+    live_level: LiveLevel = LiveLevel()
+    for message in receive(connect(address)):
+        live_level.apply(message)
+        print(f"{message['op']}: {live_level.get_summary()}", flush=True)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({
+                    **live_level.level,
+                    "sprites": list(live_level.level["sprites"].values()),
+                    "hitboxes": list(live_level.level["hitboxes"].values()),
+                }, f, indent=4)
+    print("Live link closed")
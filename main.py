@@ -1,13 +1,16 @@
+import argparse
 from math import floor
 from src.utility import *
 from typing import Dict
-from src.ConfigUI import ConfigUI
 from src.App import App
 from src.Logger import Logger
 import sys
 from os import path
 from src.FontManager import FontManager
 from src.I18n import I18n
+from src.InputSession import InputSession
+from src.MemoryProfiler import MemoryProfiler
+from src.Profiler import Profiler
 
 def set_config_ui_element_dimensions(config: Dict):
     config["window_width"] = max(config.get("window_width"), 600)
@@ -53,10 +56,24 @@ def set_config_ui_element_dimensions(config: Dict):
     config["control_width"] = control_width
     config["control_height"] = control_height
 
-def set_config_language(config: Dict):
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Map editor")
+    parser.add_argument("--record-session", metavar="FILE", help="record the input of this session to FILE")
+    parser.add_argument("--replay-session", metavar="FILE", help="replay a recorded session headlessly, as fast as possible, and report frame timings")
+    parser.add_argument("--replay-report", metavar="FILE", help="write the replay timings (total and per frame) to FILE as JSON")
+    parser.add_argument("--profile", action="store_true", help="profile the whole session (cProfile and stack sampling), same as pressing F6 at startup and on quit")
+    parser.add_argument("--memory-report", metavar="FILE", help="trace memory from startup and write the memory dumps (F4, and on quit) to FILE as JSON")
+    return parser.parse_args()
+
+def set_config_language(config: Dict, interactive: bool = True):
     absolute_language_file_path = path.join(os.path.normpath(config.get("language_file_directory")), config.get("language_file_name"))
     language = get_language_preference(absolute_language_file_path)
+    if not language and not interactive:
+        # Keep the default language rather than prompting for one
+        return
     if not language:
+        # Tk is only imported when a window is shown
+        from src.ConfigUI import ConfigUI
         language_config = ConfigUI(
             "Language",
             {
@@ -77,6 +94,7 @@ def set_user_defined_fields(configYML: Dict, config: Dict, i18n: I18n):
     for field in ui_user_defined_fields:
         ui_user_defined_fields[field]["label"] = i18n.translate(f"app.config_ui.labels.{field}")
 
+    from src.ConfigUI import ConfigUI
     config_ui: Dict = ConfigUI(
         i18n.translate("app.config_ui.window_title.initial_configuration"),
         ui_user_defined_fields,
@@ -99,6 +117,18 @@ def bundle_paths(config: Dict, bundle_dir: str):
             config[field] = p
 
 if __name__ == "__main__":
+    args: argparse.Namespace = parse_arguments()
+    
+    if args.replay_session:
+        # Replays run headless
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        InputSession(InputSession.REPLAY, args.replay_session, args.replay_report)
+    elif args.record_session:
+        InputSession(InputSession.RECORD, args.record_session)
+    
+    if args.memory_report:
+        MemoryProfiler(args.memory_report).start()
+    
     pygame.init()
     pygame.font.init()
     
@@ -113,7 +143,7 @@ if __name__ == "__main__":
     """
         Choose language first
     """
-    set_config_language(config)
+    set_config_language(config, interactive=not args.replay_session)
 
     """
         Instantiate I18n singleton
@@ -128,7 +158,9 @@ if __name__ == "__main__":
         - if so, load user config from user config file.
         - else, take user config through UI.
     """
-    if not user_config:
+    if not user_config and args.replay_session:
+        Logger.info("No user configuration found, replaying with the default configuration")
+    elif not user_config:
         """
             Init configUI to request user-defined
             config and override default config.
@@ -145,6 +177,9 @@ if __name__ == "__main__":
     
     set_config_ui_element_dimensions(config)
     
+    Logger.set_level(config.get("log_level", "INFO"))
+    Logger.set_event_log_rotation(config.get("event_log_max_bytes", 5242880), config.get("event_log_backups", 5))
+    
     """
         Adjust paths for bundling
     """
@@ -160,4 +195,8 @@ if __name__ == "__main__":
         exit(1)
     
     app = App(config, lambda : delete_file_if_exists(path.join(os.path.normpath(configYML.get("user_config_directory")), configYML.get("user_config_filename"))))
+    if args.memory_report:
+        app.dump_memory("startup")
+    if args.profile:
+        Profiler().start()
     app.run()
\ No newline at end of file
@@ -0,0 +1,24 @@
+#!/usr/bin/python3
+
+import sys
+from src.utility import load_json_to_dict
+from src.HitBoxOptimizer import HitBoxOptimizer
+from json import dump
+
+def optimize_hitboxes(input_path: str, output_path: str):
+    map_data = load_json_to_dict(input_path)
+    if map_data == None:
+        sys.exit(1)
+
+    hitboxes = map_data.get("hitboxes") or []
+    map_data["hitboxes"] = HitBoxOptimizer.merge_hitbox_data(hitboxes)
+
+    with open(output_path, "w") as f:
+        dump(map_data, f, indent=4)
+    print(f"Hitboxes merged: {len(hitboxes)} -> {len(map_data['hitboxes'])} ({output_path})")
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: optimize_hitboxes.py <map.json> [<output.json>]")
+        sys.exit(1)
+    optimize_hitboxes(sys.argv[1], sys.argv[2] if len(sys.argv) == 3 else sys.argv[1])
@@ -2,22 +2,36 @@ import copy
 import json
 import sys
 import os
-from typing import Callable, Dict, List, Optional, Tuple, Union
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+import numpy as np
 from .utility import *
 from .ImageCache import ImageCache
 from .SpriteData import SpriteData
 from .HitBoxData import HitBoxData
+from .Prefab import Prefab
+from .PrefabData import PrefabData
+from .PrefabInstance import PrefabInstance
+from .PrefabInstanceData import PrefabInstanceData
 from .Sprite import Sprite
 from .HitBox import HitBox
+from .HitBoxOptimizer import HitBoxOptimizer
+from .Clipboard import Clipboard
+from .LevelAnalyzer import LevelAnalyzer, LevelAnalysis
 from .SpritePanel import SpritePanel
 from .DrawingArea import DrawingArea
 from .Display import Display
 from .Control import Control
 from .Dialog import Dialog
 from .GameManager import GameManager
+from .LiveLink import LiveLink
+from .TileLayer import TileLayer, TileLayerState
 from .Logger import Logger
-from .ConfigUI import ConfigUI
 from .I18n import I18n
+from .FontManager import FontManager
+from .PerformanceMonitor import PerformanceMonitor
+from .InputSession import InputSession
+from .MemoryProfiler import MemoryProfiler
+from .Profiler import Profiler
 
 class App:
     # ANCHOR[id=AppClass]
@@ -29,25 +43,51 @@ class App:
 
         self.i18n: I18n = I18n()
         
+        self.input_session: InputSession = InputSession()
+        
         pygame.mouse.set_visible(False)
         pygame.display.set_caption(self.i18n.translate("app.window_title"))
         
         self.game_runner = GameManager(
-            config.get("game_runner_game_executable_path")
+            config.get("game_runner_game_executable_path"),
+            config.get("game_runner_live_link", True),
+            config.get("game_runner_output_lines", 500)
         )
+        # Game output panel, toggled with F7 and shown when the game crashes
+        self.show_game_output: bool = False
+        self.live_link: Optional[LiveLink] = self.game_runner.get_live_link()
+        # Tile layer as last sent over the live link, tiles are streamed as diffs of it
+        self.live_link_tile_state: Optional[TileLayerState] = None
+        self.live_link_tile_version: int = -1
         
         self.map_output_file = os.path.join(config.get("map_output_directory"), config.get("map_output_filename"))
         
         self.data_type_key_dict = {
             "sprite": "sprites",
-            "hitbox": "hitboxes"
+            "hitbox": "hitboxes",
+            "prefab_instance": "prefab_instances"
         }
         self.last_saved_map_data: Dict[
             str, Tuple[Union[Tuple[int, ...], Dict[str, Union[str, Tuple[int, ...]]]]]
-        ] = {"sprites": [], "hitboxes": []}
+        ] = {"sprites": [], "hitboxes": [], "prefabs": [], "prefab_instances": []}
         self.map_data: Dict[
             str, Tuple[Union[Tuple[int, ...], Dict[str, Union[str, Tuple[int, ...]]]]]
-        ] = {"sprites": [], "hitboxes": []}
+        ] = {"sprites": [], "hitboxes": [], "prefabs": [], "prefab_instances": []}
+        # Prefab whose instance was taken apart to be edited, the next capture replaces its content
+        self.editing_prefab_id: Optional[str] = None
+        
+        # Bumped on every change of map_data, so state derived from it is only recomputed when it changes
+        self.map_version: int = 0
+        self.last_saved_map_version: int = 0
+        self.pristine_key: Optional[Tuple[int, int, int, int]] = None
+        self.pristine: bool = True
+        
+        self.history: List[Dict] = []
+        # Map and tile versions the history is up to date with, and whether the current event pushed to it
+        self.history_key: Optional[Tuple[int, int]] = None
+        self.is_history_recorded: bool = False
+        self.clipboard: Clipboard = Clipboard()
+        self.history_max_length: int = config.get("history_max_length", 20)
 
         self.screen_width: int = config.get("window_width")
         self.screen_height: int = config.get("window_height")
@@ -56,7 +96,17 @@ class App:
 
         self.sprite_dir: str = config.get("sprite_directory")
         self.icon_dir: str = config.get("icon_directory")
-        self.image_cache: ImageCache = ImageCache([self.sprite_dir, self.icon_dir])
+        self.image_cache: ImageCache = ImageCache(
+            [self.sprite_dir, self.icon_dir],
+            [self.sprite_dir] if config.get("sprite_atlas", True) else []
+        )
+        # Sprite atlas written next to the map on save, for the game
+        self.export_sprite_atlas: bool = config.get("map_output_sprite_atlas", False)
+        # Duplicate images saved under the name of the first one
+        self.export_canonical_file_names: bool = config.get("map_output_canonical_file_names", False)
+        # Prefab instances also saved as plain sprites and hitboxes
+        self.export_flatten_prefabs: bool = config.get("map_output_flatten_prefabs", True)
+        self.exported_sprite_atlas_key: Optional[str] = None
         
         pygame.display.set_icon(self.image_cache.get_image(config.get("window_icon")))
         
@@ -86,9 +136,12 @@ class App:
             config.get("drawing_area_snap_threshold"),
             config.get("drawing_area_delete_highlight_color"),
             config.get("drawing_area_move_highlight_color"),
+            config.get("drawing_area_analysis_highlight_color", [255, 218, 121]),
+            config.get("drawing_area_analysis_highlight_outline_width", 2),
             config.get("drawing_area_scrolling_speed"),
             config.get("drawing_area_icon_player_position")
         )
+        self.last_saved_tile_version: int = self.drawing_area.tile_layer.get_version()
         
         self.sprite_panel: SpritePanel = SpritePanel(
             config.get("sprite_panel_x"), config.get("sprite_panel_y"),
@@ -186,6 +239,10 @@ class App:
                     "callback": self.set_move_mode,
                     "animated_frame_suffixes": range(9)
                 },
+                "control_merge_hitboxes": {
+                    "callback": self.merge_hitboxes,
+                    "animated_frame_suffixes": range(6)
+                },
                 "control_clear_user_config": {
                     "callback": self.clear_user_config,
                     "animated_frame_suffixes": range(12)
@@ -220,6 +277,31 @@ class App:
         self.tooltip_text = None
         
         self.user_config_cleared = False
+        
+        self.level_analysis: LevelAnalysis = None
+        
+        self.control_button_update_data_key: Optional[Tuple] = None
+        self.control_button_update_data: Dict[str, Dict[str, Union[str, bool]]] = {}
+        
+        self.performance_monitor: PerformanceMonitor = PerformanceMonitor()
+        for obj, method_name, label in [
+            (self, "fixed_update", "App.fixed_update"),
+            (self.drawing_area, "fixed_update", "  DrawingArea.fixed_update"),
+            (self.control, "fixed_update", "  Control.fixed_update"),
+            (self.display, "update", "  Display.update"),
+            (self, "update", "App.update"),
+            (self, "draw", "App.draw"),
+            (self.drawing_area, "draw", "  DrawingArea.draw"),
+            (self.sprite_panel, "draw", "  SpritePanel.draw"),
+            (self.control, "draw", "  Control.draw"),
+            (self.display, "draw", "  Display.draw"),
+        ]:
+            self.performance_monitor.add_phase(obj, method_name, label)
+        self.performance_monitor.add_counter(FontManager(), "get_font", "FontManager renders")
+
+        self.memory_profiler: MemoryProfiler = MemoryProfiler()
+
+        self.profiler: Profiler = Profiler()
 
         self.running: bool = True
 
@@ -232,6 +314,8 @@ class App:
         
     def browse_game_executable_file(self):
         pygame.mouse.set_visible(True)
+        # Tk is only imported when a window is shown
+        from .ConfigUI import ConfigUI
         browsing_ui_fields: Dict = {
             "game_runner_game_executable_path": {
                 "label": self.i18n.translate("app.config_ui.game_executable_path_label"),
@@ -353,7 +437,7 @@ class App:
         if not self.drawing_area.get_is_drawing_hitbox():
             self.set_mode()
             # TODO - Write this better as if () or () or ()...
-            if self.is_delete_mode() and (not len(self.map_data["sprites"]) and not len(self.map_data["hitboxes"])):
+            if self.is_delete_mode() and self.drawing_area.is_empty():
                 self.set_mode()
             if self.is_sprite_mode() and not len(self.sprite_panel.get_sprites()):
                 self.set_mode()
@@ -364,6 +448,14 @@ class App:
 
     # ANCHOR[id=AppClosing]
     def quit(self):
+        if self.memory_profiler.is_tracing():
+            self.dump_memory("quit")
+        self.profiler.stop()
+        self.input_session.close()
+        if self.game_runner.get_is_running():
+            self.game_runner.close_game(wait=True)
+        if self.live_link:
+            self.live_link.stop()
         pygame.quit()
         sys.exit()
     
@@ -400,38 +492,482 @@ class App:
 
 
     # ANCHOR[id=DataManagement]
+    def bump_map_version(self) -> None:
+        self.map_version += 1
+
     def check_pristine(self):
-        return self.map_data == self.last_saved_map_data
+        # Map data is only compared again once it or the saved map changed
+        key: Tuple[int, int, int, int] = (
+            self.map_version, self.last_saved_map_version,
+            self.drawing_area.tile_layer.get_version(), self.last_saved_tile_version
+        )
+        if key != self.pristine_key:
+            self.pristine_key = key
+            self.pristine = self.map_data == self.last_saved_map_data and key[2] == key[3]
+        return self.pristine
+
+    def get_export_map_data(self, flatten_prefabs: Optional[bool] = None) -> Dict:
+        """
+            map_data only holds free sprites, tiles are written back as regular sprite entries,
+            and so are prefab instances (on top of the prefabs and their instances) if flatten_prefabs
+        """
+        # In drawing order: tiles, then prefab instances, then free sprites
+        prefab_sprites: List[SpriteData] = []
+        prefab_hitboxes: List[HitBoxData] = []
+        if self.export_flatten_prefabs if flatten_prefabs == None else flatten_prefabs:
+            prefab_sprites, prefab_hitboxes = self.drawing_area.flatten_prefab_instances()
+        sprites: List[SpriteData] = self.drawing_area.tile_layer.to_sprite_data() + prefab_sprites + self.map_data["sprites"]
+        hitboxes: List[HitBoxData] = self.map_data["hitboxes"] + prefab_hitboxes
+        prefabs: List[PrefabData] = self.map_data["prefabs"]
+        if self.export_canonical_file_names:
+            sprites = self.get_canonical_sprite_data(sprites)
+            prefabs = [{**prefab, "sprites": self.get_canonical_sprite_data(prefab["sprites"])} for prefab in prefabs]
+        return {
+            **self.map_data,
+            "sprites": sprites,
+            "hitboxes": hitboxes,
+            "prefabs": prefabs
+        }
+
+    def get_canonical_sprite_data(self, sprites: List[SpriteData]) -> List[SpriteData]:
+        return [{**sprite, "file_name": self.image_cache.get_canonical_name(sprite["file_name"])} for sprite in sprites]
 
-    def add_data(self, data: Union[SpriteData, HitBoxData], data_type: str):
-        self.map_data[self.data_type_key_dict[data_type]].append(data)
+    def add_data(self, data: Union[SpriteData, HitBoxData, PrefabInstanceData, List[SpriteData], List[HitBoxData]], data_type: str):
+        if isinstance(data, list):
+            self.map_data[self.data_type_key_dict[data_type]] += data
+        else:
+            self.map_data[self.data_type_key_dict[data_type]].append(data)
+        self.bump_map_version()
+        for d in data if isinstance(data, list) else [data]:
+            self.send_live_link_data("add", d, data_type)
     
     def delete_data(self, _id: str, data_type: str) -> None:
+        deleted_data: List[Dict] = list(filter(lambda d : d["id"] == _id, self.map_data[self.data_type_key_dict[data_type]]))
         self.map_data[self.data_type_key_dict[data_type]] = list(filter(lambda d : d["id"] != _id, self.map_data[self.data_type_key_dict[data_type]]))
+        self.bump_map_version()
+        for d in deleted_data:
+            self.send_live_link_data("delete", d, data_type)
         if self.drawing_area.is_empty() and self.is_delete_mode():
             self.switch_mode()
     
     def set_player_position(self, player_pos: Coords) -> None:
         self.map_data["starting_position"] = player_pos
+        self.bump_map_version()
+        self.send_live_link({"op": "starting_position", "coordinates": player_pos})
     
     def move_sprite(self, _id: str, pos: Coords) -> None:
         list_containing_sprite_data_to_move: List[Sprite] = list(filter(lambda sprite_data : sprite_data.get("id") == _id, self.map_data["sprites"]))
         if len(list_containing_sprite_data_to_move):
             sprite: Sprite = list_containing_sprite_data_to_move[0]
             sprite["coordinates"] = pos
+            self.bump_map_version()
+            self.send_live_link({"op": "move", "type": "sprite", "id": _id, "coordinates": pos})
+
+    def move_prefab_instance(self, _id: str, pos: Coords) -> None:
+        for prefab_instance_data in filter(lambda d : d["id"] == _id, self.map_data["prefab_instances"]):
+            self.send_live_link_data("delete", prefab_instance_data, "prefab_instance")
+            prefab_instance_data["coordinates"] = list(pos)
+            self.bump_map_version()
+            self.send_live_link_data("add", prefab_instance_data, "prefab_instance")
+
+    # ANCHOR[id=AppSelection]
+    def move_objects(self, ids: Dict[str, Set[str]], offset: Coords, new_sprite_data: List[SpriteData]) -> None:
+        """
+            Moves the entries of ids, by data type, by offset in one pass over map_data, and adds
+            the entries of the tiles that were moved off the grid
+        """
+        for data_type, data_ids in ids.items():
+            entries: List[Dict] = [d for d in self.map_data[self.data_type_key_dict[data_type]] if d["id"] in data_ids]
+            if not len(entries):
+                continue
+            key: str = "rect" if data_type == "hitbox" else "coordinates"
+            positions: List[List[int]] = (np.array([d[key][:2] for d in entries], dtype=np.int64) + offset).tolist()
+            for d, position in zip(entries, positions):
+                if data_type == "sprite":
+                    d[key] = position
+                    self.send_live_link({"op": "move", "type": "sprite", "id": d["id"], "coordinates": position})
+                else:
+                    self.send_live_link_data("delete", d, data_type)
+                    d[key] = position + list(d[key][2:])
+                    self.send_live_link_data("add", d, data_type)
+        self.map_data["sprites"] += new_sprite_data
+        self.bump_map_version()
+        for d in new_sprite_data:
+            self.send_live_link_data("add", d, "sprite")
+
+    def copy_selection(self) -> None:
+        if not self.drawing_area.has_selection() or self.drawing_area.is_batch_moving:
+            return
+        self.clipboard.copy(*self.drawing_area.get_selection_data(), self.drawing_area.get_selection_bounds())
+        Logger.info(f"Copied {self.clipboard.get_nb_objects()} objects")
+
+    def paste(self) -> None:
+        """
+            Pastes the clipboard centered on the mouse as one batch. What was pasted is
+            selected in move mode, to be dragged where it belongs.
+        """
+        if self.clipboard.is_empty() or self.drawing_area.is_batch_moving or not self.drawing_area.is_hovered():
+            return
+        sprite_data, hitbox_data, prefab_instance_data = self.clipboard.paste(
+            self.drawing_area.calculate_snapping_coords(self.clipboard.get_size())
+        )
+        # The prefab of a copied instance may have been undone since
+        prefab_instance_data = [d for d in prefab_instance_data if self.drawing_area.get_prefab(d["prefab_id"]) != None]
+        self.push_history()
+        free_sprite_data: List[SpriteData] = self.drawing_area.add_sprite_data(sprite_data)
+        for data in hitbox_data:
+            self.drawing_area.add_hitbox(HitBox(*data["rect"], _id=data["id"]))
+        for data in prefab_instance_data:
+            self.drawing_area.add_prefab_instance(data["prefab_id"], data["coordinates"], data["id"])
+        self.map_data["sprites"] += free_sprite_data
+        self.map_data["hitboxes"] += hitbox_data
+        self.map_data["prefab_instances"] += prefab_instance_data
+        self.bump_map_version()
+        for data_type, entries in (("sprite", free_sprite_data), ("hitbox", hitbox_data), ("prefab_instance", prefab_instance_data)):
+            for d in entries:
+                self.send_live_link_data("add", d, data_type)
+        self.set_mode(self.move_mode_index)
+        self.drawing_area.select_data(sprite_data, hitbox_data, prefab_instance_data)
+        Logger.info(f"Pasted {len(sprite_data) + len(hitbox_data) + len(prefab_instance_data)} objects")
+
+    # ANCHOR[id=AppPrefabs]
+    def capture_prefab(self, rect: Rect) -> None:
+        """
+            Replaces the sprites, tiles, hitboxes and prefab instances inside rect with one
+            instance of a new prefab, or of the prefab being edited, along with all its instances
+        """
+        sprites: List[Sprite] = self.drawing_area.get_sprites_within_rectangle(rect)
+        hitboxes: List[HitBox] = self.drawing_area.get_hitboxes_within_rectangle(rect)
+        prefab_instances: List[PrefabInstance] = self.drawing_area.get_prefab_instances_within_rectangle(rect)
+        tile_bounds: Tuple[int, int, int, int] = self.drawing_area.tile_layer.get_cell_bounds_within_rectangle(rect)
+        tile_sprite_data: List[SpriteData] = self.drawing_area.tile_layer.to_sprite_data(tile_bounds)
+        if not (len(sprites) or len(hitboxes) or len(prefab_instances) or len(tile_sprite_data)):
+            return
+        self.push_history()
+
+        # In drawing order: tiles, then prefab instances, then free sprites
+        sprite_data: List[SpriteData] = list(tile_sprite_data)
+        hitbox_data: List[HitBoxData] = [hitbox.get_data() for hitbox in hitboxes]
+        for prefab_instance in prefab_instances:
+            instance_sprite_data, instance_hitbox_data = prefab_instance.get_prefab().flatten(prefab_instance.get_data())
+            sprite_data += instance_sprite_data
+            hitbox_data += instance_hitbox_data
+        sprite_data += [sprite.get_data() for sprite in sprites]
+        editing_prefab: Optional[Prefab] = self.drawing_area.get_prefab(self.editing_prefab_id)
+        prefab, topleft = Prefab.from_objects(sprite_data, hitbox_data, editing_prefab.get_id() if editing_prefab != None else None)
+
+        sprite_ids: Set[str] = set(map(lambda sprite : sprite.get_id(), sprites))
+        hitbox_ids: Set[str] = set(map(lambda hitbox : hitbox.get_id(), hitboxes))
+        prefab_instance_ids: Set[str] = set(map(lambda prefab_instance : prefab_instance.get_id(), prefab_instances))
+        self.drawing_area.delete_sprites(sprite_ids)
+        self.drawing_area.delete_hitboxes(hitbox_ids)
+        self.drawing_area.delete_prefab_instances(prefab_instance_ids)
+        if len(tile_sprite_data):
+            self.drawing_area.tile_layer.clear_rect(*tile_bounds)
+        self.map_data["sprites"] = list(filter(lambda d : d["id"] not in sprite_ids, self.map_data["sprites"]))
+        self.map_data["hitboxes"] = list(filter(lambda d : d["id"] not in hitbox_ids, self.map_data["hitboxes"]))
+        self.map_data["prefab_instances"] = list(filter(lambda d : d["id"] not in prefab_instance_ids, self.map_data["prefab_instances"]))
+
+        if editing_prefab != None:
+            # Instances draw the prefab's surface, they all change with it
+            editing_prefab.set_content(prefab)
+            prefab = editing_prefab
+            self.map_data["prefabs"] = [prefab.get_data() if d["id"] == prefab.get_id() else d for d in self.map_data["prefabs"]]
+        else:
+            self.drawing_area.add_prefab(prefab)
+            self.map_data["prefabs"].append(prefab.get_data())
+        prefab_instance: PrefabInstance = self.drawing_area.add_prefab_instance(prefab.get_id(), topleft)
+        self.map_data["prefab_instances"].append(prefab_instance.get_data())
+        self.drawing_area.set_active_prefab(prefab.get_id())
+        self.editing_prefab_id = None
+        self.bump_map_version()
+        self.send_live_link_snapshot()
+        Logger.info(
+            f"Prefab {'updated' if editing_prefab != None else 'created'} from {len(sprite_data)} sprites and {len(hitbox_data)} hitboxes, "
+            f"{len(list(filter(lambda d : d['prefab_id'] == prefab.get_id(), self.map_data['prefab_instances'])))} instances"
+        )
+
+    def edit_prefab_at(self) -> None:
+        """
+            Takes the prefab instance under the mouse apart into plain sprites and hitboxes, to
+            be edited with the other tools. Capturing them again updates every instance.
+        """
+        prefab_instance: Optional[PrefabInstance] = self.drawing_area.get_prefab_instance_at()
+        if prefab_instance == None:
+            return
+        self.push_history()
+        sprite_data, hitbox_data = prefab_instance.get_prefab().flatten(prefab_instance.get_data(), keep_ids=False)
+        self.drawing_area.delete_prefab_instance(prefab_instance.get_id())
+        self.map_data["prefab_instances"] = list(filter(lambda d : d["id"] != prefab_instance.get_id(), self.map_data["prefab_instances"]))
+        self.map_data["sprites"] += self.drawing_area.add_sprite_data(sprite_data)
+        for data in hitbox_data:
+            self.drawing_area.add_hitbox(HitBox(*data["rect"], _id=data["id"]))
+        self.map_data["hitboxes"] += hitbox_data
+        self.editing_prefab_id = prefab_instance.get_prefab().get_id()
+        self.drawing_area.set_active_prefab(None)
+        self.set_mode(self.move_mode_index)
+        self.bump_map_version()
+        self.send_live_link_snapshot()
+        Logger.info("Editing a prefab, Shift + drag over its objects in move mode to update all its instances")
+
+    def cycle_active_prefab(self) -> None:
+        """
+            Stamps the next prefab in sprite mode, back to the selected sprite after the last one
+        """
+        prefab_ids: List[str] = list(self.drawing_area.prefabs)
+        if not len(prefab_ids):
+            return
+        active_prefab_id: Optional[str] = self.drawing_area.active_prefab_id
+        next_index: int = prefab_ids.index(active_prefab_id) + 1 if active_prefab_id in prefab_ids else 0
+        self.drawing_area.set_active_prefab(prefab_ids[next_index] if next_index < len(prefab_ids) else None)
+        if self.drawing_area.get_active_prefab() != None:
+            self.set_mode(self.sprite_mode_index)
+
+    def clear_prefab_state(self) -> None:
+        self.drawing_area.set_active_prefab(None)
+        self.editing_prefab_id = None
+
+    # ANCHOR[id=AppLiveLink]
+    def send_live_link(self, message: Dict) -> None:
+        if self.live_link and self.live_link.is_connected():
+            self.live_link.send(message)
+
+    def send_live_link_data(self, op: str, data: Dict, data_type: str) -> None:
+        """
+            "add" or "delete" of a map entry. Prefab instances are streamed as the
+            sprites and hitboxes they flatten into.
+        """
+        if not (self.live_link and self.live_link.is_connected()):
+            return
+        entries: List[Tuple[str, Dict]] = [(data_type, data)]
+        if data_type == "prefab_instance":
+            sprite_data, hitbox_data = self.drawing_area.get_prefab(data["prefab_id"]).flatten(data)
+            entries = [("sprite", d) for d in sprite_data] + [("hitbox", d) for d in hitbox_data]
+        for entry_type, entry in entries:
+            self.send_live_link({"op": "add", "type": entry_type, "data": entry} if op == "add" else {"op": op, "type": entry_type, "id": entry["id"]})
+
+    def send_live_link_snapshot(self, to_all: bool = True) -> None:
+        """
+            Whole map, after batch edits, or for a game that just connected
+        """
+        if self.live_link and (self.live_link.has_pending_clients() or to_all and self.live_link.is_connected()):
+            self.live_link.send_snapshot(self.get_export_map_data(flatten_prefabs=True), to_all)
+            self.live_link_tile_state = self.drawing_area.tile_layer.get_state()
+            self.live_link_tile_version = self.drawing_area.tile_layer.get_version()
+
+    def update_live_link(self) -> None:
+        if not self.live_link:
+            return
+        self.send_live_link_snapshot(to_all=False)
+        tile_layer: TileLayer = self.drawing_area.tile_layer
+        # Tiles do not go through add_data and delete_data, they are diffed once per frame they changed in
+        if self.live_link.is_connected() and tile_layer.get_version() != self.live_link_tile_version:
+            placed, erased = tile_layer.diff_sprite_data(self.live_link_tile_state)
+            for _id in erased:
+                self.send_live_link({"op": "delete", "type": "sprite", "id": _id})
+            for sprite_data in placed:
+                self.send_live_link({"op": "add", "type": "sprite", "data": sprite_data})
+            self.live_link_tile_state = tile_layer.get_state()
+            self.live_link_tile_version = tile_layer.get_version()
+
+    def push_history(self) -> None:
+        """
+            Snapshot map data before a batch edit so it can be undone in one step
+        """
+        self.history.append({
+            "map_data": copy.deepcopy(self.map_data),
+            "tile_state": self.drawing_area.tile_layer.get_state()
+        })
+        if len(self.history) > self.history_max_length:
+            self.history.pop(0)
+        self.is_history_recorded = True
+
+    def check_history(self) -> None:
+        """
+            Called after every event. Single edits are not snapshotted, undoing past one would
+            silently throw it away, so the history is cleared when the map changed without a push
+        """
+        key: Tuple[int, int] = (self.map_version, self.drawing_area.tile_layer.get_version())
+        if key != self.history_key and not self.is_history_recorded:
+            self.history = []
+        self.history_key = key
+        self.is_history_recorded = False
+
+    def undo(self) -> None:
+        if len(self.history):
+            snapshot: Dict = self.history.pop()
+            self.map_data = snapshot["map_data"]
+            self.editing_prefab_id = None
+            self.drawing_area.load_data(self.map_data, snapshot["tile_state"])
+            self.bump_map_version()
+            self.send_live_link_snapshot()
+            self.is_history_recorded = True
+
+    def undo_and_close_dialog(self) -> None:
+        self.close_dialog()
+        self.undo()
+
+    def merge_hitboxes(self) -> None:
+        nb_hitboxes_before: int = len(self.map_data["hitboxes"])
+        merged_hitboxes: List[HitBoxData] = HitBoxOptimizer.merge_hitbox_data(self.map_data["hitboxes"])
+        if len(merged_hitboxes) < nb_hitboxes_before:
+            self.push_history()
+            self.map_data["hitboxes"] = merged_hitboxes
+            self.drawing_area.load_hitboxes(merged_hitboxes)
+            self.bump_map_version()
+            self.send_live_link_snapshot()
+        Logger.info(f"Merged {nb_hitboxes_before} hitboxes into {len(merged_hitboxes)}")
+        self.set_dialog(Dialog(
+            self.screen,
+            self.i18n.translate("app.dialogs.hitboxes_merged.message").format(before=nb_hitboxes_before, after=len(merged_hitboxes)),
+            {
+                self.i18n.translate("app.dialogs.hitboxes_merged.undo"): {
+                    "callback": self.undo_and_close_dialog,
+                    "filled": False
+                },
+                self.i18n.translate("app.dialogs.hitboxes_merged.ok"): {
+                    "callback": self.close_dialog,
+                    "filled": True
+                }
+            } if len(merged_hitboxes) < nb_hitboxes_before else {
+                self.i18n.translate("app.dialogs.hitboxes_merged.ok"): {
+                    "callback": self.close_dialog,
+                    "filled": True
+                }
+            }
+        ))
+
+    def analyze_level(self) -> None:
+        prefab_sprites, prefab_hitboxes = self.drawing_area.flatten_prefab_instances()
+        self.level_analysis = LevelAnalyzer.analyze(
+            self.drawing_area.sprites,
+            self.drawing_area.hitboxes,
+            self.drawing_area.tile_layer.to_sprite_data(),
+            prefab_sprites,
+            prefab_hitboxes
+        )
+        self.drawing_area.set_analysis_highlight_rects(self.level_analysis["highlight_rects"])
+        nb_duplicates: int = len(self.level_analysis["duplicate_sprite_ids"]) + len(self.level_analysis["duplicate_hitbox_ids"])
+        Logger.info(
+            f"Level analysis: {len(self.level_analysis['duplicate_sprite_ids'])} duplicate sprites, "
+            f"{len(self.level_analysis['duplicate_hitbox_ids'])} duplicate hitboxes, "
+            f"{len(self.level_analysis['overlapping_hitbox_ids'])} overlapping hitbox pairs, "
+            f"{len(self.level_analysis['uncovered_sprite_ids'])} sprites without hitbox"
+        )
+        options: Dict = {
+            self.i18n.translate("app.dialogs.level_analysis.close"): {
+                "callback": self.close_dialog,
+                "filled": not nb_duplicates
+            }
+        }
+        if nb_duplicates:
+            options[self.i18n.translate("app.dialogs.level_analysis.remove_duplicates")] = {
+                "callback": self.remove_duplicates_and_close_dialog,
+                "filled": True
+            }
+        self.set_dialog(Dialog(
+            self.screen,
+            self.i18n.translate("app.dialogs.level_analysis.message").format(
+                duplicates=nb_duplicates,
+                overlaps=len(self.level_analysis["overlapping_hitbox_ids"]),
+                uncovered=len(self.level_analysis["uncovered_sprite_ids"])
+            ),
+            options
+        ))
+
+    def remove_duplicates(self) -> None:
+        if self.level_analysis:
+            sprite_ids: Set[str] = set(self.level_analysis["duplicate_sprite_ids"])
+            hitbox_ids: Set[str] = set(self.level_analysis["duplicate_hitbox_ids"])
+            if len(sprite_ids) or len(hitbox_ids):
+                self.push_history()
+                self.map_data["sprites"] = list(filter(lambda d : d["id"] not in sprite_ids, self.map_data["sprites"]))
+                self.map_data["hitboxes"] = list(filter(lambda d : d["id"] not in hitbox_ids, self.map_data["hitboxes"]))
+                self.drawing_area.delete_sprites(sprite_ids)
+                self.drawing_area.delete_hitboxes(hitbox_ids)
+                self.bump_map_version()
+                self.send_live_link_snapshot()
+                Logger.info(f"Removed {len(sprite_ids)} duplicate sprites and {len(hitbox_ids)} duplicate hitboxes")
+            self.level_analysis = None
+
+    def remove_duplicates_and_close_dialog(self) -> None:
+        self.close_dialog()
+        self.remove_duplicates()
+
+    def toggle_performance_hud(self) -> None:
+        self.performance_monitor.toggle()
+
+    def toggle_game_output(self) -> None:
+        self.show_game_output = not self.show_game_output
+
+    def get_game_output_lines(self) -> List[str]:
+        exit_code: Optional[int] = self.game_runner.get_exit_code()
+        return [
+            "Game output (F7)" + (", running" if self.game_runner.get_is_running() else f", exited with code {exit_code}" if exit_code != None else "")
+        ] + self.game_runner.get_output_lines()
+
+    def get_performance_stats(self) -> List[str]:
+        viewport_rect: Rect = self.drawing_area.get_viewport_rect()
+        image_cache_stats: Dict[str, int] = self.image_cache.get_stats()
+        return [
+            f"Sprites {len(self.drawing_area.sprites)} ({len(self.drawing_area.get_sprites_intersecting_rectangle(viewport_rect))} visible)"
+            f"  Tiles {self.drawing_area.tile_layer.get_nb_tiles()} ({self.drawing_area.tile_layer.get_nb_tiles_intersecting_rectangle(viewport_rect)} visible)"
+            f"  Hitboxes {len(self.drawing_area.hitboxes)} ({len(self.drawing_area.get_hitboxes_intersecting_rectangle(viewport_rect))} visible)"
+            f"  Prefab instances {len(self.drawing_area.prefab_instances)} ({len(self.drawing_area.get_prefab_instances_intersecting_rectangle(viewport_rect))} visible)",
+            f"ImageCache {image_cache_stats['images']} images, {image_cache_stats['scaled_images']} scaled, {image_cache_stats['bytes'] / 1048576:.1f} MB"
+            f"  FontManager {FontManager().get_stats()['fonts']} font sizes",
+        ]
+
+    def get_memory_stats(self) -> Dict[str, Dict[str, int]]:
+        tile_state_bytes: int = sum(entry["tile_state"][0].nbytes for entry in self.history)
+        return {
+            "ImageCache": self.image_cache.get_stats(),
+            "DrawingArea": self.drawing_area.get_memory_stats(),
+            "SpritePanel": self.sprite_panel.get_memory_stats(),
+            "HitBox": HitBox.get_cache_stats(),
+            "FontManager": FontManager().get_stats(),
+            "History": {"entries": len(self.history), "tile_state_bytes": tile_state_bytes, "bytes": tile_state_bytes},
+            "Clipboard": {"objects": self.clipboard.get_nb_objects(), "bytes": self.clipboard.get_nbytes()},
+            "Screen": {"bytes": get_surface_bytes(self.screen)},
+        }
+
+    def dump_memory(self, label: str) -> None:
+        self.memory_profiler.dump(label, self.get_memory_stats())
+
+    def get_object_count(self) -> int:
+        return len(self.drawing_area.sprites) + self.drawing_area.tile_layer.get_nb_tiles() + len(self.drawing_area.hitboxes) + len(self.drawing_area.prefab_instances)
 
     def save_map_data(self):
         try:
-            self.map_data["world_size"] = self.map_data.get("world_size", self.drawing_area.canvas.get_size())
-            self.map_data["starting_position"] = self.map_data.get("starting_position", (0, 0))
-            with open(self.map_output_file, "w") as f:
-                json.dump(self.map_data, f, indent=4)
-            self.last_saved_map_data = copy.deepcopy(self.map_data)
+            with Logger.timed("App", "Map save") as fields:
+                self.map_data["world_size"] = self.map_data.get("world_size", self.drawing_area.canvas.get_size())
+                self.map_data["starting_position"] = self.map_data.get("starting_position", (0, 0))
+                with open(self.map_output_file, "w") as f:
+                    json.dump(self.get_export_map_data(), f, indent=4)
+                if self.export_sprite_atlas:
+                    self.save_sprite_atlas()
+                self.bump_map_version()
+                self.last_saved_map_data = copy.deepcopy(self.map_data)
+                self.last_saved_map_version = self.map_version
+                self.last_saved_tile_version = self.drawing_area.tile_layer.get_version()
+                fields["object_count"] = self.get_object_count()
         except IOError as e:
             Logger.error(f"Error saving map data to JSON file")
 
+    def save_sprite_atlas(self) -> None:
+        """
+            Only written again when the sprite directory changed
+        """
+        for atlas in self.image_cache.get_atlases():
+            file_path_prefix: str = os.path.join(os.path.dirname(self.map_output_file), "sprite_atlas")
+            if atlas.key != self.exported_sprite_atlas_key or not os.path.exists(f"{file_path_prefix}.json"):
+                if atlas.save(file_path_prefix):
+                    self.exported_sprite_atlas_key = atlas.key
+                    Logger.info(f"Sprite atlas written to {file_path_prefix}.json")
+
     def browse_map_data_file(self) -> str:
         pygame.mouse.set_visible(True)
+        from .ConfigUI import ConfigUI
         browsing_ui_fields: Dict = {
             "map_data_file_path": {
                 "label": self.i18n.translate("app.config_ui.labels.map_data_file_path"),
@@ -449,12 +985,33 @@ class App:
         map_data_file_path = field_key_value.get("map_data_file_path")
         return map_data_file_path
 
+    def set_map_data(self, data: Dict) -> None:
+        # Flattened prefab instances are loaded from the instances, not as plain entries
+        prefab_instance_ids: Set[str] = set(map(lambda d : d["id"], data.get("prefab_instances") or []))
+        data = {
+            **data,
+            "sprites": list(filter(lambda d : Prefab.get_instance_id(d["id"]) not in prefab_instance_ids, data["sprites"])),
+            "hitboxes": list(filter(lambda d : Prefab.get_instance_id(d["id"]) not in prefab_instance_ids, data["hitboxes"])),
+            "prefabs": data.get("prefabs") or [],
+            "prefab_instances": data.get("prefab_instances") or [],
+        }
+        self.clear_prefab_state()
+        with Logger.timed("App", "Map load") as fields:
+            free_sprite_data: List[SpriteData] = self.drawing_area.load_data(data)
+            self.map_data = copy.deepcopy({**data, "sprites": free_sprite_data})
+            self.history = []
+            self.bump_map_version()
+            self.send_live_link_snapshot()
+            fields["object_count"] = self.get_object_count()
+
     def load_map_data(self):
         self.close_dialog()
         map_data_file_path: str = self.browse_map_data_file()
         if map_data_file_path != None:
-            data: Dict = load_json_to_dict(map_data_file_path)
-            if all(map(lambda d : self.sprite_panel.has_sprite_with_name(d["file_name"]), data["sprites"])):
+            with Logger.timed("App", "Map JSON read") as fields:
+                data: Dict = load_json_to_dict(map_data_file_path)
+                fields["bytes"] = os.path.getsize(map_data_file_path) if data != None else 0
+            if all(map(lambda d : self.sprite_panel.has_sprite_with_name(d["file_name"]), data["sprites"] + [d for prefab in data.get("prefabs") or [] for d in prefab["sprites"]])):
                 if not data.get("sprites"):
                     data["sprites"] = []
                 if not data.get("hitboxes"):
@@ -464,8 +1021,7 @@ class App:
                 if not data.get("world_size"):
                     data["world_size"] = None
                 if data != None:
-                    self.drawing_area.load_data(data)
-                    self.map_data = copy.deepcopy(data)
+                    self.set_map_data(data)
             else:
                 self.set_dialog(Dialog(
                     self.screen,
@@ -531,6 +1087,21 @@ class App:
     
     # ANCHOR[id=ControlManagement]
     def get_control_button_update_data(self) -> Dict[str, Dict[str, Union[str, bool]]]:
+        """
+            Same snapshot until one of the inputs of the buttons' states and hints changes
+        """
+        key: Tuple = (
+            self.map_version, self.last_saved_map_version,
+            self.drawing_area.tile_layer.get_version(), self.last_saved_tile_version,
+            self.mode, self.game_runner.get_is_running(),
+            self.user_config_cleared, self.i18n.get_generation()
+        )
+        if key != self.control_button_update_data_key:
+            self.control_button_update_data_key = key
+            self.control_button_update_data = self.build_control_button_update_data()
+        return self.control_button_update_data
+
+    def build_control_button_update_data(self) -> Dict[str, Dict[str, Union[str, bool]]]:
         return {
             "control_save": {
                 "disabled": self.check_pristine(),
@@ -588,6 +1159,13 @@ class App:
                     "enabled": self.i18n.translate("app.controls.move.hint_enabled"),
                 },
             },
+            "control_merge_hitboxes": {
+                "disabled": len(self.map_data["hitboxes"]) < 2,
+                "hint": {
+                    "disabled": self.i18n.translate("app.controls.merge_hitboxes.hint_disabled"),
+                    "enabled": self.i18n.translate("app.controls.merge_hitboxes.hint_enabled"),
+                },
+            },
             "control_clear_user_config": {
                 "disabled": self.user_config_cleared,
                 "hint": {
@@ -600,23 +1178,28 @@ class App:
 
     # ANCHOR[id=DisplayManagement]
     def get_display_data(self):
+        # Keys let Display render again only the items that changed
         return [
             {
+                "key": "coordinates",
                 "type": "text",
                 "data": ", ".join(map(str, self.drawing_area.calculate_snapping_coords() or [] if (self.is_sprite_mode() or self.is_move_mode() and self.drawing_area.is_moving) else self.drawing_area.get_mouse_position_on_canvas() or [])),
                 "hint": "x, y",
             },
             {
+                "key": "game_file",
                 "type": "icon",
                 "icon_name": self.display_game_file_not_exists if not self.game_runner.get_game_executable_path() else self.display_game_file_exists,
                 "hint": self.i18n.translate("app.display.game_file_status_no_game") if not self.game_runner.get_game_executable_path() else self.i18n.translate("app.display.game_file_status_game_loaded"),
             },
             {
+                "key": "mode_icon",
                 "type": "icon",
                 "icon_name": self.display_mode_icon_files[self.mode],
                 "hint": self.i18n.translate(f"app.display.mode_{self.modes[self.mode]}"),
             },
             {
+                "key": "mode",
                 "type": "text",
                 "data": self.i18n.translate(f"app.display.mode_{self.modes[self.mode]}"),
                 "hint": self.i18n.translate(f"app.display.mode_{self.modes[self.mode]}_hint"),
@@ -628,7 +1211,7 @@ class App:
     # ANCHOR[id=MainLoop]
     def update(self) -> None:
         
-        for event in pygame.event.get():
+        for event in self.input_session.get_events():
             self.set_tooltip_text()
             
             if self.dialog:
@@ -655,7 +1238,11 @@ class App:
                     self.add_data,
                     self.delete_data,
                     self.set_player_position,
-                    self.move_sprite
+                    self.move_sprite,
+                    self.move_prefab_instance,
+                    self.move_objects,
+                    self.capture_prefab,
+                    self.push_history
                 )
                 
                 # LINK: #ControlUpdate
@@ -690,6 +1277,12 @@ class App:
                             self.run_game()
                     elif event.key == KeyboardKeys.L:
                         self.request_load_map_data()
+                    elif event.key == KeyboardKeys.Z:
+                        self.undo()
+                    elif event.key == KeyboardKeys.C:
+                        self.copy_selection()
+                    elif event.key == KeyboardKeys.V:
+                        self.paste()
             
                     # TODO[id=DEBUG]
                     elif event.key == KeyboardKeys.SPACE:
@@ -705,19 +1298,45 @@ class App:
                         self.set_player_mode()
                     elif event.key == KeyboardKeys.M:
                         self.set_move_mode()
+                    elif event.key == KeyboardKeys.A:
+                        self.analyze_level()
+                    elif event.key == KeyboardKeys.G:
+                        self.cycle_active_prefab()
+                    elif event.key == KeyboardKeys.E:
+                        self.edit_prefab_at()
+                    elif event.key == KeyboardKeys.ESCAPE:
+                        self.drawing_area.clear_analysis_highlight_rects()
+                        self.clear_prefab_state()
+                        if not self.drawing_area.is_batch_moving:
+                            self.drawing_area.clear_selection()
+                    elif event.key == KeyboardKeys.F3:
+                        self.toggle_performance_hud()
+                    elif event.key == KeyboardKeys.F4:
+                        self.dump_memory("F4")
+                    elif event.key == KeyboardKeys.F6:
+                        self.profiler.toggle()
+                    elif event.key == KeyboardKeys.F7:
+                        self.toggle_game_output()
 
                 # FIXME - Keeping this for DEBUG
                 if event.key == KeyboardKeys.SPACE:
                     pass
+            
+            self.check_history()
                 
 
     def fixed_update(self):
         # ANCHOR[id=AppFixedUpdate]
-        self.drawing_area.fixed_update(
-            self.is_delete_mode(),
-            self.is_move_mode()
-        )
-        self.control.fixed_update(self.get_control_button_update_data())
+        # The scene is frozen under a dialog
+        if not self.dialog:
+            self.drawing_area.fixed_update(
+                self.is_delete_mode(),
+                self.is_move_mode()
+            )
+            self.control.fixed_update(self.get_control_button_update_data())
+        self.update_live_link()
+        if self.game_runner.pop_has_crashed():
+            self.show_game_output = True
         # LINK: #DisplayUpdate
         is_drawing_area_hovered: bool = self.drawing_area.is_hovered()
         self.display.update(
@@ -740,24 +1359,40 @@ class App:
 
     def draw(self) -> None:
         # ANCHOR[id=AppDraw]
-        # LINK: #DrawingAreaDraw
-        self.drawing_area.draw()
-        
-        # LINK: #SpritePanelDraw
-        self.sprite_panel.draw()
+        # The scene under a dialog is drawn once, then frozen in the dialog
+        if not (self.dialog and self.dialog.is_frozen()):
+            # LINK: #DrawingAreaDraw
+            self.drawing_area.draw()
+            
+            # LINK: #SpritePanelDraw
+            self.sprite_panel.draw()
 
-        # LINK: #ControlDraw
-        self.control.draw()
+            # LINK: #ControlDraw
+            self.control.draw()
+                
+            # LINK: #DisplayDraw
+            self.display.draw()
             
-        # LINK: #DisplayDraw
-        self.display.draw()
+            if self.dialog:
+                self.dialog.freeze(self.screen)
         
         if self.dialog:
             # LINK: #DialogDraw
             self.dialog.draw()
+            # The dialog overlay covers the display bar
+            self.display.invalidate()
         
         # Always draw display cursor on top of display tooltip and draw both on top of all other elements
         self.display.draw_tooltip()
+        if self.performance_monitor.is_enabled():
+            self.performance_monitor.end_frame()
+            self.display.draw_performance_hud(self.performance_monitor.get_hud_lines(self.get_performance_stats))
+        if self.show_game_output:
+            # Rendered again only when a line is added or the game starts or exits
+            self.display.draw_game_output(
+                self.get_game_output_lines,
+                (self.game_runner.get_output_version(), self.game_runner.get_is_running(), self.game_runner.get_exit_code())
+            )
         if not (self.is_sprite_mode() and self.drawing_area.is_hovered() and not self.drawing_area.is_panning and not self.dialog):
             self.display.draw_cursor()
 
@@ -765,6 +1400,10 @@ class App:
 
     def run(self) -> None:
         while self.running:
+            self.input_session.begin_frame()
+            self.profiler.begin_frame()
+            if self.input_session.is_replay_done():
+                break
             self.fixed_update()
             self.update()
             self.draw()
@@ -0,0 +1,87 @@
+from uuid import uuid4 as u4
+from typing import Dict, List, Tuple
+import numpy as np
+from .utility import *
+from .SpriteData import SpriteData
+from .HitBoxData import HitBoxData
+from .PrefabInstanceData import PrefabInstanceData
+
+class Clipboard:
+    # ANCHOR - Clipboard
+    """
+    Copied objects as a few integer arrays instead of one dict per object,
+    relative to the top left of what was copied. File names and prefab ids
+    are stored once, and referred to by their index.
+    """
+    def __init__(self) -> None:
+        self.file_names: List[str] = []
+        # file name index, x, y
+        self.sprites: np.ndarray = np.zeros((0, 3), dtype=np.int32)
+        # x, y, width, height
+        self.hitboxes: np.ndarray = np.zeros((0, 4), dtype=np.int32)
+        self.prefab_ids: List[str] = []
+        # prefab id index, x, y
+        self.prefab_instances: np.ndarray = np.zeros((0, 3), dtype=np.int32)
+        self.size: Coords = (0, 0)
+
+    # ANCHOR[id=ClipboardGetters]
+    def is_empty(self) -> bool:
+        return self.get_nb_objects() == 0
+
+    def get_nb_objects(self) -> int:
+        return len(self.sprites) + len(self.hitboxes) + len(self.prefab_instances)
+
+    def get_size(self) -> Coords:
+        return self.size
+
+    def get_nbytes(self) -> int:
+        return self.sprites.nbytes + self.hitboxes.nbytes + self.prefab_instances.nbytes
+
+    @staticmethod
+    def get_indices(names: List[str]) -> Tuple[List[str], Dict[str, int]]:
+        unique_names: List[str] = sorted(set(names))
+        return unique_names, {name: index for index, name in enumerate(unique_names)}
+
+    # ANCHOR[id=ClipboardCopyPaste]
+    def copy(self, sprites: List[SpriteData], hitboxes: List[HitBoxData], prefab_instances: List[PrefabInstanceData], bounds: Rect) -> None:
+        """
+            Entries in canvas coordinates, bounds is what they cover
+        """
+        self.file_names, file_name_indices = self.get_indices([sprite["file_name"] for sprite in sprites])
+        self.prefab_ids, prefab_id_indices = self.get_indices([prefab_instance["prefab_id"] for prefab_instance in prefab_instances])
+        self.sprites = np.array([
+            [file_name_indices[sprite["file_name"]], *sprite["coordinates"]] for sprite in sprites
+        ], dtype=np.int32).reshape(-1, 3)
+        self.hitboxes = np.array([hitbox["rect"] for hitbox in hitboxes], dtype=np.int32).reshape(-1, 4)
+        self.prefab_instances = np.array([
+            [prefab_id_indices[prefab_instance["prefab_id"]], *prefab_instance["coordinates"]] for prefab_instance in prefab_instances
+        ], dtype=np.int32).reshape(-1, 3)
+        self.sprites[:, 1:] -= bounds.topleft
+        self.hitboxes[:, :2] -= bounds.topleft
+        self.prefab_instances[:, 1:] -= bounds.topleft
+        self.size = bounds.size
+
+    def paste(self, topleft: Coords) -> Tuple[List[SpriteData], List[HitBoxData], List[PrefabInstanceData]]:
+        """
+            Entries of the copied objects with their top left at topleft, and new ids
+        """
+        sprites: np.ndarray = self.sprites.copy()
+        hitboxes: np.ndarray = self.hitboxes.copy()
+        prefab_instances: np.ndarray = self.prefab_instances.copy()
+        sprites[:, 1:] += topleft
+        hitboxes[:, :2] += topleft
+        prefab_instances[:, 1:] += topleft
+        return (
+            [
+                {"id": str(u4()), "file_name": self.file_names[index], "coordinates": [x, y]}
+                for index, x, y in sprites.tolist()
+            ],
+            [
+                {"id": str(u4()), "rect": rect}
+                for rect in hitboxes.tolist()
+            ],
+            [
+                {"id": str(u4()), "prefab_id": self.prefab_ids[index], "coordinates": [x, y]}
+                for index, x, y in prefab_instances.tolist()
+            ]
+        )
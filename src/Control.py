@@ -28,6 +28,8 @@ class Control(SubSurfaceRect):
         self.button_fill_color = button_fill_color
         
         self.buttons: Dict[str, Dict[str, Union[ClickAnimatedSurface, Rect, Callable, bool]]] = {}
+        # Last state snapshot applied to the buttons
+        self.buttons_state: Optional[Dict[str, Dict[str, Union[str, bool]]]] = None
         for icon_name, icon_button_dict in icon_buttons.items():
             button: Surface = None
             try:
@@ -59,6 +61,13 @@ class Control(SubSurfaceRect):
     def get_relative_mouse_pos(self, absolute_mouse_pos: Coords) -> Coords:
         return [absolute_mouse_pos[0] - self.rect.x, absolute_mouse_pos[1] - self.rect.y]
 
+    def apply_buttons_state(self, buttons: Dict[str, Dict[str, Union[str, bool]]]) -> None:
+        # The App hands over the same snapshot until the buttons' state changes
+        if buttons is not self.buttons_state:
+            self.buttons_state = buttons
+            for button_name, button_dict in self.buttons.items():
+                button_dict["disabled"] = buttons.get(button_name) != None and buttons.get(button_name)["disabled"] == True
+
     # ANCHOR[id=ControlUpdate]
     def _update(self,
         absolute_mouse_pos: Coords,
@@ -66,8 +75,8 @@ class Control(SubSurfaceRect):
         buttons: Dict[str, Dict[str, Union[str, bool]]]
     ):
         self.relative_mouse_pos = self.get_relative_mouse_pos(absolute_mouse_pos)
+        self.apply_buttons_state(buttons)
         for button_name, button_dict in self.buttons.items():
-            button_dict["disabled"] = buttons.get(button_name) != None and buttons.get(button_name)["disabled"] == True
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == MouseButtons.LEFT:
                     if self.is_hovered(absolute_mouse_pos):
@@ -81,8 +90,8 @@ class Control(SubSurfaceRect):
     def fixed_update(self,
         buttons: Dict[str, Dict[str, bool]]
     ):
+        self.apply_buttons_state(buttons)
         for button_name, button_dict in self.buttons.items():
-            button_dict["disabled"] = buttons.get(button_name) != None and buttons.get(button_name)["disabled"] == True
             button_dict["button"].update()
             if self.get_is_button_hovered(button_name):
                 self.button_hover_callback(
@@ -1,4 +1,4 @@
-from typing import Callable, Dict, Optional, Union
+from typing import Callable, Dict, Optional, Tuple, Union
 from .utility import *
 from .SurfaceRect import SurfaceRect
 from .FontManager import FontManager
@@ -19,6 +19,9 @@ class Dialog(SurfaceRect):
     min_message_top_padding: int
     min_button_bottom_padding: int
     
+    # Dimmed overlays by screen size and color, shared by all dialogs
+    overlays: Dict[Tuple[Tuple[int, int], Tuple[int, ...]], Surface] = {}
+    
     def __init__(
         self,
         screen: Surface,
@@ -27,9 +30,7 @@ class Dialog(SurfaceRect):
     ):
         super().__init__(*screen.get_rect(topleft=(0, 0)), screen)
 
-        self.overlay: Surface = Surface(self.rect.size, pygame.SRCALPHA)
-        self.overlay.set_alpha(220)
-        self.overlay.fill(self.overlay_fill_color)
+        self.overlay: Surface = self.get_overlay()
         
         self.message_text = FontManager().get_font(
             self.font_size,
@@ -48,7 +49,7 @@ class Dialog(SurfaceRect):
         self.dialog_box_surface: Surface = Surface(self.dialog_box_rect.size, pygame.SRCALPHA)
         
         self.buttons: Dict[str, Dict[str, Union[Surface, Rect, str, Callable]]] = options
-        for i, button_dict in enumerate(self.buttons.values()):
+        for i, (label, button_dict) in enumerate(self.buttons.items()):
             """
                 Button rects are relative to dialog box,
                 so positioning starts at 0 on the x-axis.
@@ -64,10 +65,29 @@ class Dialog(SurfaceRect):
                 self.button_width,
                 self.button_height
             )
+            button_dict["text_surface"] = FontManager().get_font(
+                self.font_size,
+                self.font_color if not button_dict["filled"] else self.box_fill_color,
+                label.capitalize()
+            )
         
         self.init: bool = False
+        # Scene, overlay and dialog box composited once, in the display format
+        self.composite: Optional[Surface] = None
         self.relative_mouse_pos: Coords = None
 
+    def get_overlay(self) -> Surface:
+        key: Tuple[Tuple[int, int], Tuple[int, ...]] = (self.rect.size, tuple(self.overlay_fill_color))
+        if key not in Dialog.overlays:
+            overlay: Surface = Surface(self.rect.size, pygame.SRCALPHA)
+            overlay.set_alpha(220)
+            overlay.fill(self.overlay_fill_color)
+            Dialog.overlays[key] = overlay
+        return Dialog.overlays[key]
+
+    def is_frozen(self) -> bool:
+        return self.composite != None
+
     def is_hovered(self, mouse_pos: Optional[Coords] = None) -> bool:
         return self.rect.collidepoint(mouse_pos)
 
@@ -110,11 +130,7 @@ class Dialog(SurfaceRect):
             (0, 0, *button_dict["rect"].size),
             2-(2*button_dict["filled"])
         )
-        button_text: Surface = FontManager().get_font(
-            self.font_size,
-            self.font_color if not button_dict["filled"] else self.box_fill_color,
-            label.capitalize()
-        )
+        button_text: Surface = button_dict["text_surface"]
         button_dict["surface"].blit(
             button_text,
             (
@@ -140,6 +156,22 @@ class Dialog(SurfaceRect):
         
         self.blit(self.dialog_box_surface, self.dialog_box_rect)
 
+    def freeze(self, scene: Surface) -> None:
+        """
+            Composites the scene under the dialog once, the dialog is then drawn
+            with a single blit and the scene does not need to be drawn until it closes
+        """
+        self.blit(scene, (0, 0))
+        self.init = False
+        self._draw()
+        self.composite = self.convert()
+
+    def draw(self):
+        if self.composite:
+            self.screen.blit(self.composite, self.rect.topleft)
+        else:
+            super().draw()
+
     def _draw(self):
         # ANCHOR[id=DialogDraw]
         if not self.init:
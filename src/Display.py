@@ -1,5 +1,5 @@
 from functools import reduce
-from typing import Callable, Dict, List, Optional, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from .utility import *
 from .SurfaceRect import SurfaceRect
 from .SubSurfaceRect import SubSurfaceRect
@@ -63,7 +63,20 @@ class Display(SubSurfaceRect):
         self.tooltip_surface: Surface = None
         
         
-        self.display_data: List[Dict[str, Union[str, int, float, bool]]] = []
+        # Rendered surface, layout rect and hint per display item key
+        self.items: Dict[str, Dict] = {}
+        self.item_keys: List[str] = []
+        self.bar_surface: Surface = Surface(self.rect.size)
+        self.is_layout_dirty: bool = True
+        self.needs_redraw: bool = True
+        
+        self.tooltip_text: Optional[str] = None
+        
+        self.performance_hud_lines: Tuple[str, ...] = ()
+        self.performance_hud_surface: Surface = None
+        
+        self.game_output_version: Optional[Tuple] = None
+        self.game_output_surface: Surface = None
         
         self.relative_mouse_position: Coords = None
     
@@ -101,7 +114,9 @@ class Display(SubSurfaceRect):
         return [absolute_mouse_pos[0] - self.rect.x, absolute_mouse_pos[1] - self.rect.y]
 
     def set_tooltip_surface_rect(self, text: str, absolute_mouse_pos) -> None:
-        self.tooltip_surface = FontManager().get_font(self.font_size, self.fill_color, text)
+        if text != self.tooltip_text or self.tooltip_surface == None:
+            self.tooltip_text = text
+            self.tooltip_surface = FontManager().get_font(self.font_size, self.fill_color, text)
         self.tooltip_rect = Rect(
             *self.get_tooltip_pos(absolute_mouse_pos, self.tooltip_surface.get_size()),
             *self.tooltip_surface.get_size()
@@ -115,83 +130,91 @@ class Display(SubSurfaceRect):
     ) -> None:
         self.relative_mouse_pos = self.get_relative_mouse_pos(absolute_mouse_pos)
         # ANCHOR[id=DisplayUpdate]
-        if tooltip_text:
-            self.set_tooltip_surface_rect(tooltip_text, absolute_mouse_pos)
+        self.cursor_pos = self.get_cursor_pos(absolute_mouse_pos)
+        self.cursor_icon_name = icons.get("cursor")
+
+        # Items are keyed, only the ones whose text or icon changed are rendered again
+        item_keys: List[str] = []
+        for index, d in enumerate(data):
+            key: str = d.get("key", str(index))
+            content: str = d["data"] if d["type"] == "text" else d["icon_name"]
+            item: Optional[Dict] = self.items.get(key)
+            if item == None or item["type"] != d["type"] or item["content"] != content:
+                self.items[key] = item = {
+                    "type": d["type"],
+                    "content": content,
+                    "surface": FontManager().get_font(self.font_size, self.font_color, content) if d["type"] == "text"
+                        else ImageCache().get_image(content, True, self.display_icon_size),
+                }
+                self.is_layout_dirty = True
+            item["hint"] = d["hint"]
+            item_keys.append(key)
+        if item_keys != self.item_keys:
+            self.item_keys = item_keys
+            self.items = {key: self.items[key] for key in item_keys}
+            self.is_layout_dirty = True
+        if self.is_layout_dirty:
+            self.set_layout()
+
+        hint: Optional[str] = next(
+            (self.items[key]["hint"] for key in self.item_keys if self.is_data_hovered(self.items[key]["rect"])),
+            None
+        )
+        if hint or tooltip_text:
+            self.set_tooltip_surface_rect(hint or tooltip_text, absolute_mouse_pos)
         else:
             self.tooltip_surface = None
             self.tooltip_rect = None
-        
-        self.cursor_pos = self.get_cursor_pos(absolute_mouse_pos)
-        self.cursor_icon_name = icons.get("cursor")
+
+    def set_layout(self) -> None:
+        width_acc = self.gap
+        for key in self.item_keys:
+            item: Dict = self.items[key]
+            item["rect"] = Rect(
+                width_acc - self.gap,
+                0,
+                item["surface"].get_width() + 2*self.gap,
+                self.rect.height
+            )
+            width_acc += item["surface"].get_width() + self.gap*2
+
+    def invalidate(self) -> None:
         """
-        TODO - Investigate if this data can be initialized and minimally updated (hint for example?)
-        Maybe data can have aunique key in a dict.
-        Since display icons can have the size, maybe their Surface can be pre-set.
+            The bar is blitted again on the next draw, for when something was drawn over it
         """
-        width_acc = self.gap
-        self.display_data = data
-        for d in self.display_data:
-            if d["type"] == "text":
-                text_surface = FontManager().get_font(self.font_size, self.font_color, d["data"])
-                text_rect: Rect = Rect(
-                    width_acc - self.gap,
-                    0,
-                    text_surface.get_width() + 2*self.gap,
-                    self.rect.height
-                )
-                width_acc += text_surface.get_width() + self.gap*2
-                d["text_surface"] = text_surface
-                d["text_rect"] = text_rect
-                if self.is_data_hovered(text_rect):
-                    hint: str = d["hint"]
-                    self.set_tooltip_surface_rect(hint, absolute_mouse_pos)
-                # pygame.draw.rect(self.surface, (0, 255, 0), text_rect, 2) # FIXME - DEBUG ONLY
-            elif d["type"] == "icon":
-                icon_image_surface: Surface = ImageCache().get_image(d["icon_name"], True, self.display_icon_size)
-                icon_image_rect: Rect = Rect(
-                    width_acc - self.gap,
-                    0,
-                    icon_image_surface.get_width() + 2*self.gap,
-                    self.rect.height
-                )
-                width_acc += icon_image_surface.get_width() + self.gap*2
-                d["icon_image_surface"] = icon_image_surface
-                d["icon_image_rect"] = icon_image_rect
-                if self.is_data_hovered(icon_image_rect):
-                    hint: str = d["hint"]
-                    self.set_tooltip_surface_rect(hint, absolute_mouse_pos)
+        self.needs_redraw = True
+
+    def mark_drawn_over(self, rect: Rect) -> None:
+        if self.rect.colliderect(rect):
+            self.needs_redraw = True
 
     def draw(self) -> None:
         # ANCHOR[id=DisplayDraw]
         """
             Override draw so that cursor can be drawn later
         """
-        self.fill(self.fill_color)
-        self.draw_data()
+        if self.is_layout_dirty:
+            self.bar_surface.fill(self.fill_color)
+            self.draw_data()
+            self.is_layout_dirty = False
+            self.needs_redraw = True
+        # The screen keeps the bar between frames unless the cursor, a tooltip or a dialog was drawn over it
+        if self.needs_redraw:
+            self.blit(self.bar_surface, (0, 0))
+            self.needs_redraw = False
         # self.screen.blit(self, self.rect.topleft)
     
     def draw_data(self):
-        for d in self.display_data:
-            if d["type"] == "text":
-                self.blit(d["text_surface"], (
-                    d["text_rect"].x + (d["text_rect"].width - d["text_surface"].get_width()) // 2,
-                    (d["text_rect"].height - d["text_surface"].get_height()) // 2,
-                    d["text_surface"].get_width(),
-                    d["text_surface"].get_height()
-                ))
-            elif d["type"] == "icon":
-                pygame.draw.rect(self.surface, self.icon_fill_color, (
-                    d["icon_image_rect"].x + (d["icon_image_rect"].width - d["icon_image_surface"].get_width()) // 2,
-                    (d["icon_image_rect"].height - d["icon_image_surface"].get_height()) // 2,
-                    d["icon_image_surface"].get_width(),
-                    d["icon_image_surface"].get_height()
-                ), border_radius=2)
-                self.blit(d["icon_image_surface"], (
-                    d["icon_image_rect"].x + (d["icon_image_rect"].width - d["icon_image_surface"].get_width()) // 2,
-                    (d["icon_image_rect"].height - d["icon_image_surface"].get_height()) // 2,
-                    d["icon_image_surface"].get_width(),
-                    d["icon_image_surface"].get_height()
-                ))
+        for key in self.item_keys:
+            item: Dict = self.items[key]
+            surface: Surface = item["surface"]
+            position: Coords = (
+                item["rect"].x + (item["rect"].width - surface.get_width()) // 2,
+                (item["rect"].height - surface.get_height()) // 2
+            )
+            if item["type"] == "icon":
+                pygame.draw.rect(self.bar_surface, self.icon_fill_color, (*position, *surface.get_size()), border_radius=2)
+            self.bar_surface.blit(surface, position)
     
     def draw_tooltip(self):
         if self.tooltip_surface and self.tooltip_rect:
@@ -208,9 +231,43 @@ class Display(SubSurfaceRect):
                 self.tooltip_surface,
                 self.tooltip_rect
             )
+            self.mark_drawn_over(self.tooltip_rect.inflate(2*self.tooltip_padding, 2*self.tooltip_padding))
     
+    def render_text_panel(self, lines: List[str]) -> Surface:
+        text_surfaces: List[Surface] = [FontManager().get_font(self.font_size, self.font_color, line) for line in lines]
+        panel_surface: Surface = Surface((
+            max([text_surface.get_width() for text_surface in text_surfaces] + [0]) + 2 * self.tooltip_padding,
+            sum([text_surface.get_height() for text_surface in text_surfaces]) + 2 * self.tooltip_padding
+        ), pygame.SRCALPHA)
+        panel_surface.fill((*self.fill_color[:3], 220))
+        y: int = self.tooltip_padding
+        for text_surface in text_surfaces:
+            panel_surface.blit(text_surface, (self.tooltip_padding, y))
+            y += text_surface.get_height()
+        return panel_surface
+
+    def draw_performance_hud(self, lines: List[str]) -> None:
+        # Lines only change a few times per second, the rendered panel is reused in between
+        if tuple(lines) != self.performance_hud_lines:
+            self.performance_hud_lines = tuple(lines)
+            self.performance_hud_surface = self.render_text_panel(lines)
+        self.mark_drawn_over(self.screen.blit(self.performance_hud_surface, (self.tooltip_padding, self.tooltip_padding)))
+
+    def draw_game_output(self, get_lines: Callable[[], List[str]], version: Tuple) -> None:
+        """
+            Last lines written by the game, above the bottom left corner of the bar.
+            Lines are only asked for when version changed.
+        """
+        if version != self.game_output_version:
+            self.game_output_version = version
+            self.game_output_surface = self.render_text_panel(get_lines())
+        self.mark_drawn_over(self.screen.blit(
+            self.game_output_surface,
+            (self.tooltip_padding, self.rect.top - self.game_output_surface.get_height() - self.tooltip_padding)
+        ))
+
     def draw_cursor(self):
-        self.screen.blit(
+        self.mark_drawn_over(self.screen.blit(
             self.icons.get(self.cursor_icon_name),
             self.cursor_pos
-        )
\ No newline at end of file
+        ))
\ No newline at end of file
@@ -1,6 +1,8 @@
 from math import ceil, floor
 from os import path
-from typing import Callable, List, Optional, Tuple, Union
+from uuid import uuid4 as u4
+from typing import Callable, List, Optional, Set, Tuple, Union
+import numpy as np
 from .utility import *
 from .SurfaceRect import SurfaceRect
 from .SubSurfaceRect import SubSurfaceRect
@@ -9,6 +11,12 @@ from .HitBoxData import HitBoxData
 from .Sprite import Sprite
 from .HitBox import HitBox
 from .ImageCache import ImageCache
+from .InputSession import InputSession
+from .TileLayer import TileLayer, TileLayerState
+from .Prefab import Prefab
+from .PrefabData import PrefabData
+from .PrefabInstance import PrefabInstance
+from .PrefabInstanceData import PrefabInstanceData
 
 class DrawingArea(SubSurfaceRect):
     # ANCHOR - DrawingArea
@@ -32,6 +40,8 @@ class DrawingArea(SubSurfaceRect):
         snap_threshold: int,
         delete_highlight_color: Color,
         move_highlight_color: Color,
+        analysis_highlight_color: Color,
+        analysis_highlight_outline_width: int,
         scrolling_speed: int,
         player_position_icon: str
     ) -> None:
@@ -62,12 +72,17 @@ class DrawingArea(SubSurfaceRect):
         self.move_selection_outline_width: int = move_selection_outline_width
         self.move_highlight_color: Color = move_highlight_color
         
+        self.analysis_highlight_color: Color = analysis_highlight_color
+        self.analysis_highlight_outline_width: int = analysis_highlight_outline_width
+        self.analysis_highlight_rects: List[Rect] = []
+        
         self.clone_selection_outline_color: Color = clone_selection_outline_color
         self.clone_selection_outline_width: int = clone_selection_outline_width
         
         self.canvas_grid_cell_size: int = canvas_grid_cell_size
         self.canvas_grid_color = canvas_grid_color
         self.canvas: Surface = Surface((canvas_width, canvas_height), pygame.SRCALPHA)
+        self.tile_layer: TileLayer = TileLayer(canvas_grid_cell_size or 0, *self.get_grid_size())
         
         self.snap_threshold: int = snap_threshold
         
@@ -78,6 +93,19 @@ class DrawingArea(SubSurfaceRect):
         
         self.sprites: List[Sprite] = []
         self.hitboxes: List[HitBox] = []
+        self.hitboxes_version: int = 0
+        
+        self.prefabs: Dict[str, Prefab] = {}
+        self.prefab_instances: List[PrefabInstance] = []
+        # Bumped when an instance is added, moved or removed, or a prefab edited
+        self.prefabs_version: int = 0
+        # Prefab stamped instead of the selected sprite in sprite mode
+        self.active_prefab_id: Optional[str] = None
+        self.prefab_ghost_pos: Optional[Coords] = None
+        
+        # Visible hitboxes composited once per hitbox change or viewport move
+        self.hitbox_layer: Surface = Surface(self.rect.size, pygame.SRCALPHA)
+        self.hitbox_layer_key: Optional[Tuple] = None
         
         self.ghost_sprite: Sprite = None
         self.display_ghost_sprite = False
@@ -88,8 +116,31 @@ class DrawingArea(SubSurfaceRect):
         self.is_cloning: bool = False
         
         self.moving_sprite_id: str = None
+        self.moving_tile_origin: Optional[Tuple[int, int]] = None
+        self.moving_prefab_instance: Optional[PrefabInstance] = None
+        
+        # Shift + drag in move mode, turns what is inside the rectangle into a prefab
+        self.is_capturing: bool = False
         
-        self.selection_rect_alpha_surface: Surface = None
+        # Drag on empty space in move mode, selects what is inside the rectangle
+        self.is_selecting: bool = False
+        self.selected_sprites: List[Sprite] = []
+        self.selected_hitboxes: List[HitBox] = []
+        self.selected_prefab_instances: List[PrefabInstance] = []
+        # (columns, rows) of the selected tiles
+        self.selected_cells: Tuple[np.ndarray, np.ndarray] = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp))
+        
+        # Dragging the selection moves all of it by one offset
+        self.is_batch_moving: bool = False
+        self.batch_move_offset: Coords = [0, 0]
+        # Top left of every selected object when the drag started, in get_selected_objects order
+        self.batch_move_origins: np.ndarray = np.zeros((0, 2), dtype=np.int64)
+        self.batch_move_anchor: Coords = [0, 0]
+        # Palette indices of the selected tiles, taken out of the tile layer while dragged
+        self.lifted_tiles: Optional[np.ndarray] = None
+        
+        # Scratch surface for the translucent selection fill, reused every frame
+        self.selection_rect_alpha_surface: Surface = Surface(self.rect.size, pygame.SRCALPHA)
         
         self.relative_mouse_pos: Coords = None
         self.canvas_mouse_pos: Coords = None
@@ -102,11 +153,29 @@ class DrawingArea(SubSurfaceRect):
         self.highlight_color: Color = None
         self.highlight_outline_width: int = None
         
-        self.temporary_sprites: List[Sprite] = []
+        # Clone preview, positions only: sprites are created once the drag is released
+        self.temporary_sprite_positions: List[Tuple[int, int]] = []
+        self.temporary_sprite_positions_key: Optional[Tuple] = None
         self.simple_click = True
+        
+        self.is_filling: bool = False
+        self.fill_start_cell: Optional[Tuple[int, int]] = None
+        self.fill_mask: Optional[np.ndarray] = None
+        self.fill_mask_key: Optional[Tuple] = None
+        self.fill_preview_key: Optional[Tuple] = None
+        self.fill_preview_surface: Optional[Surface] = None
+        self.fill_preview_rect: Optional[Rect] = None
     
     def is_empty(self):
-        return len(self.sprites) + len(self.hitboxes) == 0
+        return len(self.sprites) + len(self.hitboxes) + len(self.prefab_instances) + self.tile_layer.get_nb_tiles() == 0
+
+    def get_grid_size(self) -> Coords:
+        if not self.canvas_grid_cell_size or self.canvas_grid_cell_size <= 0:
+            return [0, 0]
+        return [
+            self.canvas.get_width() // self.canvas_grid_cell_size,
+            self.canvas.get_height() // self.canvas_grid_cell_size
+        ]
     
     def get_right_edge_rect(self) -> Rect:
         return Rect(
@@ -165,6 +234,43 @@ class DrawingArea(SubSurfaceRect):
     def get_sprite_id_at(self) -> Union[str, None]:
         sprite: Sprite = self.get_sprite_at()
         return sprite.get_id() if sprite else None
+
+    def get_tile_rect_at(self) -> Union[Rect, None]:
+        cell: Tuple[int, int] = self.tile_layer.get_cell(self.canvas_mouse_pos)
+        return self.tile_layer.get_cell_rect(*cell) if self.tile_layer.get_name_at(*cell) != None else None
+
+    def get_sprite_or_tile_rect_at(self) -> Union[Rect, None]:
+        # Free sprites are drawn over prefab instances, and instances over the tile layer
+        sprite: Sprite = self.get_sprite_at()
+        if sprite != None:
+            return sprite.get_sprite_rect(topleft=sprite.get_sprite_rect().topleft)
+        prefab_instance: Optional[PrefabInstance] = self.get_prefab_instance_at()
+        return prefab_instance.get_rect() if prefab_instance != None else self.get_tile_rect_at()
+
+    def get_prefab(self, _id: Optional[str]) -> Optional[Prefab]:
+        return self.prefabs.get(_id)
+
+    def get_active_prefab(self) -> Optional[Prefab]:
+        return self.prefabs.get(self.active_prefab_id)
+
+    def get_prefab_instance_at(self) -> Optional[PrefabInstance]:
+        prefab_instances: List[PrefabInstance] = list(filter(lambda p : p.get_rect().collidepoint(self.canvas_mouse_pos), reversed(self.prefab_instances)))
+        return prefab_instances[0] if len(prefab_instances) else None
+
+    def get_prefab_instances_within_rectangle(self, rect: Rect) -> List[PrefabInstance]:
+        return list(filter(lambda prefab_instance: rect.contains(prefab_instance.get_rect()), self.prefab_instances))
+
+    def get_prefab_instances_intersecting_rectangle(self, rect: Rect) -> List[PrefabInstance]:
+        return list(filter(lambda prefab_instance: rect.colliderect(prefab_instance.get_rect()), self.prefab_instances))
+
+    def flatten_prefab_instances(self) -> Tuple[List[SpriteData], List[HitBoxData]]:
+        sprites: List[SpriteData] = []
+        hitboxes: List[HitBoxData] = []
+        for prefab_instance in self.prefab_instances:
+            instance_sprites, instance_hitboxes = prefab_instance.get_prefab().flatten(prefab_instance.get_data())
+            sprites += instance_sprites
+            hitboxes += instance_hitboxes
+        return (sprites, hitboxes)
     
     def get_hitbox_at(self) -> Union[HitBox, None]:
         hitboxes = list(filter(lambda h : h.get_rect().collidepoint(self.canvas_mouse_pos), reversed(self.hitboxes)))
@@ -179,7 +285,7 @@ class DrawingArea(SubSurfaceRect):
         return list(filter(lambda hitbox: rect.colliderect(hitbox.get_rect()), self.hitboxes))
 
     def has_sprites(self) -> bool:
-        return True if len(self.sprites) else False
+        return True if len(self.sprites) or len(self.prefab_instances) or not self.tile_layer.is_empty() else False
 
     def get_sprites_within_rectangle(self, rect: Rect) -> List[Sprite]:
         return list(filter(lambda sprite: rect.contains(sprite.get_sprite_rect()), self.sprites))
@@ -187,6 +293,38 @@ class DrawingArea(SubSurfaceRect):
     def get_sprites_intersecting_rectangle(self, rect: Rect) -> List[Sprite]:
         return list(filter(lambda sprite: rect.colliderect(sprite.get_sprite_rect()), self.sprites))
 
+    def get_object_rects_within_rectangle(self, rect: Rect) -> List[Rect]:
+        return list(map(
+            lambda i : i.get_rect(),
+            self.get_hitboxes_within_rectangle(rect)
+        )) + list(map(
+            lambda i : i.get_sprite_rect(),
+            self.get_sprites_within_rectangle(rect)
+        )) + list(map(
+            lambda i : i.get_rect(),
+            self.get_prefab_instances_within_rectangle(rect)
+        )) + self.tile_layer.get_tile_rects_within_rectangle(rect)
+
+    def get_memory_stats(self) -> Dict[str, int]:
+        sprite_surface_bytes: int = sum(map(get_surface_bytes, self.sprites))
+        canvas_bytes: int = get_surface_bytes(self.canvas)
+        layer_bytes: int = sum(map(get_surface_bytes, [
+            self.hitbox_layer, self.selection_rect_alpha_surface, self.fill_preview_surface
+        ]))
+        tile_layer_bytes: int = self.tile_layer.grid.nbytes
+        prefab_surface_bytes: int = sum(prefab.get_surface_bytes() for prefab in self.prefabs.values())
+        return {
+            "sprites": len(self.sprites),
+            "prefabs": len(self.prefabs),
+            "prefab_instances": len(self.prefab_instances),
+            "sprite_surface_bytes": sprite_surface_bytes,
+            "canvas_bytes": canvas_bytes,
+            "layer_bytes": layer_bytes,
+            "tile_layer_bytes": tile_layer_bytes,
+            "prefab_surface_bytes": prefab_surface_bytes,
+            "bytes": sprite_surface_bytes + canvas_bytes + layer_bytes + tile_layer_bytes + prefab_surface_bytes
+        }
+
     def get_viewport_rect(self) -> Rect:
         return Rect(
             *multiply_int(-1, self.panning_offset),
@@ -212,16 +350,293 @@ class DrawingArea(SubSurfaceRect):
     def done_moving_sprite(self):
         self.is_moving = False
         self.moving_sprite_id = None
+        self.moving_tile_origin = None
+        self.moving_prefab_instance = None
+
+    def done_capturing(self) -> None:
+        self.is_capturing = False
+        self.highlight_rects = []
+
+    # ANCHOR[id=DrawingAreaSelection]
+    def has_selection(self) -> bool:
+        return len(self.get_selected_objects()) + len(self.selected_cells[0]) > 0
+
+    def get_selected_objects(self) -> List[Union[Sprite, HitBox, PrefabInstance]]:
+        return self.selected_sprites + self.selected_hitboxes + self.selected_prefab_instances
+
+    def get_selection_rects(self) -> List[Rect]:
+        columns, rows = self.selected_cells
+        cell_size: int = self.tile_layer.cell_size
+        # Lifted tiles follow the drag
+        offset_x, offset_y = self.batch_move_offset if self.lifted_tiles is not None else (0, 0)
+        return [sprite.get_sprite_rect() for sprite in self.selected_sprites] + \
+            [Rect(hitbox.get_rect()) for hitbox in self.selected_hitboxes] + \
+            [prefab_instance.get_rect() for prefab_instance in self.selected_prefab_instances] + \
+            [
+                Rect(column * cell_size + offset_x, row * cell_size + offset_y, cell_size, cell_size)
+                for column, row in zip(columns.tolist(), rows.tolist())
+            ]
+
+    def get_selection_bounds(self) -> Optional[Rect]:
+        rects: List[Rect] = self.get_selection_rects()
+        return rects[0].unionall(rects[1:]) if len(rects) else None
+
+    def get_selection_data(self) -> Tuple[List[SpriteData], List[HitBoxData], List[PrefabInstanceData]]:
+        """
+            Entries of the selection, the selected tiles as sprite entries
+        """
+        return (
+            self.tile_layer.cells_to_sprite_data(*self.selected_cells) + [sprite.get_data() for sprite in self.selected_sprites],
+            [hitbox.get_data() for hitbox in self.selected_hitboxes],
+            [prefab_instance.get_data() for prefab_instance in self.selected_prefab_instances]
+        )
+
+    def is_selection_hovered(self) -> bool:
+        return self.canvas_mouse_pos != None and Rect(self.canvas_mouse_pos, (1, 1)).collidelist(self.get_selection_rects()) != -1
+
+    def clear_selection(self) -> None:
+        self.selected_sprites = []
+        self.selected_hitboxes = []
+        self.selected_prefab_instances = []
+        self.selected_cells = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp))
+
+    def select_within_rectangle(self, rect: Rect) -> None:
+        self.selected_sprites = self.get_sprites_within_rectangle(rect)
+        self.selected_hitboxes = self.get_hitboxes_within_rectangle(rect)
+        self.selected_prefab_instances = self.get_prefab_instances_within_rectangle(rect)
+        self.selected_cells = self.tile_layer.get_cells_within_rectangle(rect)
+
+    def select_data(self, sprite_data: List[SpriteData], hitbox_data: List[HitBoxData], prefab_instance_data: List[PrefabInstanceData]) -> None:
+        """
+            Selects the objects of the entries, the sprite entries that are not free sprites
+            are looked up in the tile layer
+        """
+        sprite_ids: Set[str] = set(sprite["id"] for sprite in sprite_data)
+        hitbox_ids: Set[str] = set(hitbox["id"] for hitbox in hitbox_data)
+        prefab_instance_ids: Set[str] = set(prefab_instance["id"] for prefab_instance in prefab_instance_data)
+        self.selected_sprites = [sprite for sprite in self.sprites if sprite.get_id() in sprite_ids]
+        self.selected_hitboxes = [hitbox for hitbox in self.hitboxes if hitbox.get_id() in hitbox_ids]
+        self.selected_prefab_instances = [prefab_instance for prefab_instance in self.prefab_instances if prefab_instance.get_id() in prefab_instance_ids]
+        free_sprite_ids: Set[str] = set(sprite.get_id() for sprite in self.selected_sprites)
+        cells: np.ndarray = np.array([
+            self.tile_layer.get_cell(sprite["coordinates"]) for sprite in sprite_data if sprite["id"] not in free_sprite_ids
+        ], dtype=np.intp).reshape(-1, 2)
+        self.selected_cells = (cells[:, 0], cells[:, 1])
+
+    def done_selecting(self) -> None:
+        self.is_selecting = False
+        self.highlight_rects = []
+
+    def start_batch_move(self) -> None:
+        self.is_batch_moving = True
+        self.start_pos = self.canvas_mouse_pos
+        self.batch_move_offset = [0, 0]
+        self.batch_move_anchor = list(self.get_selection_bounds().topleft)
+        self.batch_move_origins = np.array(
+            [sprite.get_sprite_rect().topleft for sprite in self.selected_sprites] +
+            [hitbox.get_top_left() for hitbox in self.selected_hitboxes] +
+            [prefab_instance.get_rect().topleft for prefab_instance in self.selected_prefab_instances],
+            dtype=np.int64
+        ).reshape(-1, 2)
+        self.clear_analysis_highlight_rects()
+        columns, rows = self.selected_cells
+        lifted_tiles: np.ndarray = self.tile_layer.lift_cells(columns, rows)
+        # Cells emptied since they were selected are left out
+        is_tile: np.ndarray = lifted_tiles != TileLayer.EMPTY
+        self.selected_cells = (columns[is_tile], rows[is_tile])
+        self.lifted_tiles = lifted_tiles[is_tile]
+
+    def update_batch_move(self) -> None:
+        # The top left of the selection snaps to the grid, everything else keeps its place relative to it
+        anchor_pos: Coords = self.snap_coords(add_list(self.batch_move_anchor, self.canvas_mouse_pos, multiply_int(-1, self.start_pos)))
+        self.set_batch_move_offset([anchor_pos[0] - self.batch_move_anchor[0], anchor_pos[1] - self.batch_move_anchor[1]])
+
+    def set_batch_move_offset(self, offset: Coords) -> None:
+        self.batch_move_offset = offset
+        positions: List[List[int]] = (self.batch_move_origins + np.array(offset, dtype=np.int64)).tolist()
+        for selected_object, position in zip(self.get_selected_objects(), positions):
+            selected_object.set_top_left(position)
+        self.hitboxes_version += 1
+        self.prefabs_version += 1
+
+    def interrupt_batch_move(self) -> None:
+        self.set_batch_move_offset([0, 0])
+        self.tile_layer.place_cells(*self.selected_cells, self.lifted_tiles)
+        self.done_batch_moving()
+
+    def done_batch_moving(self) -> None:
+        self.is_batch_moving = False
+        self.batch_move_offset = [0, 0]
+        self.lifted_tiles = None
+
+    def commit_batch_move(self, move_objects: Callable[[Dict[str, Set[str]], Coords, List[SpriteData]], None], push_history: Callable[[], None]) -> None:
+        """
+            Drops the selection where it was dragged: tiles that land on empty grid cells go
+            back into the tile layer, the others become free sprites
+        """
+        offset: Coords = self.batch_move_offset
+        columns, rows = self.selected_cells
+        lifted_tiles: np.ndarray = self.lifted_tiles
+        # Tiles back where they were for the history, which is of the map before the move
+        self.tile_layer.place_cells(columns, rows, lifted_tiles)
+        self.done_batch_moving()
+        if offset == [0, 0]:
+            return
+        push_history()
+        self.tile_layer.lift_cells(columns, rows)
+        cell_size: int = self.tile_layer.cell_size
+        placed: np.ndarray = np.zeros(len(columns), dtype=bool)
+        if cell_size > 0 and offset[0] % cell_size == 0 and offset[1] % cell_size == 0:
+            columns, rows = columns + offset[0] // cell_size, rows + offset[1] // cell_size
+            placed = self.tile_layer.place_cells(columns, rows, lifted_tiles)
+        off_grid_tiles: List[SpriteData] = [
+            {**tile, "id": str(u4()), "coordinates": [tile["coordinates"][0] + offset[0], tile["coordinates"][1] + offset[1]]}
+            for tile in self.tile_layer.cells_to_sprite_data(*self.selected_cells, lifted_tiles)
+        ]
+        new_sprite_data: List[SpriteData] = self.add_sprite_data([tile for tile, is_placed in zip(off_grid_tiles, placed.tolist()) if not is_placed])
+        move_objects({
+            "sprite": set(sprite.get_id() for sprite in self.selected_sprites),
+            "hitbox": set(hitbox.get_id() for hitbox in self.selected_hitboxes),
+            "prefab_instance": set(prefab_instance.get_id() for prefab_instance in self.selected_prefab_instances),
+        }, offset, new_sprite_data)
+        new_sprite_ids: Set[str] = set(sprite["id"] for sprite in new_sprite_data)
+        self.selected_sprites += [sprite for sprite in self.sprites if sprite.get_id() in new_sprite_ids]
+        self.selected_cells = (columns[placed], rows[placed])
 
     def interrupt_moving_sprite(self):
+        if self.moving_prefab_instance != None:
+            self.moving_prefab_instance.set_top_left(self.start_pos)
+            self.prefabs_version += 1
         moving_sprite: Union[Sprite, None] = self.get_sprite_by_id(self.moving_sprite_id)
         if moving_sprite != None:
-            moving_sprite.set_top_left(self.start_pos)
+            if self.moving_tile_origin != None:
+                self.sprites.remove(moving_sprite)
+                self.tile_layer.place(*self.moving_tile_origin, moving_sprite.get_name())
+            else:
+                moving_sprite.set_top_left(self.start_pos)
         self.done_moving_sprite()
 
+    def lift_tile_at(self) -> Union[str, None]:
+        """
+            Takes the tile under the mouse out of the tile layer as a temporary sprite, so it
+            can be dragged like any other sprite. Returns the id of that sprite.
+        """
+        cell: Tuple[int, int] = self.tile_layer.get_cell(self.canvas_mouse_pos)
+        name: Union[str, None] = self.tile_layer.get_name_at(*cell)
+        if name == None:
+            return None
+        self.tile_layer.erase(*cell)
+        sprite: Sprite = Sprite(
+            *self.tile_layer.get_cell_rect(*cell).topleft,
+            self.canvas,
+            ImageCache().get_image(name),
+            name
+        )
+        self.sprites.append(sprite)
+        self.moving_tile_origin = cell
+        return sprite.get_id()
+
+    def is_free_tile(self, sprite: Sprite) -> bool:
+        topleft: Coords = sprite.get_sprite_rect().topleft
+        return self.tile_layer.is_tile(sprite.get_image(), list(topleft)) and self.tile_layer.get_name_at(*self.tile_layer.get_cell(topleft)) == None
+
+    def drop_tile(self, sprite: Sprite, add_data: Callable[[Union[SpriteData, HitBoxData], str], None]) -> None:
+        """
+            A lifted tile goes back into the tile layer if it was dropped on an empty grid point,
+            otherwise it stays where it was dropped as a free sprite.
+        """
+        if self.is_free_tile(sprite):
+            self.sprites.remove(sprite)
+            self.tile_layer.place(*self.tile_layer.get_cell(sprite.get_sprite_rect().topleft), sprite.get_name())
+        else:
+            add_data(sprite.get_data(), "sprite")
+
+    def commit_clone(self, add_data: Callable[[Union[SpriteData, HitBoxData, List[SpriteData]], str], None], push_history: Callable[[], None]) -> None:
+        """
+            Turns the clone preview into tiles and sprites in one batch
+        """
+        if not len(self.temporary_sprite_positions) or self.ghost_sprite == None:
+            return
+        name: str = self.ghost_sprite.get_name()
+        image: Surface = ImageCache().get_image(name)
+        push_history()
+        self.clear_analysis_highlight_rects()
+        tile_mask: np.ndarray = np.zeros(self.tile_layer.grid.shape, dtype=bool)
+        sprites: List[Sprite] = []
+        for position in self.temporary_sprite_positions:
+            if self.tile_layer.is_tile(image, position) and self.tile_layer.get_name_at(*self.tile_layer.get_cell(position)) == None:
+                column, row = self.tile_layer.get_cell(position)
+                tile_mask[row, column] = True
+            else:
+                sprites.append(Sprite(*position, self.canvas, image, name))
+        self.tile_layer.fill_mask(tile_mask, name)
+        if len(sprites):
+            self.sprites += sprites
+            add_data([sprite.get_data() for sprite in sprites], "sprite")
+
+    def place_sprite(self, sprite: Sprite, add_data: Callable[[Union[SpriteData, HitBoxData], str], None]) -> None:
+        """
+            Sprites of exactly one grid cell placed on an empty grid point are stored in the tile layer,
+            a tile already there is kept and the sprite goes over it as a free sprite
+        """
+        if self.is_free_tile(sprite):
+            self.clear_analysis_highlight_rects()
+            self.tile_layer.place(*self.tile_layer.get_cell(sprite.get_sprite_rect().topleft), sprite.get_name())
+        else:
+            self.add_sprite(sprite)
+            add_data(sprite.get_data(), "sprite")
+
+    def add_sprite_data(self, data: List[SpriteData]) -> List[SpriteData]:
+        """
+            Places sprite entries like loaded sprites are: the ones that fit an empty cell go
+            into the tile layer. Returns the entries added as free sprites.
+        """
+        free_sprite_data: List[SpriteData] = []
+        for sprite_data in data:
+            image: Optional[Surface] = ImageCache().get_image(sprite_data["file_name"])
+            if image == None:
+                continue
+            if self.tile_layer.is_tile(image, list(sprite_data["coordinates"])) and self.tile_layer.get_name_at(*self.tile_layer.get_cell(sprite_data["coordinates"])) == None:
+                self.tile_layer.place(*self.tile_layer.get_cell(sprite_data["coordinates"]), sprite_data["file_name"])
+            else:
+                self.sprites.append(Sprite(*sprite_data["coordinates"], self.canvas, image, sprite_data["file_name"], _id=sprite_data["id"]))
+                free_sprite_data.append(sprite_data)
+        self.clear_analysis_highlight_rects()
+        return free_sprite_data
+
+    def place_prefab_instance(self, coords: Coords, add_data: Callable[[PrefabInstanceData, str], None]) -> None:
+        prefab_instance: PrefabInstance = self.add_prefab_instance(self.active_prefab_id, coords)
+        add_data(prefab_instance.get_data(), "prefab_instance")
+
     def done_cloning(self):
         self.is_cloning = False
-        self.temporary_sprites = []
+        self.temporary_sprite_positions = []
+        self.temporary_sprite_positions_key = None
+
+    def done_filling(self):
+        self.is_filling = False
+        self.fill_start_cell = None
+        self.clear_fill_preview()
+
+    def clear_fill_preview(self):
+        self.fill_mask = None
+        self.fill_mask_key = None
+        self.fill_preview_key = None
+        self.fill_preview_surface = None
+        self.fill_preview_rect = None
+
+    def is_fill_modifier_pressed(self) -> bool:
+        return InputSession().get_pressed_keys()[KeyboardKeys.LEFT_SHIFT]
+
+    def is_capture_modifier_pressed(self) -> bool:
+        return InputSession().get_pressed_keys()[KeyboardKeys.LEFT_SHIFT]
+
+    def commit_fill(self, push_history: Callable[[], None]) -> None:
+        if self.fill_mask is not None and self.fill_mask.any():
+            push_history()
+            self.clear_analysis_highlight_rects()
+            self.tile_layer.fill_mask(self.fill_mask, self.fill_mask_key[0])
+        self.done_filling()
     
     def get_is_drawing_hitbox(self) -> bool:
         return self.is_drawing
@@ -241,7 +656,7 @@ class DrawingArea(SubSurfaceRect):
 
     def calculate_snapping_coords(self, sprite_size: Optional[Coords]=None) -> Coords:
         # Calculate canvas coordinates of the mouse (where the sprite will be placed)
-        if self.ghost_sprite != None:
+        if self.ghost_sprite != None or sprite_size != None:
             intended_canvas_pos = add_list(self.canvas_mouse_pos, (
                     -self.ghost_sprite.get_sprite_rect().width // 2,
                     -self.ghost_sprite.get_sprite_rect().height // 2
@@ -250,29 +665,31 @@ class DrawingArea(SubSurfaceRect):
                     -sprite_size[1] // 2
                 )
             )
+            return self.snap_coords(intended_canvas_pos)
+        return self.canvas_mouse_pos
 
-            # Calculate the closest grid point
-            closest_grid_x = round(intended_canvas_pos[0] / self.canvas_grid_cell_size) * self.canvas_grid_cell_size
-            closest_grid_y = round(intended_canvas_pos[1] / self.canvas_grid_cell_size) * self.canvas_grid_cell_size
+    def snap_coords(self, intended_canvas_pos: Coords) -> Coords:
+        # Calculate the closest grid point
+        closest_grid_x = round(intended_canvas_pos[0] / self.canvas_grid_cell_size) * self.canvas_grid_cell_size
+        closest_grid_y = round(intended_canvas_pos[1] / self.canvas_grid_cell_size) * self.canvas_grid_cell_size
 
-            # Calculate the distance to the closest grid point
-            distance_x = abs(intended_canvas_pos[0] - closest_grid_x)
-            distance_y = abs(intended_canvas_pos[1] - closest_grid_y)
+        # Calculate the distance to the closest grid point
+        distance_x = abs(intended_canvas_pos[0] - closest_grid_x)
+        distance_y = abs(intended_canvas_pos[1] - closest_grid_y)
 
-            # Snap to grid if within the threshold
-            if distance_x <= self.snap_threshold:
-                final_canvas_x = closest_grid_x
-            else:
-                final_canvas_x = intended_canvas_pos[0]
-                
-            if distance_y <= self.snap_threshold:
-                final_canvas_y = closest_grid_y
-            else:
-                final_canvas_y = intended_canvas_pos[1]
+        # Snap to grid if within the threshold
+        if distance_x <= self.snap_threshold:
+            final_canvas_x = closest_grid_x
+        else:
+            final_canvas_x = intended_canvas_pos[0]
+            
+        if distance_y <= self.snap_threshold:
+            final_canvas_y = closest_grid_y
+        else:
+            final_canvas_y = intended_canvas_pos[1]
 
-            # Convert the final canvas position back to screen coordinates for add_sprite and return
-            return [final_canvas_x, final_canvas_y]
-        return self.canvas_mouse_pos
+        # Convert the final canvas position back to screen coordinates for add_sprite and return
+        return [final_canvas_x, final_canvas_y]
 
     def get_mouse_position_on_canvas(self) -> Coords:
         if self.relative_mouse_pos != None:
@@ -325,23 +742,50 @@ class DrawingArea(SubSurfaceRect):
     ))
     
     def load_hitboxes(self, data: List[HitBoxData]):
+        self.hitboxes_version += 1
         self.hitboxes = list(map(
             lambda h : HitBox(*h.get("rect"), _id=h.get("id")),
             data
         ))
     
+    def load_prefabs(self, prefab_data: List[PrefabData], prefab_instance_data: List[PrefabInstanceData]):
+        self.prefabs_version += 1
+        self.prefabs = {prefab.get_id(): prefab for prefab in map(Prefab, prefab_data)}
+        self.prefab_instances = [
+            PrefabInstance(self.prefabs[data["prefab_id"]], *data["coordinates"], _id=data["id"])
+            for data in prefab_instance_data if data["prefab_id"] in self.prefabs
+        ]
+        if self.active_prefab_id not in self.prefabs:
+            self.active_prefab_id = None
+    
     def load_player_starting_position(self, data: Coords):
         self.player_starting_pos = data
     
     def load_canvas_size(self, data: Coords):
-        if data != None and data[0] != self.canvas.get_rect().width and data[1] != self.canvas.get_rect().height:
+        if data != None and (data[0] != self.canvas.get_rect().width or data[1] != self.canvas.get_rect().height):
             self.canvas = self.resize_canvas(size=data)
+        if self.tile_layer.get_size() != self.get_grid_size():
+            self.tile_layer.resize(*self.get_grid_size())
         
-    def load_data(self, data: Dict[str, Union[List[SpriteData], List[HitBoxData]]]):
+    def load_data(self, data: Dict[str, Union[List[SpriteData], List[HitBoxData]]], tile_state: Optional[TileLayerState] = None) -> List[SpriteData]:
+        """
+            Sprites that fit the grid are absorbed into the tile layer, unless a tile layer
+            state is given, in which case it is restored and data only holds free sprites.
+            Returns the sprite data that was loaded as free sprites.
+        """
+        self.clear_analysis_highlight_rects()
+        self.clear_selection()
         self.load_canvas_size(data.get("world_size"))
-        self.load_sprites(data.get("sprites"))
+        if tile_state != None:
+            self.tile_layer.set_state(tile_state)
+            free_sprite_data: List[SpriteData] = data.get("sprites")
+        else:
+            free_sprite_data: List[SpriteData] = self.tile_layer.load_sprite_data(data.get("sprites"), ImageCache().get_image)
+        self.load_sprites(free_sprite_data)
         self.load_hitboxes(data.get("hitboxes"))
+        self.load_prefabs(data.get("prefabs", []), data.get("prefab_instances", []))
         self.load_player_starting_position(data.get("starting_position"))
+        return free_sprite_data
 
 # ANCHOR[id=EventHandlers]
     def handle_mouse_button_down(self,
@@ -362,7 +806,14 @@ class DrawingArea(SubSurfaceRect):
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == MouseButtons.LEFT:
                     if is_sprite_mode:
-                        if len(selected_sprites):
+                        if self.get_active_prefab() != None:
+                            # Prefabs are stamped on release, there is no clone drag for them
+                            self.simple_click = True
+                        elif len(selected_sprites) and self.is_fill_modifier_pressed() and self.tile_layer.is_tile_image(ImageCache().get_image(selected_sprites[0].get_name())):
+                            # Shift + click flood fills from the clicked cell, Shift + drag fills the dragged cells
+                            self.is_filling = True
+                            self.fill_start_cell = self.tile_layer.get_cell(self.canvas_mouse_pos)
+                        elif len(selected_sprites):
                             self.is_cloning = True
                             self.start_pos = [
                                 self.canvas_mouse_pos[0] - (self.ghost_sprite.get_sprite_rect().width // 2),
@@ -396,19 +847,51 @@ class DrawingArea(SubSurfaceRect):
                         self.player_starting_pos = self.canvas_mouse_pos
                         set_player_position(self.canvas_mouse_pos)
                     elif is_move_mode:
-                        sprite_id_to_move: str = self.get_sprite_id_at()
-                        if sprite_id_to_move:
-                            self.moving_sprite_id = sprite_id_to_move
-                            list_containing_sprite_to_move: List[Sprite] = list(filter(lambda sprite : sprite.get_id() == self.moving_sprite_id, self.sprites))
-                            if len(list_containing_sprite_to_move):
-                                self.is_moving = True
-                                sprite_to_move: Sprite = list_containing_sprite_to_move[0]
-                                self.start_pos = sprite_to_move.get_sprite_rect().topleft
-                                self.current_pos = self.start_pos
+                        if self.is_capture_modifier_pressed():
+                            self.is_capturing = True
+                            self.start_pos = self.canvas_mouse_pos
+                            self.current_pos = self.canvas_mouse_pos
+                            self.selection_rect = Rect(
+                                *self.start_pos,
+                                0, 0
+                            )
+                        elif self.is_selection_hovered():
+                            self.start_batch_move()
+                        elif self.get_sprite_id_at() == None and self.get_prefab_instance_at() == None and self.get_tile_rect_at() == None:
+                            # Drag on empty space selects, dragging the selection moves all of it
+                            self.clear_selection()
+                            self.is_selecting = True
+                            self.start_pos = self.canvas_mouse_pos
+                            self.current_pos = self.canvas_mouse_pos
+                            self.selection_rect = Rect(
+                                *self.start_pos,
+                                0, 0
+                            )
+                        elif self.get_sprite_id_at() == None and self.get_prefab_instance_at() != None:
+                            self.clear_selection()
+                            self.moving_prefab_instance = self.get_prefab_instance_at()
+                            self.is_moving = True
+                            self.start_pos = list(self.moving_prefab_instance.get_rect().topleft)
+                            self.current_pos = self.start_pos
+                        else:
+                            self.clear_selection()
+                            sprite_id_to_move: str = self.get_sprite_id_at()
+                            if sprite_id_to_move == None:
+                                sprite_id_to_move = self.lift_tile_at()
+                            if sprite_id_to_move:
+                                self.moving_sprite_id = sprite_id_to_move
+                                list_containing_sprite_to_move: List[Sprite] = list(filter(lambda sprite : sprite.get_id() == self.moving_sprite_id, self.sprites))
+                                if len(list_containing_sprite_to_move):
+                                    self.is_moving = True
+                                    sprite_to_move: Sprite = list_containing_sprite_to_move[0]
+                                    self.start_pos = sprite_to_move.get_sprite_rect().topleft
+                                    self.current_pos = self.start_pos
                 
                 if event.button == MouseButtons.RIGHT:
                     if is_sprite_mode:
-                        if self.is_cloning:
+                        if self.is_filling:
+                            self.done_filling()
+                        elif self.is_cloning:
                             self.done_cloning()
                         else:
                             right_click_callback()
@@ -423,7 +906,13 @@ class DrawingArea(SubSurfaceRect):
                         else:
                             right_click_callback()
                     elif is_move_mode:
-                        if self.is_moving:
+                        if self.is_capturing:
+                            self.done_capturing()
+                        elif self.is_selecting:
+                            self.done_selecting()
+                        elif self.is_batch_moving:
+                            self.interrupt_batch_move()
+                        elif self.is_moving:
                             self.interrupt_moving_sprite()
                         else:
                             right_click_callback()
@@ -445,6 +934,8 @@ class DrawingArea(SubSurfaceRect):
         if event.type == pygame.MOUSEMOTION:
             if not is_hovered:
                 self.interrupt_moving_sprite()
+                if self.is_batch_moving:
+                    self.interrupt_batch_move()
               
             if is_sprite_mode:
                 if self.is_cloning:
@@ -480,37 +971,41 @@ class DrawingArea(SubSurfaceRect):
                     self.selection_rect.width += ((1-x_direction) // 2) * sprite_width
                     self.selection_rect.height += ((1-y_direction) // 2) * sprite_height
 
-                    self.temporary_sprites = []
-
-                    for i in range(nb_sprites_to_draw_x):
-                        for j in range(nb_sprites_to_draw_y):
-                            sprite_pos_x = self.start_pos[0] + i * sprite_width * x_direction
-                            sprite_pos_y = self.start_pos[1] + j * sprite_height * y_direction
-
-                            self.temporary_sprites.append(
-                                Sprite(
-                                    sprite_pos_x,
-                                    sprite_pos_y,
-                                    self.canvas,
-                                    self.ghost_sprite.get_image(),
-                                    self.ghost_sprite.get_name()
-                                )
+                    temporary_sprite_positions_key: Tuple = (
+                        tuple(self.start_pos), nb_sprites_to_draw_x, nb_sprites_to_draw_y, x_direction, y_direction, sprite_width, sprite_height
+                    )
+                    if temporary_sprite_positions_key != self.temporary_sprite_positions_key:
+                        self.temporary_sprite_positions_key = temporary_sprite_positions_key
+                        self.temporary_sprite_positions = [
+                            (
+                                self.start_pos[0] + i * sprite_width * x_direction,
+                                self.start_pos[1] + j * sprite_height * y_direction
                             )
+                            for i in range(nb_sprites_to_draw_x)
+                            for j in range(nb_sprites_to_draw_y)
+                        ]
                             
                     if w > spawn_coverage_distance and h > spawn_coverage_distance:
                         self.simple_click = False
                     
-            elif is_move_mode:
-                if self.is_moving and self.start_pos:
+            elif is_move_mode and not (self.is_capturing or self.is_selecting):
+                if self.is_batch_moving:
+                    self.update_batch_move()
+                elif self.is_moving and self.start_pos:
                     moving_sprite: Union[Sprite, None] = self.get_sprite_by_id(self.moving_sprite_id)
-                    if moving_sprite != None:
+                    if self.moving_prefab_instance != None:
+                        self.current_pos = self.calculate_snapping_coords(self.moving_prefab_instance.get_rect().size)
+                        self.moving_prefab_instance.set_top_left(self.current_pos)
+                        self.prefabs_version += 1
+                        self.highlight_rects = [self.moving_prefab_instance.get_rect()]
+                    elif moving_sprite != None:
                         self.current_pos = self.calculate_snapping_coords(moving_sprite.get_sprite_rect().size)
                         moving_sprite.set_top_left(self.current_pos)
                         self.highlight_rects = [moving_sprite.get_sprite_rect(moving_sprite.topleft)]
                     else:
                         self.move_highlight_rects = []
                         
-            elif (is_hitbox_mode and self.is_drawing) or (is_delete_mode and self.is_deleting):
+            elif (is_hitbox_mode and self.is_drawing) or (is_delete_mode and self.is_deleting) or (is_move_mode and (self.is_capturing or self.is_selecting)):
                 self.selection_rect = Rect(
                     min(self.start_pos[0], self.current_pos[0]),
                     min(self.start_pos[1], self.current_pos[1]),
@@ -546,16 +1041,24 @@ class DrawingArea(SubSurfaceRect):
         is_move_mode: bool,
         add_data: Callable[[Union[SpriteData, HitBoxData], str], None],
         delete_data: Callable[[str, str], None],
+        switch_mode: Callable[[], None],
         move_sprite: Callable[[str, Coords], None],
+        move_prefab_instance: Callable[[str, Coords], None],
+        move_objects: Callable[[Dict[str, Set[str]], Coords, List[SpriteData]], None],
+        capture_prefab: Callable[[Rect], None],
+        push_history: Callable[[], None],
         is_hovered: bool
     ):
         if event.type == pygame.MOUSEBUTTONUP:
             if event.button == MouseButtons.LEFT:
                 if is_sprite_mode:
-                    if self.is_cloning and self.selection_rect.width > 0 and self.selection_rect.height > 0:
-                        self.sprites += self.temporary_sprites
-                        for sprite in self.temporary_sprites:
-                            add_data(sprite.get_data(), "sprite")
+                    if self.get_active_prefab() != None:
+                        if self.simple_click and is_hovered and self.prefab_ghost_pos != None:
+                            self.place_prefab_instance(self.prefab_ghost_pos, add_data)
+                    elif self.is_filling:
+                        self.commit_fill(push_history)
+                    elif self.is_cloning and self.selection_rect.width > 0 and self.selection_rect.height > 0:
+                        self.commit_clone(add_data, push_history)
                     else:
                         if self.simple_click and is_hovered:
                             selected_sprites = list(filter(lambda sprite : sprite.get_id() == selected_sprite_id, sprites))
@@ -566,8 +1069,7 @@ class DrawingArea(SubSurfaceRect):
                                     ImageCache().get_image(selected_sprites[0].get_name()),
                                     selected_sprites[0].get_name()
                                 )
-                                self.add_sprite(sprite)
-                                add_data(sprite.get_data(), "sprite")
+                                self.place_sprite(sprite, add_data)
                     self.done_cloning()
                     self.simple_click = True # Should be exactly here to reset simple click
                 elif is_hitbox_mode:
@@ -594,6 +1096,18 @@ class DrawingArea(SubSurfaceRect):
                             for sprite_id in list(map(lambda sprite : sprite.get_id(), sprites)):
                                 self.delete_sprite(sprite_id)
                                 delete_data(sprite_id, "sprite")
+
+                            for prefab_instance_id in list(map(lambda p : p.get_id(), self.get_prefab_instances_within_rectangle(self.selection_rect))):
+                                self.delete_prefab_instance(prefab_instance_id)
+                                delete_data(prefab_instance_id, "prefab_instance")
+
+                            tile_bounds: Tuple[int, int, int, int] = self.tile_layer.get_cell_bounds_within_rectangle(self.selection_rect)
+                            if not self.tile_layer.is_empty() and tile_bounds[2] and tile_bounds[3]:
+                                self.clear_analysis_highlight_rects()
+                                self.tile_layer.clear_rect(*tile_bounds)
+                                # Tiles are not map_data entries, App's delete_data never sees the last one go
+                                if self.is_empty():
+                                    switch_mode()
                                 
                         elif self.selection_rect.width == 0 and self.selection_rect.height == 0:
                             hitbox_id = self.get_hitbox_id_at()
@@ -607,15 +1121,40 @@ class DrawingArea(SubSurfaceRect):
                                     over it.
                                 """
                                 sprite_id = self.get_sprite_id_at()
+                                prefab_instance: Optional[PrefabInstance] = self.get_prefab_instance_at()
                                 if sprite_id != None:
                                     self.delete_sprite(sprite_id)
                                     delete_data(sprite_id, "sprite")
+                                elif prefab_instance != None:
+                                    self.delete_prefab_instance(prefab_instance.get_id())
+                                    delete_data(prefab_instance.get_id(), "prefab_instance")
+                                elif self.get_tile_rect_at() != None:
+                                    self.clear_analysis_highlight_rects()
+                                    self.tile_layer.erase(*self.tile_layer.get_cell(self.canvas_mouse_pos))
+                                    if self.is_empty():
+                                        switch_mode()
                         self.done_deleting()
                 elif is_move_mode:
-                    if self.is_moving and self.current_pos and self.moving_sprite_id:
+                    if self.is_capturing:
+                        if self.selection_rect and self.selection_rect.width > 0 and self.selection_rect.height > 0:
+                            capture_prefab(Rect(self.selection_rect))
+                        self.done_capturing()
+                    elif self.is_selecting:
+                        if self.selection_rect and self.selection_rect.width > 0 and self.selection_rect.height > 0:
+                            self.select_within_rectangle(self.selection_rect)
+                        self.done_selecting()
+                    elif self.is_batch_moving:
+                        self.commit_batch_move(move_objects, push_history)
+                    elif self.is_moving and self.current_pos and self.moving_prefab_instance != None:
+                        move_prefab_instance(self.moving_prefab_instance.get_id(), self.current_pos)
+                        self.done_moving_sprite()
+                    elif self.is_moving and self.current_pos and self.moving_sprite_id:
                         moving_sprite: Union[Sprite, None] = self.get_sprite_by_id(self.moving_sprite_id)
                         if moving_sprite != None:
-                            move_sprite(self.moving_sprite_id, self.current_pos)
+                            if self.moving_tile_origin != None:
+                                self.drop_tile(moving_sprite, add_data)
+                            else:
+                                move_sprite(self.moving_sprite_id, self.current_pos)
                             self.done_moving_sprite()
             
             if event.button == MouseButtons.MIDDLE:
@@ -628,7 +1167,7 @@ class DrawingArea(SubSurfaceRect):
     ):
         if is_hovered:
             if event.type == pygame.MOUSEWHEEL:
-                keys_pressed = pygame.key.get_pressed()
+                keys_pressed = InputSession().get_pressed_keys()
                 if keys_pressed[KeyboardKeys.LEFT_ALT]:
                     self.horizontal_scroll(event.y)
                 else:
@@ -660,6 +1199,83 @@ class DrawingArea(SubSurfaceRect):
         if not is_hovered or not is_sprite_mode or self.is_panning:
             self.display_ghost_sprite = False
 
+        # The active prefab replaces the selected sprite
+        self.prefab_ghost_pos = None
+        if self.get_active_prefab() != None:
+            self.display_ghost_sprite = False
+            if is_hovered and is_sprite_mode and not self.is_panning:
+                self.prefab_ghost_pos = self.calculate_snapping_coords(self.get_active_prefab().get_size())
+
+    def update_fill_preview(self,
+        is_sprite_mode: bool,
+        sprites: Tuple[Sprite, ...],
+        selected_sprite_id: str,
+        is_hovered: bool
+    ):
+        """
+            The fill mask is only recomputed when its inputs change, and the preview
+            surface only when the mask or the viewport does.
+        """
+        selected_sprites = list(filter(lambda sprite : sprite.get_id() == selected_sprite_id, sprites))
+        image: Union[Surface, None] = ImageCache().get_image(selected_sprites[0].get_name()) if len(selected_sprites) else None
+        if not (
+            is_sprite_mode and is_hovered and image != None
+            and self.get_active_prefab() == None
+            and not (self.is_panning or self.is_cloning)
+            and (self.is_filling or self.is_fill_modifier_pressed())
+            and self.tile_layer.is_tile_image(image)
+        ):
+            if self.fill_mask_key != None:
+                self.clear_fill_preview()
+            return
+
+        cell: Tuple[int, int] = self.tile_layer.get_cell(self.canvas_mouse_pos)
+        fill_mask_key: Tuple = (
+            selected_sprites[0].get_name(),
+            self.fill_start_cell,
+            cell,
+            self.tile_layer.get_version(),
+            self.hitboxes_version
+        )
+        if fill_mask_key != self.fill_mask_key:
+            self.fill_mask_key = fill_mask_key
+            blocked: np.ndarray = self.tile_layer.get_cells_mask([hitbox.get_rect() for hitbox in self.hitboxes])
+            if self.is_filling and cell != self.fill_start_cell:
+                self.fill_mask = self.tile_layer.get_rect_fill_mask(self.fill_start_cell, cell, blocked)
+            else:
+                self.fill_mask = self.tile_layer.get_flood_fill_mask(*(self.fill_start_cell if self.is_filling else cell), blocked)
+
+        viewport_rect: Rect = self.get_viewport_rect()
+        fill_preview_key: Tuple = (fill_mask_key, tuple(viewport_rect))
+        if fill_preview_key != self.fill_preview_key:
+            self.fill_preview_key = fill_preview_key
+            self.render_fill_preview(image, viewport_rect)
+
+    def render_fill_preview(self, image: Surface, viewport_rect: Rect):
+        """
+            Renders the visible part of the fill mask into one translucent surface
+        """
+        cell_size: int = self.tile_layer.cell_size
+        column, row, width, height = self.tile_layer.get_cell_bounds_intersecting_rectangle(viewport_rect)
+        rows, columns = np.nonzero(self.fill_mask[row:row + height, column:column + width])
+        if not len(rows):
+            self.fill_preview_surface = None
+            self.fill_preview_rect = None
+            return
+        top, left = int(rows.min()), int(columns.min())
+        self.fill_preview_rect = Rect(
+            (column + left) * cell_size,
+            (row + top) * cell_size,
+            (int(columns.max()) - left + 1) * cell_size,
+            (int(rows.max()) - top + 1) * cell_size
+        )
+        self.fill_preview_surface = Surface(self.fill_preview_rect.size, pygame.SRCALPHA)
+        self.fill_preview_surface.blits([
+            (image, ((c - left) * cell_size, (r - top) * cell_size))
+            for r, c in zip(rows.tolist(), columns.tolist())
+        ], doreturn=False)
+        self.fill_preview_surface.set_alpha(128)
+
 
     def _update(self,
         absolute_mouse_pos: Coords,
@@ -675,7 +1291,11 @@ class DrawingArea(SubSurfaceRect):
         add_data: Callable[[Union[SpriteData, HitBoxData], str], None],
         delete_data: Callable[[str, str], None],
         set_player_position: Callable[[Coords], None],
-        move_sprite: Callable[[str, Coords], None]
+        move_sprite: Callable[[str, Coords], None],
+        move_prefab_instance: Callable[[str, Coords], None],
+        move_objects: Callable[[Dict[str, Set[str]], Coords, List[SpriteData]], None],
+        capture_prefab: Callable[[Rect], None],
+        push_history: Callable[[], None]
     ) -> None:
         # ANCHOR[id=DrawingAreaUpdate]
         self.relative_mouse_pos = self.get_relative_mouse_pos(absolute_mouse_pos)
@@ -709,7 +1329,12 @@ class DrawingArea(SubSurfaceRect):
             is_move_mode,
             add_data,
             delete_data,
+            right_click_callback,
             move_sprite,
+            move_prefab_instance,
+            move_objects,
+            capture_prefab,
+            push_history,
             is_hovered
         )
 
@@ -728,6 +1353,13 @@ class DrawingArea(SubSurfaceRect):
             selected_sprite_id,
             is_hovered
         )
+
+        self.update_fill_preview(
+            is_sprite_mode,
+            sprites,
+            selected_sprite_id,
+            is_hovered
+        )
             
 
     def fixed_update(self,
@@ -742,41 +1374,33 @@ class DrawingArea(SubSurfaceRect):
                     if hitbox:
                         self.highlight_rects = [hitbox.get_rect()]
                     else:
-                        sprite = self.get_sprite_at()
-                        if sprite != None:
-                            self.highlight_rects = [sprite.get_sprite_rect(topleft=sprite.get_sprite_rect().topleft)]
-                        else:
-                            self.highlight_rects = []
+                        rect = self.get_sprite_or_tile_rect_at()
+                        self.highlight_rects = [rect] if rect != None else []
                 else:
-                    self.highlight_rects = list(map(
-                        lambda i : i.get_rect(),
-                        self.get_hitboxes_within_rectangle(self.selection_rect)
-                    )) + list(map(
-                        lambda i : i.get_sprite_rect(),
-                        self.get_sprites_within_rectangle(self.selection_rect)
-                    ))
+                    self.highlight_rects = self.get_object_rects_within_rectangle(self.selection_rect)
         
         if is_move_mode:
             if not self.is_panning:
-                if not self.is_moving:
-                    sprite = self.get_sprite_at()
-                    if sprite != None:
-                        self.highlight_rects = [sprite.get_sprite_rect(topleft=sprite.get_sprite_rect().topleft)]
-                    else:
-                        self.highlight_rects = []
+                if self.is_capturing or self.is_selecting:
+                    self.highlight_rects = self.get_object_rects_within_rectangle(self.selection_rect)
+                elif not self.is_moving:
+                    rect = self.get_sprite_or_tile_rect_at()
+                    self.highlight_rects = self.get_selection_rects() + ([rect] if rect != None else [])
+        elif self.has_selection():
+            self.clear_selection()
         
         if not (is_delete_mode or is_move_mode):
-            self.highlight_rects = []
+            self.highlight_rects = self.analysis_highlight_rects
         
         self.highlight_color, self.highlight_outline_width = {
             (True, False): (self.delete_highlight_color, self.delete_selection_outline_width),
             (False, True): (self.move_highlight_color, self.move_selection_outline_width),
-        }.get((is_delete_mode, is_move_mode), (None, None))
+        }.get((is_delete_mode, is_move_mode), (self.analysis_highlight_color, self.analysis_highlight_outline_width))
         
-        if (self.is_deleting or self.is_drawing or self.is_panning) and self.start_pos:
+        if (self.is_deleting or self.is_drawing or self.is_capturing or self.is_selecting or self.is_panning) and self.start_pos:
             self.current_pos = self.canvas_mouse_pos
 
-        if not (self.is_drawing or self.is_deleting or self.is_moving or self.is_cloning):
+        if not (self.is_drawing or self.is_deleting or self.is_moving or self.is_cloning or self.is_filling or self.is_capturing or self.is_selecting or self.is_batch_moving):
             if not self.is_panning:
                 self.interrupt_selection()
         else:
@@ -790,18 +1414,60 @@ class DrawingArea(SubSurfaceRect):
                 self.vertical_scroll(1*0.02)
 
 
+    def set_analysis_highlight_rects(self, rects: List[Rect]) -> None:
+        self.analysis_highlight_rects = rects
+
+    def clear_analysis_highlight_rects(self) -> None:
+        self.analysis_highlight_rects = []
+
     def add_hitbox(self, hitbox: HitBox) -> None:
+        self.clear_analysis_highlight_rects()
+        self.hitboxes_version += 1
         self.hitboxes.append(hitbox)
 
     def delete_hitbox(self, _id: str):
+        self.clear_analysis_highlight_rects()
+        self.hitboxes_version += 1
         self.hitboxes = list(filter(lambda hitbox : hitbox.get_id() != _id, self.hitboxes))
 
+    def delete_hitboxes(self, ids: Set[str]):
+        self.clear_analysis_highlight_rects()
+        self.hitboxes_version += 1
+        self.hitboxes = list(filter(lambda hitbox : hitbox.get_id() not in ids, self.hitboxes))
+
+    def add_prefab(self, prefab: Prefab) -> None:
+        self.prefabs[prefab.get_id()] = prefab
+
+    def set_active_prefab(self, _id: Optional[str]) -> None:
+        self.active_prefab_id = _id
+
+    def add_prefab_instance(self, prefab_id: str, coords: Coords, _id: Optional[str] = None) -> PrefabInstance:
+        self.clear_analysis_highlight_rects()
+        self.prefabs_version += 1
+        prefab_instance: PrefabInstance = PrefabInstance(self.prefabs[prefab_id], *coords, _id=_id)
+        self.prefab_instances.append(prefab_instance)
+        return prefab_instance
+
+    def delete_prefab_instance(self, _id: str):
+        self.delete_prefab_instances({_id})
+
+    def delete_prefab_instances(self, ids: Set[str]):
+        self.clear_analysis_highlight_rects()
+        self.prefabs_version += 1
+        self.prefab_instances = list(filter(lambda prefab_instance : prefab_instance.get_id() not in ids, self.prefab_instances))
+
     def add_sprite(self, sprite: Sprite) -> None:
+        self.clear_analysis_highlight_rects()
         self.sprites.append(sprite)
 
     def delete_sprite(self, _id: str):
+        self.clear_analysis_highlight_rects()
         self.sprites = list(filter(lambda sprite : sprite.get_id() != _id, self.sprites))
 
+    def delete_sprites(self, ids: Set[str]):
+        self.clear_analysis_highlight_rects()
+        self.sprites = list(filter(lambda sprite : sprite.get_id() not in ids, self.sprites))
+
     def draw_canvas(self) -> None:
         visible_canvas_rect = Rect(0, 0, *self.rect.size).clip(self.canvas.get_rect())
         canvas_offset_x = visible_canvas_rect.x - self.canvas.get_rect().x - self.panning_offset[0]
@@ -813,32 +1479,63 @@ class DrawingArea(SubSurfaceRect):
         )
 
     def draw_hitboxes(self) -> None:
-        for hitbox in self.get_hitboxes_intersecting_rectangle(self.get_viewport_rect()):
-            hitbox.draw(self.canvas)
+        viewport_rect: Rect = self.get_viewport_rect()
+        hitbox_layer_key: Tuple = (self.hitboxes_version, self.prefabs_version, tuple(viewport_rect), tuple(HitBox.color))
+        if hitbox_layer_key != self.hitbox_layer_key:
+            self.hitbox_layer_key = hitbox_layer_key
+            self.hitbox_layer.fill((0, 0, 0, 0))
+            self.hitbox_layer.blits([
+                hitbox.get_blit(multiply_int(-1, viewport_rect.topleft))
+                for hitbox in self.get_hitboxes_intersecting_rectangle(viewport_rect)
+            ] + list(filter(None, [
+                prefab_instance.get_hitbox_blit(multiply_int(-1, viewport_rect.topleft))
+                for prefab_instance in self.get_prefab_instances_intersecting_rectangle(viewport_rect)
+            ])), doreturn=False)
+        if len(self.hitboxes) or len(self.prefab_instances):
+            self.canvas.blit(self.hitbox_layer, viewport_rect.topleft)
 
     def draw_selection_rect(self) -> None:
         if self.selection_rect:
             color: Color = None
             outline_width: int = None
             (color, outline_width) = {
-                (True, False, False): (self.preview_hitbox_outline_color, self.preview_hitbox_outline_width),
-                (False, True, False): (self.delete_selection_outline_color, self.delete_selection_outline_width),
-                (False, False, True): (self.clone_selection_outline_color, self.clone_selection_outline_width),
-            }.get((self.is_drawing, self.is_deleting, self.is_cloning), ((0, 0, 0, 0), 0)) # Else transparent, no width
+                (True, False, False, False): (self.preview_hitbox_outline_color, self.preview_hitbox_outline_width),
+                (False, True, False, False): (self.delete_selection_outline_color, self.delete_selection_outline_width),
+                (False, False, True, False): (self.clone_selection_outline_color, self.clone_selection_outline_width),
+                (False, False, False, True): (self.move_highlight_color, self.move_selection_outline_width),
+            }.get((self.is_drawing, self.is_deleting, self.is_cloning, self.is_capturing or self.is_selecting), ((0, 0, 0, 0), 0)) # Else transparent, no width
             x, y, width, height = list(self.selection_rect)
-            self.selection_rect_alpha_surface = Surface(self.selection_rect.size, pygame.SRCALPHA)
-            self.selection_rect_alpha_surface.set_alpha(64)
-            pygame.draw.rect(self.selection_rect_alpha_surface, color, (0, 0, width, height))
-            self.canvas.blit(self.selection_rect_alpha_surface, self.selection_rect)
+            # Only the part of the selection inside the viewport is filled
+            visible_selection_rect: Rect = self.selection_rect.clip(self.get_viewport_rect())
+            if visible_selection_rect.width and visible_selection_rect.height:
+                fill_area: Rect = Rect(0, 0, *visible_selection_rect.size)
+                self.selection_rect_alpha_surface.fill((*color[:3], (color[3] if len(color) > 3 else 255) * 64 // 255), fill_area)
+                self.canvas.blit(self.selection_rect_alpha_surface, visible_selection_rect, area=fill_area)
             pygame.draw.rect(self.canvas, color, self.selection_rect, outline_width)
             if self.is_drawing:
                 pygame.draw.line(self.canvas, color, (x, y), (x + width - 1, y + height - 1), outline_width)
                 pygame.draw.line(self.canvas, color, (x, y + height - 1), (x + width - 1, y), outline_width)
 
     def draw_sprites(self) -> None:
+        self.tile_layer.draw(self.canvas, self.get_viewport_rect(), ImageCache().get_image)
+        # One blit per instance, of its prefab's composited surface
+        self.canvas.blits([
+            prefab_instance.get_blit() for prefab_instance in self.get_prefab_instances_intersecting_rectangle(self.get_viewport_rect())
+        ], doreturn=False)
+        self.draw_lifted_tiles()
         for sprite in self.get_sprites_intersecting_rectangle(self.get_viewport_rect()):
             sprite.draw()
 
+    def draw_lifted_tiles(self) -> None:
+        if self.lifted_tiles is not None and len(self.lifted_tiles):
+            columns, rows = self.selected_cells
+            cell_size: int = self.tile_layer.cell_size
+            positions: np.ndarray = np.stack([columns, rows], axis=1) * cell_size + np.array(self.batch_move_offset)
+            self.canvas.blits([
+                (ImageCache().get_image(self.tile_layer.palette[index]), position)
+                for index, position in zip(self.lifted_tiles.tolist(), positions.tolist())
+            ], doreturn=False)
+
     def draw_grid(self) -> None:
         if self.canvas_grid_cell_size is not None and self.canvas_grid_cell_size > 0:
             width = self.canvas.get_width()
@@ -849,17 +1546,19 @@ class DrawingArea(SubSurfaceRect):
                 pygame.draw.line(self.canvas, self.canvas_grid_color, (0, y), (width, y))
 
     def draw_ghost_sprite(self):
-        if self.display_ghost_sprite and self.ghost_sprite and not self.is_cloning:
+        if self.prefab_ghost_pos != None:
+            self.canvas.blit(self.get_active_prefab().get_ghost_surface(), self.prefab_ghost_pos)
+        if self.display_ghost_sprite and self.ghost_sprite and not self.is_cloning and self.fill_preview_surface == None:
             # Draw translucent box
             self.ghost_sprite.set_alpha(128)  # 50% translucent
             self.ghost_sprite.draw()
 
     def draw_highlight_rects(self):
-        for rect in self.highlight_rects:
+        for i in self.get_viewport_rect().collidelistall(self.highlight_rects):
             pygame.draw.rect(
                 self.canvas,
                 self.highlight_color,
-                rect,
+                self.highlight_rects[i],
                 self.highlight_outline_width
             )
     
@@ -884,9 +1583,19 @@ class DrawingArea(SubSurfaceRect):
                 )
             )
 
+    def draw_fill_preview(self):
+        if self.fill_preview_surface != None:
+            self.canvas.blit(self.fill_preview_surface, self.fill_preview_rect)
+
     def draw_temporary_sprites(self):
-        for sprite in self.temporary_sprites:
-            sprite.draw()
+        if len(self.temporary_sprite_positions) and self.ghost_sprite != None:
+            image: Surface = ImageCache().get_image(self.ghost_sprite.get_name())
+            viewport_rect: Rect = self.get_viewport_rect()
+            width, height = image.get_size()
+            self.canvas.blits([
+                (image, position) for position in self.temporary_sprite_positions
+                if viewport_rect.colliderect(position[0], position[1], width, height)
+            ], doreturn=False)
 
     def _draw(self) -> None:
     # ANCHOR[id=DrawingAreaDraw]
@@ -896,6 +1605,7 @@ class DrawingArea(SubSurfaceRect):
         self.draw_ghost_sprite()
         self.draw_hitboxes()
         self.draw_temporary_sprites()
+        self.draw_fill_preview()
         self.draw_selection_rect()
         self.draw_highlight_rects()
         self.draw_player_starting_pos()
@@ -51,6 +51,12 @@ class FontManager:
              cls._font_cache[cls._default_font_size] = cls._loaded_font
 
 
+    def get_stats(self):
+        """
+        Returns the number of font objects cached by size.
+        """
+        return {"fonts": len(self._font_cache)}
+
     def get_font(self, size=None, color=(0, 0, 0), text=""):
         """
         Returns a rendered text surface using the loaded font.
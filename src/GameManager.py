@@ -3,22 +3,56 @@ import signal
 import os
 import platform
 import sys
-from typing import Union
+import threading
+from collections import deque
+from typing import Deque, List, Tuple, Union
 from .utility import *
 from .Logger import Logger
+from .LiveLink import LiveLink
 
 class GameManager:
-    def __init__(self, game_executable_path: Optional[str] = None):
+    # Lines shown by the game output panel
+    output_panel_lines: int = 20
+    max_output_line_length: int = 200
+    close_timeout: float = 5
+
+    def __init__(self, game_executable_path: Optional[str] = None, live_link_enabled: bool = True, output_max_lines: int = 500):
         self.game_executable_path: str = game_executable_path
+        # Streams map edits to the running game, started with the first game
+        self.live_link: Optional[LiveLink] = LiveLink() if live_link_enabled else None
         self.is_running = False
         self.process = None  # To store the subprocess object
+        # Set by the supervisor threads, the editor never polls the process
+        self.is_closing: bool = False
+        self.terminate_thread: Optional[threading.Thread] = None
+        self.exit_code: Optional[int] = None
+        self.has_crashed: bool = False
+        # (stream name, line) of the game's stdout and stderr, oldest dropped first
+        self.output: Deque[Tuple[str, str]] = deque(maxlen=output_max_lines)
+        self.output_version: int = 0
 
     # ANCHOR[id=Getters]
     def get_is_running(self):
-        if self.process:
-            return self.process.poll() is None  # Check if the process is still running
         return self.is_running
 
+    def get_exit_code(self) -> Optional[int]:
+        return self.exit_code
+
+    def pop_has_crashed(self) -> bool:
+        has_crashed: bool = self.has_crashed
+        self.has_crashed = False
+        return has_crashed
+
+    def get_output_version(self) -> int:
+        return self.output_version
+
+    def get_output_lines(self, nb_lines: Optional[int] = None) -> List[str]:
+        output: List[Tuple[str, str]] = list(self.output)[-(nb_lines or self.output_panel_lines):]
+        return [f"{'!' if stream == 'stderr' else ' '} {line}" for stream, line in output]
+
+    def get_live_link(self) -> Optional[LiveLink]:
+        return self.live_link
+
     def get_game_executable_path(self) -> Union[str, None]:
         return self.game_executable_path
 
@@ -28,48 +62,97 @@ class GameManager:
 
     def run_game(self):
         self.is_running = True
+        self.is_closing = False
+        self.exit_code = None
         try:
             kwargs = {}
             if platform.system() != 'Windows':
                 kwargs['preexec_fn'] = os.setsid  # Only for POSIX
+            if self.live_link and self.live_link.start():
+                kwargs['env'] = {**os.environ, LiveLink.environment_variable: self.live_link.get_address()}
 
             self.process = subprocess.Popen(
                 [self.game_executable_path],# command,
                 cwd=os.path.dirname(self.game_executable_path),
-                #stdout=subprocess.PIPE,
-                #stderr=subprocess.PIPE,
-                shell=False # Recommended for security
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                errors="replace",
+                shell=False, # Recommended for security
+                **kwargs
             )
+            self.output.clear()
+            self.output_version += 1
+            # Supervisor threads: one reader per stream, and one waiting for the exit
+            threading.Thread(target=self.read_output, args=(self.process.stdout, "stdout"), name="GameStdout", daemon=True).start()
+            threading.Thread(target=self.read_output, args=(self.process.stderr, "stderr"), name="GameStderr", daemon=True).start()
+            threading.Thread(target=self.wait_for_exit, args=(self.process,), name="GameSupervisor", daemon=True).start()
             Logger.info(f"Game process started")
         except Exception as e:
             Logger.error(f"Error starting game process: {e}")
             self.is_running = False
             self.process = None
 
-    def close_game(self):
-        if self.process:
-            Logger.info(f"Closing game process")
+    def read_output(self, stream, stream_name: str) -> None:
+        for line in stream:
+            self.output.append((stream_name, line.rstrip()[:self.max_output_line_length]))
+            self.output_version += 1
+        stream.close()
+
+    def wait_for_exit(self, process: subprocess.Popen) -> None:
+        exit_code: int = process.wait()
+        if process is not self.process:
+            return
+        self.exit_code = exit_code
+        if exit_code == 0 or self.is_closing:
+            Logger.info(f"Game process exited with code {exit_code}")
+        else:
+            # Negative codes are the signal that killed the process (POSIX)
+            reason: str = f"signal {signal.Signals(-exit_code).name}" if exit_code < 0 and -exit_code in signal.valid_signals() else f"exit code {exit_code}"
+            Logger.error(f"Game process crashed with {reason}")
+            self.has_crashed = True
+        self.process = None
+        self.is_running = False
+        self.is_closing = False
+        # Nothing is left to listen, the next run starts a new link
+        if self.live_link:
+            self.live_link.stop()
+
+    def terminate(self, process: subprocess.Popen) -> None:
+        """
+            Asks the game to quit, and kills it if it is still running after close_timeout.
+            Runs on its own thread so the editor keeps running meanwhile.
+        """
+        try:
+            if platform.system() != 'Windows':
+                os.killpg(os.getpgid(process.pid), signal.SIGTERM)  # Send SIGTERM to the process group (POSIX)
+            else:
+                process.terminate()  # Use terminate() on Windows
             try:
+                process.wait(timeout=self.close_timeout)
+            except subprocess.TimeoutExpired:
+                Logger.info("Game process did not terminate gracefully.")
                 if platform.system() != 'Windows':
-                    os.killpg(os.getpgid(self.process.pid), signal.SIGTERM)  # Send SIGTERM to the process group (POSIX)
-                    self.process.wait(timeout=5)
-                    if self.process.poll() is None:
-                        Logger.info("Game process did not terminate gracefully.")
-                        os.killpg(os.getpgid(self.process.pid), signal.SIGKILL)
-                        self.process.wait()
+                    os.killpg(os.getpgid(process.pid), signal.SIGKILL)
                 else:
-                    self.process.terminate()  # Use terminate() on Windows
-                    self.process.wait(timeout=5)
-                    if self.process.poll() is None:
-                        Logger.info("Game process did not terminate gracefully.")
-                        self.process.kill()
-                        self.process.wait()
-            except ProcessLookupError:
-                Logger.error("Game process not found.")
-            except Exception as e:
-                Logger.error(f"Error closing game process: {e}")
-            finally:
-                self.process = None
-                self.is_running = False
-        else:
+                    process.kill()
+        except ProcessLookupError:
+            Logger.error("Game process not found.")
+        except Exception as e:
+            Logger.error(f"Error closing game process: {e}")
+
+    def close_game(self, wait: bool = False):
+        """
+            wait blocks until the game is gone (at most close_timeout), for when the editor
+            quits: the game writes to pipes read by the editor, it would die of SIGPIPE on
+            its next write once they are gone
+        """
+        if self.process and not self.is_closing:
+            Logger.info(f"Closing game process")
+            self.is_closing = True
+            self.terminate_thread = threading.Thread(target=self.terminate, args=(self.process,), name="GameTerminate", daemon=True)
+            self.terminate_thread.start()
+        elif not self.process:
             Logger.info("No game process is currently running.")
+        if wait and self.terminate_thread != None:
+            self.terminate_thread.join()
@@ -1,4 +1,5 @@
 from uuid import uuid4 as u4
+from typing import Dict, Tuple
 from .utility import *
 from .HitBoxData import HitBoxData
 
@@ -6,10 +7,13 @@ class HitBox:
     # ANCHOR - HitBox
     color: Color = None
     
+    # Pre-rendered visuals shared between hitboxes of the same size, keyed on (width, height, color)
+    surface_cache: Dict[Tuple[int, int, Tuple[int, ...]], Surface] = {}
+    surface_cache_max_length: int = 512
+    
     def __init__(self, x: int, y: int, width: int, height: int, _id: Optional[str] = None) -> None:
         self.id: str = _id or str(u4())
         self.rect: Rect = Rect(x, y, width, height)
-        self.alpha_surface: Surface = Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
     
     def get_id(self) -> str:
         return self.id
@@ -28,6 +32,9 @@ class HitBox:
         
     def get_top_left(self):
         return self.rect.topleft
+
+    def set_top_left(self, topleft: Coords) -> None:
+        self.rect.topleft = topleft
     
     def is_hovered(self, offset: Coords, mouse_pos: Coords) -> bool:
         # offset should be canvas' coordinate + the panning offset + the drawing area's coordinate
@@ -38,10 +45,31 @@ class HitBox:
         # Move
         pass
 
+    @classmethod
+    def get_surface(cls, width: int, height: int) -> Surface:
+        key: Tuple[int, int, Tuple[int, ...]] = (width, height, tuple(cls.color))
+        surface: Surface = cls.surface_cache.get(key)
+        if surface == None:
+            if len(cls.surface_cache) >= cls.surface_cache_max_length:
+                del cls.surface_cache[next(iter(cls.surface_cache))]
+            surface = Surface((width, height), pygame.SRCALPHA)
+            surface.fill((*cls.color[:3], 128))
+            # Draw diagonals
+            pygame.draw.line(surface, cls.color, (0, 0), (width - 1, height - 1), width=1)
+            pygame.draw.line(surface, cls.color, (0, height - 1), (width - 1, 0), width=1)
+            pygame.draw.rect(surface, cls.color, (0, 0, width, height), 2)
+            cls.surface_cache[key] = surface
+        return surface
+
+    @classmethod
+    def get_cache_stats(cls) -> Dict[str, int]:
+        return {
+            "surfaces": len(cls.surface_cache),
+            "bytes": sum(map(get_surface_bytes, cls.surface_cache.values()))
+        }
+
+    def get_blit(self, offset: Coords = (0, 0)) -> Tuple[Surface, Coords]:
+        return (self.get_surface(*self.rect.size), (self.rect.x + offset[0], self.rect.y + offset[1]))
+
     def draw(self, surface: Surface) -> None:
-        pygame.draw.rect(self.alpha_surface, self.color + list((128,)), (0, 0, self.rect.width, self.rect.height))
-        # Draw diagonals
-        surface.blit(self.alpha_surface, self.rect.topleft)
-        pygame.draw.line(surface, self.color, (self.rect.left, self.rect.top), (self.rect.right - 1, self.rect.bottom - 1), width=1)
-        pygame.draw.line(surface, self.color, (self.rect.left, self.rect.bottom - 1), (self.rect.right - 1, self.rect.top), width=1)
-        pygame.draw.rect(surface, self.color, self.rect, 2)
+        surface.blit(*self.get_blit())
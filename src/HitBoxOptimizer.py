@@ -0,0 +1,162 @@
+from bisect import bisect_right, insort
+from heapq import heappop, heappush
+from uuid import uuid4 as u4
+from typing import Dict, List, Tuple
+from .HitBoxData import HitBoxData
+
+RectTuple = Tuple[int, int, int, int]
+
+class HitBoxOptimizer:
+    # ANCHOR - HitBoxOptimizer
+    """
+    Merges touching or overlapping axis-aligned hitboxes into a smaller set of
+    rects covering exactly the same area.
+
+    Hitboxes are first grouped into clusters of touching rects. Each cluster is
+    swept top to bottom (and left to right): the edges of every rect cut it into
+    slabs, each slab is reduced to its disjoint intervals, and an interval that
+    continues unchanged into the next slab grows the rect it belongs to instead
+    of starting a new one. The smallest of the two sweeps is kept, and a cluster
+    is left untouched when neither sweep beats it.
+    """
+
+    @staticmethod
+    def _clusters(rects: List[RectTuple]) -> List[List[RectTuple]]:
+        """
+            Same top to bottom sweep as _sweep, joining rects that share an
+            interval within a slab or touch an interval of the slab above.
+        """
+        parents: List[int] = list(range(len(rects)))
+
+        def find(i: int) -> int:
+            while parents[i] != i:
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+
+        def union(i: int, j: int) -> None:
+            parents[find(i)] = find(j)
+
+        edges: List[int] = sorted({y for r in rects for y in (r[1], r[1] + r[3])})
+        by_top: List[int] = sorted(range(len(rects)), key=lambda i : rects[i][1])
+
+        active: List[Tuple[int, int, int, int]] = [] # (left, right, bottom, index), kept sorted on left
+        bottoms: List[int] = []
+        previous_intervals: List[List[int]] = []
+        previous_lefts: List[int] = []
+        next_rect: int = 0
+
+        for top in edges[:-1]:
+            while next_rect < len(by_top) and rects[by_top[next_rect]][1] <= top:
+                x, y, w, h = rects[by_top[next_rect]]
+                insort(active, (x, x + w, y + h, by_top[next_rect]))
+                heappush(bottoms, y + h)
+                next_rect += 1
+            if bottoms and bottoms[0] <= top:
+                while bottoms and bottoms[0] <= top:
+                    heappop(bottoms)
+                active = [a for a in active if a[2] > top]
+
+            # Each rect of an interval is joined with the rect reaching furthest
+            # right before it. Two rects that were both active in the slab above
+            # already overlapped there, so only pairs involving a newcomer need
+            # an explicit union, both within the slab and with the slab above.
+            intervals: List[List[int]] = [] # [left, right, index of the rect reaching right]
+            for left, right, _, i in active:
+                is_new: bool = rects[i][1] == top
+                if intervals and left <= intervals[-1][1]:
+                    if is_new or rects[intervals[-1][2]][1] == top:
+                        union(i, intervals[-1][2])
+                    if right > intervals[-1][1]:
+                        intervals[-1][1] = right
+                        intervals[-1][2] = i
+                else:
+                    intervals.append([left, right, i])
+                if is_new and previous_intervals:
+                    p: int = max(bisect_right(previous_lefts, right) - 1, 0)
+                    while p >= 0 and previous_intervals[p][1] >= left:
+                        if previous_intervals[p][0] <= right:
+                            union(i, previous_intervals[p][2])
+                        p -= 1
+
+            previous_intervals = intervals
+            previous_lefts = [interval[0] for interval in intervals]
+
+        clusters: Dict[int, List[RectTuple]] = {}
+        for i, rect in enumerate(rects):
+            clusters.setdefault(find(i), []).append(rect)
+        return list(clusters.values())
+
+    @staticmethod
+    def _sweep(rects: List[RectTuple]) -> List[RectTuple]:
+        edges: List[int] = sorted({y for r in rects for y in (r[1], r[1] + r[3])})
+        by_top: List[RectTuple] = sorted(rects, key=lambda r : r[1])
+
+        merged: List[RectTuple] = []
+        active: List[Tuple[int, int, int]] = [] # (left, right, bottom), kept sorted on left
+        bottoms: List[int] = []
+        open_rects: Dict[Tuple[int, int], int] = {} # (left, right) -> top
+        next_rect: int = 0
+
+        for top in edges[:-1]:
+            while next_rect < len(by_top) and by_top[next_rect][1] <= top:
+                x, y, w, h = by_top[next_rect]
+                insort(active, (x, x + w, y + h))
+                heappush(bottoms, y + h)
+                next_rect += 1
+            if bottoms and bottoms[0] <= top:
+                while bottoms and bottoms[0] <= top:
+                    heappop(bottoms)
+                active = [a for a in active if a[2] > top]
+
+            # Union of the x intervals covering this slab
+            intervals: List[Tuple[int, int]] = []
+            for left, right, _ in active:
+                if intervals and left <= intervals[-1][1]:
+                    if right > intervals[-1][1]:
+                        intervals[-1] = (intervals[-1][0], right)
+                else:
+                    intervals.append((left, right))
+
+            still_open: Dict[Tuple[int, int], int] = {}
+            for interval in intervals:
+                still_open[interval] = open_rects.pop(interval, top)
+            for (left, right), open_top in open_rects.items():
+                merged.append((left, open_top, right - left, top - open_top))
+            open_rects = still_open
+
+        for (left, right), open_top in open_rects.items():
+            merged.append((left, open_top, right - left, edges[-1] - open_top))
+
+        return merged
+
+    @staticmethod
+    def merge_rects(rects: List[RectTuple]) -> List[RectTuple]:
+        rects = [tuple(map(int, r)) for r in rects if r[2] > 0 and r[3] > 0]
+        merged: List[RectTuple] = []
+        for cluster in HitBoxOptimizer._clusters(rects):
+            if len(cluster) == 1:
+                merged += cluster
+                continue
+            transposed: List[RectTuple] = [(y, x, h, w) for x, y, w, h in cluster]
+            candidates: List[List[RectTuple]] = [
+                HitBoxOptimizer._sweep(cluster),
+                [(x, y, w, h) for y, x, h, w in HitBoxOptimizer._sweep(transposed)],
+                cluster
+            ]
+            merged += min(candidates, key=len)
+        return merged
+
+    @staticmethod
+    def merge_hitbox_data(hitboxes: List[HitBoxData]) -> List[HitBoxData]:
+        """
+            Rects that survive the merge untouched keep their original id.
+        """
+        ids_by_rect: Dict[RectTuple, str] = {tuple(h["rect"]): h["id"] for h in hitboxes}
+        return [
+            {
+                "id": ids_by_rect.get(rect) or str(u4()),
+                "rect": list(rect)
+            }
+            for rect in HitBoxOptimizer.merge_rects([h["rect"] for h in hitboxes])
+        ]
@@ -1,4 +1,4 @@
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Set
 from .Logger import Logger
 
 class I18n:
@@ -7,6 +7,11 @@ class I18n:
 
     This class loads translation dictionaries and provides a method
     to translate strings based on the current language.
+
+    Nested translations are flattened once per language into a table keyed by
+    the full dotted key, so a lookup is a single dict access. The generation
+    changes with the language, so callers can cache the strings they resolved
+    and translate again only when it differs.
     """
     _instance = None
     _initialized = False
@@ -37,12 +42,41 @@ class I18n:
             self._language = language
             # Store the translations directly as they are passed (should be {'lang_code': {}})
             self._translations = translations if translations is not None else {}
+            # Flat tables per language, built on first use
+            self._tables: Dict[str, Dict[str, str]] = {}
+            self._table: Optional[Dict[str, str]] = self._get_table(self._language)
+            self._missing_keys: Set[str] = set()
+            self._generation: int = 0
             self._initialized = True
             Logger.info(f"I18n initialized with language: {self._language}")
         else:
             # Prevent re-initialization with different values or just ignore
             pass
 
+    @staticmethod
+    def _flatten(translations: Dict[str, Any], prefix: str = "") -> Dict[str, str]:
+        table: Dict[str, str] = {}
+        for key, value in translations.items():
+            if isinstance(value, dict):
+                table.update(I18n._flatten(value, f"{prefix}{key}."))
+            elif value is not None:
+                table[f"{prefix}{key}"] = str(value)
+        return table
+
+    def _get_table(self, language: str) -> Optional[Dict[str, str]]:
+        if language not in self._tables:
+            translations: Any = self._translations.get(language)
+            if not isinstance(translations, dict):
+                return None
+            self._tables[language] = self._flatten(translations)
+        return self._tables[language]
+
+    def get_generation(self) -> int:
+        """
+        Changes every time the language does.
+        """
+        return self._generation
+
     def set_language(self, language: str):
         """
         Sets the current language for translations.
@@ -51,7 +85,11 @@ class I18n:
             language: The language code to set.
         """
         if language in self._translations:
-            self._language = language
+            if language != self._language:
+                self._language = language
+                self._table = self._get_table(language)
+                self._missing_keys = set()
+                self._generation += 1
             Logger.info(f"Language set to: {self._language}")
         else:
             Logger.info(f"Warning: Language '{language}' not found in translations. Keeping current language: {self._language}")
@@ -71,35 +109,17 @@ class I18n:
             The translated string, the default string if provided, or the key
             itself if no translation is found.
         """
-        # Get translations for the current language
-        current_level: Any = self._translations.get(self._language)
-
-        if current_level is None:
-             # Language not found
-             if default is not None:
-                 return default
-             Logger.info(f"Warning: Language '{self._language}' not found in translations.")
-             return key # Return key if language not found and no default
-
-        # Split the key by dots to traverse the nested dictionary
-        keys = key.split('.')
-
-        # Traverse the nested dictionary
-        for k in keys:
-            if isinstance(current_level, dict):
-                current_level = current_level.get(k)
-            else:
-                # A key in the path did not lead to a dictionary (intermediate key is not a dict)
-                current_level = None
-                break # Stop traversing
-
-        # Check the final result of the traversal
-        if current_level is not None:
-            return str(current_level) # Found the translation
-
-        # If translation not found after traversal
+        translation: Optional[str] = self._table.get(key) if self._table is not None else None
+        if translation is not None:
+            return translation # Found the translation
+
         if default is not None:
             return default
-        else:
+        if self._table is None:
+            # Language not found
+            Logger.info(f"Warning: Language '{self._language}' not found in translations.")
+        elif key not in self._missing_keys:
+            # Reported once per language, lookups run every frame
+            self._missing_keys.add(key)
             Logger.error(f"Warning: Translation key '{key}' not found for language '{self._language}'.")
-            return key
\ No newline at end of file
+        return key
@@ -1,50 +1,134 @@
 from os import listdir, path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from .utility import *
 from .Logger import Logger
+from .SpriteAtlas import SpriteAtlas
 
 class ImageCache:
     _instance = None
     _loaded = False
     _images = {}
     _scaled_images = {}
+    _atlases: List[SpriteAtlas] = []
+    # File name of a pixel-identical image to the first of its duplicates, by name
+    _canonical_names: Dict[str, str] = {}
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
             cls._instance = super().__new__(cls)
         return cls._instance
 
-    def __init__(self, image_dirs: List[str] = []):
+    def __init__(self, image_dirs: List[str] = [], atlas_dirs: List[str] = []):
+        """
+            Images of atlas_dirs are packed into sprite atlases (see SpriteAtlas)
+        """
         if not ImageCache._loaded:
-            self._load_images(image_dirs)
+            with Logger.timed("ImageCache", "Image cache warm-up") as fields:
+                self._load_images(image_dirs, atlas_dirs)
+                fields["object_count"] = len(ImageCache._images)
+                fields["bytes"] = self.get_stats()["bytes"]
             ImageCache._loaded = True
+            self.log_duplicates()
 
-    def _load_images(self, image_dirs: List[str] = []) -> None:
+    def _load_image(self, filepath: str) -> Optional[Surface]:
+        image_name: str = path.basename(filepath)
+        try:
+            surface = pygame.image.load(filepath).convert_alpha()
+            Logger.success(f"Loaded image: {image_name} from {filepath}", compact=True, subsystem="ImageCache")
+            return surface
+        except pygame.error as e:
+            Logger.error(f"Error loading image {image_name} from {filepath}: {e}")
+            return None
+
+    def _load_images(self, image_dirs: List[str] = [], atlas_dirs: List[str] = []) -> None:
         for image_dir in image_dirs:
             if path.isdir(image_dir):
                 try:
-                    file_names = list(filter(lambda f : f.lower().endswith(".png"), listdir(image_dir)))
+                    if image_dir in atlas_dirs:
+                        atlas: SpriteAtlas = SpriteAtlas.load_or_build(image_dir, self._load_image)
+                        ImageCache._atlases.append(atlas)
+                        ImageCache._images.update(atlas.get_images())
+                        for canonical_name, names in atlas.get_duplicates().items():
+                            ImageCache._canonical_names.update({name: canonical_name for name in names})
+                        Logger.info(f"Loaded {len(atlas.get_images())} images of {image_dir} from {atlas.get_stats()['pages']} atlas pages", subsystem="ImageCache")
+                        continue
+                    file_names = sorted(filter(lambda f : f.lower().endswith(".png"), listdir(image_dir)))
+                    # Pixel-identical images share the Surface of the first one
+                    names_by_hash: Dict[str, str] = {}
                     for filename in file_names:
-                        filepath = path.join(image_dir, filename)
-                        try:
-                            surface = pygame.image.load(filepath).convert_alpha()
-                            image_name: str = path.basename(filepath)
-                            ImageCache._images[path.basename(image_name)] = surface
-                            Logger.success(f"Loaded image: {image_name} from {filepath}")
-                        except pygame.error as e:
-                            Logger.error(f"Error loading image {image_name} from {filepath}: {e}")
+                        surface: Optional[Surface] = self._load_image(path.join(image_dir, filename))
+                        if surface != None:
+                            image_hash: str = get_pixel_hash(surface)
+                            if image_hash in names_by_hash:
+                                ImageCache._canonical_names[filename] = names_by_hash[image_hash]
+                                surface = ImageCache._images[names_by_hash[image_hash]]
+                            else:
+                                names_by_hash[image_hash] = filename
+                            ImageCache._images[filename] = surface
                 except FileNotFoundError:
                     Logger.error(f"Error: Image directory not found: {image_dir}")
 
+    def get_atlases(self) -> List[SpriteAtlas]:
+        return ImageCache._atlases
+
+    def get_canonical_name(self, image_name: str) -> str:
+        """
+            First file name, alphabetically, of the images identical to image_name
+        """
+        return ImageCache._canonical_names.get(image_name, image_name)
+
+    def get_duplicates(self) -> Dict[str, List[str]]:
+        duplicates: Dict[str, List[str]] = {}
+        for name, canonical_name in sorted(ImageCache._canonical_names.items()):
+            duplicates.setdefault(canonical_name, []).append(name)
+        return duplicates
+
+    def get_duplicate_bytes(self) -> int:
+        """
+            Pixel bytes one Surface per file name would have taken on top of the shared ones
+        """
+        return sum(
+            ImageCache._images[name].get_width() * ImageCache._images[name].get_height() * ImageCache._images[name].get_bytesize()
+            for name in ImageCache._canonical_names
+        )
+
+    def log_duplicates(self) -> None:
+        duplicates: Dict[str, List[str]] = self.get_duplicates()
+        if duplicates:
+            Logger.info("\n".join([
+                f"{len(ImageCache._canonical_names)} images are identical to another one, "
+                f"{self.get_duplicate_bytes() / 1048576:.1f} MB saved by sharing them"
+            ] + [
+                f"{canonical_name}: {', '.join(names)}" for canonical_name, names in list(duplicates.items())[:10]
+            ] + (["..."] if len(duplicates) > 10 else [])), subsystem="ImageCache")
+
     def get_image(self, image_name: str, scaled: Optional[bool] = False, scale_dimensions: Optional[Coords] = []) -> Surface:
         surface = ImageCache._images.get(image_name)
         if scaled:
-            scaled_image_name = f"{image_name}-scaled-{scale_dimensions[0]}-{scale_dimensions[1]}"
+            scaled_image_name = f"{self.get_canonical_name(image_name)}-scaled-{scale_dimensions[0]}-{scale_dimensions[1]}"
             if not ImageCache._scaled_images.get(scaled_image_name):
                 ImageCache._scaled_images[path.basename(scaled_image_name)] = pygame.transform.scale(surface, scale_dimensions)
             surface = ImageCache._scaled_images[scaled_image_name]
         return surface
     
+    def get_stats(self) -> Dict[str, int]:
+        # Atlas images are subsurfaces, their pixels are counted with the pages
+        # Duplicates share a Surface, it is only counted once
+        original_bytes: int = sum(map(get_surface_bytes, {id(image): image for image in ImageCache._images.values()}.values()))
+        atlas_bytes: int = sum(atlas.get_stats()["bytes"] for atlas in ImageCache._atlases)
+        scaled_bytes: int = sum(map(get_surface_bytes, ImageCache._scaled_images.values()))
+        return {
+            "images": len(ImageCache._images),
+            "scaled_images": len(ImageCache._scaled_images),
+            "atlas_pages": sum(atlas.get_stats()["pages"] for atlas in ImageCache._atlases),
+            "duplicate_images": len(ImageCache._canonical_names),
+            "duplicate_bytes_saved": self.get_duplicate_bytes(),
+            "original_bytes": original_bytes,
+            "atlas_bytes": atlas_bytes,
+            "scaled_bytes": scaled_bytes,
+            "bytes": original_bytes + atlas_bytes + scaled_bytes
+        }
+
     def get_images(self, image_data: Tuple[Tuple[str, bool, Tuple[int, int]], ...]) -> List[Surface]:
         return list(map(lambda i : self.get_image(i[0], *i[1:] if len(i) > 1 else [False, []]), image_data))
     
@@ -0,0 +1,179 @@
+import json
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Set
+from .utility import *
+from .Logger import Logger
+
+class PressedKeys:
+    """
+        Stands in for pygame.key.get_pressed() when replaying a session
+    """
+    def __init__(self, keys: Set[int]) -> None:
+        self.keys: Set[int] = keys
+
+    def __getitem__(self, key: int) -> bool:
+        return key in self.keys
+
+class InputSession:
+    # ANCHOR - InputSession
+    """
+    Single source of input for the editor (events, mouse position, pressed keys).
+
+    Live, it reads pygame directly. Recording, it samples the mouse position and
+    the pressed keys once per frame, and writes them with the frame's events to
+    a JSON lines file. Replaying, it serves the recorded frames back instead of
+    pygame's, and times every frame, so the same session can be re-run as a
+    benchmark.
+    """
+    _instance = None
+
+    LIVE: str = "live"
+    RECORD: str = "record"
+    REPLAY: str = "replay"
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, mode: str = LIVE, file_path: Optional[str] = None, report_file_path: Optional[str] = None) -> None:
+        if self._initialized:
+            return
+        self._initialized = True
+
+        self.mode: str = mode
+        self.file_path: Optional[str] = file_path
+        self.report_file_path: Optional[str] = report_file_path
+        self.record_file = None
+
+        self.frames: List[Dict[str, Any]] = []
+        self.frame_index: int = -1
+        self.frame: Dict[str, Any] = {"mouse": [0, 0], "keys": [], "events": []}
+        self.pressed_keys: Any = PressedKeys(set())
+
+        self.frame_times: List[float] = []
+        self.frame_start: Optional[float] = None
+
+        if self.mode == InputSession.RECORD:
+            self.record_file = open(self.file_path, "w")
+            self.record_file.write(json.dumps({"version": 1, "pygame": pygame.version.ver}) + "\n")
+            Logger.info(f"Recording input session to {self.file_path}")
+        elif self.mode == InputSession.REPLAY:
+            with open(self.file_path, "r") as f:
+                header: Dict[str, Any] = json.loads(f.readline())
+                if header.get("pygame") != pygame.version.ver:
+                    Logger.info(f"Session recorded with pygame {header.get('pygame')}, replaying with {pygame.version.ver}")
+                self.frames = [json.loads(line) for line in f if line.strip()]
+            Logger.info(f"Replaying {len(self.frames)} frames from {self.file_path}")
+
+    def is_recording(self) -> bool:
+        return self.mode == InputSession.RECORD
+
+    def is_replaying(self) -> bool:
+        return self.mode == InputSession.REPLAY
+
+    def is_replay_done(self) -> bool:
+        return self.is_replaying() and self.frame_index >= len(self.frames)
+
+    @staticmethod
+    def serialize_event(event: Event) -> Dict[str, Any]:
+        # Only plain values survive, pygame objects such as window references are dropped
+        data: Dict[str, Any] = {"type": event.type}
+        for key, value in event.dict.items():
+            if isinstance(value, (bool, int, float, str)):
+                data[key] = value
+            elif isinstance(value, (tuple, list)) and all(isinstance(v, (bool, int, float)) for v in value):
+                data[key] = list(value)
+        return data
+
+    @staticmethod
+    def deserialize_event(data: Dict[str, Any]) -> Event:
+        return pygame.event.Event(data["type"], {
+            key: tuple(value) if isinstance(value, list) else value
+            for key, value in data.items() if key != "type"
+        })
+
+    def begin_frame(self) -> None:
+        if self.mode == InputSession.RECORD:
+            self.write_frame()
+            keys = pygame.key.get_pressed()
+            self.pressed_keys = keys
+            self.frame = {
+                "mouse": list(pygame.mouse.get_pos()),
+                "keys": [key for key in range(len(keys)) if keys[key]],
+                "events": []
+            }
+        elif self.mode == InputSession.REPLAY:
+            now: float = perf_counter()
+            if self.frame_start != None:
+                self.frame_times.append(now - self.frame_start)
+            self.frame_start = now
+            self.frame_index += 1
+            if self.frame_index < len(self.frames):
+                self.frame = self.frames[self.frame_index]
+                self.pressed_keys = PressedKeys(set(self.frame["keys"]))
+            else:
+                self.frame = {"mouse": self.frame["mouse"], "keys": [], "events": []}
+                self.pressed_keys = PressedKeys(set())
+
+    def write_frame(self) -> None:
+        if self.record_file != None and self.frame_index >= 0:
+            self.record_file.write(json.dumps(self.frame) + "\n")
+        self.frame_index += 1
+
+    def get_events(self) -> List[Event]:
+        if self.mode == InputSession.REPLAY:
+            return [self.deserialize_event(data) for data in self.frame["events"]]
+        events: List[Event] = pygame.event.get()
+        if self.mode == InputSession.RECORD:
+            self.frame["events"] += [self.serialize_event(event) for event in events]
+        return events
+
+    def get_mouse_pos(self) -> Coords:
+        if self.mode == InputSession.LIVE:
+            return pygame.mouse.get_pos()
+        return tuple(self.frame["mouse"])
+
+    def get_pressed_keys(self) -> Any:
+        if self.mode == InputSession.LIVE:
+            return pygame.key.get_pressed()
+        return self.pressed_keys
+
+    def get_replay_report(self) -> Dict[str, Any]:
+        frame_times: List[float] = sorted(self.frame_times)
+
+        def percentile(q: float) -> float:
+            return frame_times[min(int(len(frame_times) * q), len(frame_times) - 1)] if len(frame_times) else 0
+
+        return {
+            "session": self.file_path,
+            "frames": len(self.frame_times),
+            "total_seconds": sum(self.frame_times),
+            "mean_ms": sum(self.frame_times) / len(self.frame_times) * 1000 if len(self.frame_times) else 0,
+            "p50_ms": percentile(0.5) * 1000,
+            "p95_ms": percentile(0.95) * 1000,
+            "p99_ms": percentile(0.99) * 1000,
+            "max_ms": (frame_times[-1] if len(frame_times) else 0) * 1000,
+            "frame_times_ms": [frame_time * 1000 for frame_time in self.frame_times],
+        }
+
+    def close(self) -> None:
+        if self.mode == InputSession.RECORD and self.record_file != None:
+            self.write_frame()
+            self.record_file.close()
+            self.record_file = None
+            Logger.info(f"Recorded {self.frame_index} frames to {self.file_path}")
+        elif self.mode == InputSession.REPLAY:
+            if self.frame_start != None and self.frame_index < len(self.frames):
+                self.frame_times.append(perf_counter() - self.frame_start)
+                self.frame_start = None
+            report: Dict[str, Any] = self.get_replay_report()
+            Logger.info(
+                f"Replayed {report['frames']} frames in {report['total_seconds']:.3f} s, "
+                f"mean {report['mean_ms']:.2f} ms, p50 {report['p50_ms']:.2f} ms, "
+                f"p95 {report['p95_ms']:.2f} ms, p99 {report['p99_ms']:.2f} ms, max {report['max_ms']:.2f} ms"
+            )
+            if self.report_file_path:
+                with open(self.report_file_path, "w") as f:
+                    json.dump(report, f, indent=4)
@@ -0,0 +1,116 @@
+from heapq import heappop, heappush
+from typing import Dict, List, Optional, Set, Tuple, TypedDict
+from .utility import *
+from .Sprite import Sprite
+from .HitBox import HitBox
+from .ImageCache import ImageCache
+from .SpriteData import SpriteData
+from .HitBoxData import HitBoxData
+
+class LevelAnalysis(TypedDict):
+    duplicate_sprite_ids: List[str]
+    duplicate_hitbox_ids: List[str]
+    overlapping_hitbox_ids: List[Tuple[str, str]]
+    uncovered_sprite_ids: List[str]
+    highlight_rects: List[Rect]
+
+class LevelAnalyzer:
+    # ANCHOR - LevelAnalyzer
+    """
+    Finds exact duplicates, overlapping hitboxes and sprites that no hitbox
+    touches, using a sort-based sweep-and-prune along the x axis so only
+    objects whose x ranges overlap are ever compared.
+
+    Tiles and the entries prefab instances flatten into are checked along with
+    the free sprites and hitboxes, but only free sprites and hitboxes are
+    reported as duplicates, since they are the ones that can be removed.
+    """
+
+    @staticmethod
+    def _sweep(rects: List[Rect], other_rects: Optional[List[Rect]] = None) -> List[Tuple[int, int]]:
+        """
+            Returns the index pairs of overlapping rects, either within rects,
+            or between rects and other_rects when it is given.
+        """
+        groups: List[List[Rect]] = [rects] if other_rects is None else [rects, other_rects]
+        events: List[Tuple[int, int, int]] = sorted(
+            (rect.left, group, i) for group, group_rects in enumerate(groups) for i, rect in enumerate(group_rects)
+        )
+        pairs: List[Tuple[int, int]] = []
+        ends: List[Tuple[int, int, int]] = [] # (right, group, index)
+        active: List[Dict[int, Rect]] = [{} for _ in groups]
+        for left, group, i in events:
+            while ends and ends[0][0] <= left:
+                _, ended_group, ended_i = heappop(ends)
+                del active[ended_group][ended_i]
+            rect: Rect = groups[group][i]
+            for j, other in active[len(groups) - 1 - group].items():
+                if other.top < rect.bottom and rect.top < other.bottom:
+                    pairs.append((j, i) if group else (i, j))
+            active[group][i] = rect
+            heappush(ends, (rect.right, group, i))
+        return pairs
+
+    @staticmethod
+    def get_sprite_rect(sprite: SpriteData) -> Rect:
+        image: Optional[Surface] = ImageCache().get_image(sprite["file_name"])
+        return Rect(sprite["coordinates"], image.get_size() if image != None else (0, 0))
+
+    @staticmethod
+    def analyze(
+        sprites: List[Sprite],
+        hitboxes: List[HitBox],
+        tiles: Optional[List[SpriteData]] = None,
+        prefab_sprites: Optional[List[SpriteData]] = None,
+        prefab_hitboxes: Optional[List[HitBoxData]] = None
+    ) -> LevelAnalysis:
+        # (id, name, rect, is free), in drawing order: tiles, prefab instances, then free sprites
+        all_sprites: List[Tuple[str, str, Rect, bool]] = \
+            [(tile["id"], tile["file_name"], LevelAnalyzer.get_sprite_rect(tile), False) for tile in tiles or []] + \
+            [(sprite["id"], sprite["file_name"], LevelAnalyzer.get_sprite_rect(sprite), False) for sprite in prefab_sprites or []] + \
+            [(sprite.get_id(), sprite.get_name(), Rect(sprite.rect), True) for sprite in sprites]
+        all_hitboxes: List[Tuple[str, Rect, bool]] = \
+            [(hitbox["id"], Rect(hitbox["rect"]), False) for hitbox in prefab_hitboxes or []] + \
+            [(hitbox.get_id(), Rect(hitbox.get_rect()), True) for hitbox in hitboxes]
+
+        # Exact duplicates, the first copy in drawing order is kept
+        seen: Set[Tuple] = set()
+        duplicate_sprites: List[Tuple[str, str, Rect, bool]] = []
+        for sprite in all_sprites:
+            key = (sprite[1], *sprite[2].topleft)
+            if key in seen and sprite[3]:
+                duplicate_sprites.append(sprite)
+            seen.add(key)
+
+        seen = set()
+        duplicate_hitboxes: List[Tuple[str, Rect, bool]] = []
+        unique_hitboxes: List[Tuple[str, Rect, bool]] = []
+        for hitbox in all_hitboxes:
+            key = tuple(hitbox[1])
+            if key in seen and hitbox[2]:
+                duplicate_hitboxes.append(hitbox)
+            else:
+                unique_hitboxes.append(hitbox)
+            seen.add(key)
+
+        overlapping_hitboxes: List[Tuple[Tuple[str, Rect, bool], Tuple[str, Rect, bool]]] = [
+            (unique_hitboxes[i], unique_hitboxes[j])
+            for i, j in LevelAnalyzer._sweep([hitbox[1] for hitbox in unique_hitboxes])
+        ]
+
+        covered: Set[int] = set(i for i, _ in LevelAnalyzer._sweep(
+            [sprite[2] for sprite in all_sprites],
+            [hitbox[1] for hitbox in unique_hitboxes]
+        ))
+        uncovered_sprites: List[Tuple[str, str, Rect, bool]] = [sprite for i, sprite in enumerate(all_sprites) if i not in covered]
+
+        return {
+            "duplicate_sprite_ids": [sprite[0] for sprite in duplicate_sprites],
+            "duplicate_hitbox_ids": [hitbox[0] for hitbox in duplicate_hitboxes],
+            "overlapping_hitbox_ids": [(a[0], b[0]) for a, b in overlapping_hitboxes],
+            "uncovered_sprite_ids": [sprite[0] for sprite in uncovered_sprites],
+            "highlight_rects": [Rect(sprite[2]) for sprite in duplicate_sprites]
+                + [Rect(hitbox[1]) for hitbox in duplicate_hitboxes]
+                + [a[1].clip(b[1]) for a, b in overlapping_hitboxes]
+                + [Rect(sprite[2]) for sprite in uncovered_sprites],
+        }
@@ -0,0 +1,172 @@
+import json
+import queue
+import socket
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from .Logger import Logger
+
+class LiveLink:
+    # ANCHOR - LiveLink
+    """
+    Local TCP channel that streams map edits to the game started by
+    GameManager, one JSON object per line, so the game can patch its level in
+    place instead of being restarted. The game finds the address ("host:port")
+    in the MAP_EDITOR_LIVE_LINK environment variable, see live_link_receiver.py.
+
+    Messages:
+    - {"op": "load", "map": {...}}: the whole map, as saved. Sent first on every
+      new connection, and after batch edits (map load, undo, hitbox merge...)
+    - {"op": "add", "type": "sprite" | "hitbox", "data": {...}}
+    - {"op": "delete", "type": "sprite" | "hitbox", "id": "..."}
+    - {"op": "move", "type": "sprite", "id": "...", "coordinates": [x, y]}
+    - {"op": "starting_position", "coordinates": [x, y]}
+
+    Prefab instances are sent as the sprites and hitboxes they are made of.
+
+    Sockets are written by a background thread, the editor only queues messages.
+    """
+    environment_variable: str = "MAP_EDITOR_LIVE_LINK"
+
+    def __init__(self, host: str = "127.0.0.1") -> None:
+        self.host: str = host
+        self.server: Optional[socket.socket] = None
+        self.address: Optional[str] = None
+
+        # Accepted, waiting for their first snapshot from the main thread
+        self.pending_clients: List[socket.socket] = []
+        # Written to by the writer thread only
+        self.clients: List[socket.socket] = []
+        self.nb_clients: int = 0
+        self.lock: threading.Lock = threading.Lock()
+        # (encoded line, clients to add once it is sent to them, or None for every client),
+        # or None to stop the writer thread
+        self.queue: queue.Queue = queue.Queue()
+        self.writer_thread: Optional[threading.Thread] = None
+        # Start and stop are called from the main thread and the game supervisor thread,
+        # a restart waits for the old writer thread to be gone
+        self.start_lock: threading.Lock = threading.Lock()
+
+    def is_started(self) -> bool:
+        return self.server != None
+
+    def is_connected(self) -> bool:
+        return self.nb_clients > 0
+
+    def has_pending_clients(self) -> bool:
+        return len(self.pending_clients) > 0
+
+    def get_address(self) -> Optional[str]:
+        return self.address
+
+    def start(self) -> Optional[str]:
+        """
+            Listens on a free port, returns the address to give to the game
+        """
+        with self.start_lock:
+            if self.server:
+                return self.address
+            try:
+                self.server = socket.create_server((self.host, 0))
+            except OSError as e:
+                Logger.error(f"Error starting live link: {e}")
+                return None
+            self.address = f"{self.host}:{self.server.getsockname()[1]}"
+            threading.Thread(target=self.accept, name="LiveLinkAccept", daemon=True).start()
+            self.writer_thread = threading.Thread(target=self.write, name="LiveLinkWriter", daemon=True)
+            self.writer_thread.start()
+            Logger.info(f"Live link listening on {self.address}")
+            return self.address
+
+    def stop(self) -> None:
+        """
+            Closes the server and every client, once the messages already queued are sent
+        """
+        with self.start_lock:
+            if not self.server:
+                return
+            self.server.close()
+            self.server = None
+            self.address = None
+            with self.lock:
+                pending_clients: List[socket.socket] = self.pending_clients
+                self.pending_clients = []
+            for client in pending_clients:
+                client.close()
+            self.queue.put(None)
+            self.writer_thread.join()
+            self.writer_thread = None
+            Logger.info("Live link stopped")
+
+    def accept(self) -> None:
+        server: socket.socket = self.server
+        while True:
+            try:
+                client, address = server.accept()
+            except OSError:
+                return
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self.lock:
+                self.pending_clients.append(client)
+            Logger.info(f"Live link connected to {address[0]}:{address[1]}")
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+    def send(self, message: Dict[str, Any]) -> None:
+        if self.nb_clients:
+            self.queue.put((self.encode(message), None))
+
+    def send_snapshot(self, map_data: Dict, to_all: bool = False) -> None:
+        """
+            Sends the whole map to clients waiting for their first one, and to the others if to_all
+        """
+        with self.lock:
+            clients: List[socket.socket] = self.pending_clients
+            self.pending_clients = []
+            self.nb_clients += len(clients)
+        line: bytes = self.encode({"op": "load", "map": map_data})
+        if to_all and self.nb_clients > len(clients):
+            self.queue.put((line, None))
+        if clients:
+            self.queue.put((line, clients))
+
+    def write(self) -> None:
+        while True:
+            # Everything queued since the last write goes out in one sendall per client
+            items: List[Optional[Tuple[bytes, Optional[List[socket.socket]]]]] = [self.queue.get()]
+            while not self.queue.empty():
+                items.append(self.queue.get_nowait())
+            is_stopping: bool = None in items
+            lines: List[bytes] = []
+            for line, new_clients in filter(lambda item : item != None, items):
+                if new_clients == None:
+                    lines.append(line)
+                else:
+                    self.send_lines(self.clients, lines)
+                    lines = []
+                    self.send_lines(new_clients, [line])
+                    self.clients += [client for client in new_clients if client.fileno() != -1]
+            self.send_lines(self.clients, lines)
+            if is_stopping:
+                for client in self.clients:
+                    client.close()
+                self.clients = []
+                with self.lock:
+                    self.nb_clients = 0
+                return
+
+    def send_lines(self, clients: List[socket.socket], lines: List[bytes]) -> None:
+        if lines:
+            for client in list(clients):
+                try:
+                    client.sendall(b"".join(lines))
+                except OSError:
+                    self.drop(client)
+
+    def drop(self, client: socket.socket) -> None:
+        client.close()
+        if client in self.clients:
+            self.clients.remove(client)
+        with self.lock:
+            self.nb_clients -= 1
+        Logger.info("Live link disconnected")
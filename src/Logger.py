@@ -1,41 +1,278 @@
+import atexit
+import json
+import os
+import platform
+import queue
+import sys
 import textwrap
 import shutil # To get terminal size
-import os # To handle file operations
+import threading
+import time
 from abc import ABC # Import Abstract Base Class
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, NamedTuple, Optional, TextIO, Union
+from uuid import uuid4 as u4
 
-log = print
+class LogRecord(NamedTuple):
+    level: str
+    message: str
+    timestamp: float
+    subsystem: str = "app"
+    # Numeric fields of the structured log, such as duration_ms or object_count
+    fields: Dict[str, Union[int, float]] = {}
+    compact: bool = False
+    # None when not printed
+    console: Optional[TextIO] = None
+    to_log_file: bool = True
+    to_event_log: bool = True
 
 class Logger(ABC):
     """
     An abstract base class for logging with console (table) and file capabilities.
     Provides class methods for different log levels.
+
+    Callers only enqueue their message: a background thread formats the
+    messages and writes them in batches, to the console and to a log file kept
+    open between batches. Console output is rate limited (the file gets every
+    message), and high-volume messages can use a compact one-line format
+    instead of the table.
+
+    Every message, and the events that are only meant for aggregation (see
+    event and timed), also goes to a structured log: one JSON object per line
+    with a timestamp, level, subsystem, message, host, session and numeric
+    fields, in files rotated past event_log_max_bytes, of which
+    event_log_backups are kept.
     """
     _log_file: str = "logs.log"
+    _event_log_file: str = os.path.join(os.path.dirname(_log_file), "events.jsonl")
+    event_log_max_bytes: int = 5 * 1024 * 1024
+    event_log_backups: int = 5
+    _event_file: Optional[TextIO] = None
+    _host: str = platform.node()
+    _session: str = str(u4())
+
+    levels: Dict[str, int] = {"DEBUG": 10, "INFO": 20, "SUCCESS": 25, "ERROR": 40}
+    level: int = levels["INFO"]
+
+    # Console messages per second past which messages only go to the log file (errors always show)
+    console_rate_limit: int = 50
+    batch_size: int = 256
+
+    _queue: "queue.Queue[Optional[LogRecord]]" = queue.Queue()
+    _writer: Optional[threading.Thread] = None
+    _writer_lock: threading.Lock = threading.Lock()
+    _file: Optional[TextIO] = None
+    _terminal_width: Optional[int] = None
+    # Console rate limit state, _log is called from the game supervisor and live link threads too
+    _rate_lock: threading.Lock = threading.Lock()
+    _rate_window: int = 0
+    _rate_count: int = 0
+    _suppressed: int = 0
+    _suppressed_console: Optional[TextIO] = None
+
+    @classmethod
+    def set_level(cls, level: str) -> None:
+        cls.level = cls.levels.get(level.upper(), cls.levels["INFO"])
+
+    @classmethod
+    def set_event_log_rotation(cls, max_bytes: int, backups: int) -> None:
+        cls.event_log_max_bytes = max_bytes
+        cls.event_log_backups = backups
 
     @classmethod
-    def _log(cls, level: str, *args, **kwargs):
+    def _log(cls, level: str, *args, compact: bool = False, subsystem: str = "app", **kwargs):
         """
         Internal class method to handle the core logging logic (console and file).
 
         Args:
             level (str): The log level (e.g., "INFO", "ERROR", "SUCCESS").
             *args: Variable length argument list for the message content.
-            **kwargs: Arbitrary keyword arguments (passed to print, e.g., sep, end).
+            compact (bool): Print the message on one line instead of a table.
+            subsystem (str): Subsystem of the structured log record.
+            **kwargs: Numeric values are added to the structured log record, others are ignored.
         """
+        if cls.levels[level] < cls.level:
+            return
+
         # Combine args into a single message string for both console and file
         message = " ".join(map(str, args))
 
+        window: int = int(time.monotonic())
+        suppressed_record: Optional[LogRecord] = None
+        console: Optional[TextIO] = sys.stdout
+        with cls._rate_lock:
+            if window != cls._rate_window:
+                cls._rate_window = window
+                cls._rate_count = 0
+                if cls._suppressed:
+                    suppressed_record = cls._get_suppressed_record()
+                    cls._suppressed = 0
+            cls._rate_count += 1
+            if cls._rate_count > cls.console_rate_limit and level != "ERROR":
+                cls._suppressed_console = console
+                console = None
+                cls._suppressed += 1
+
+        if suppressed_record != None:
+            cls._enqueue(suppressed_record)
+        cls._enqueue(LogRecord(level, message, time.time(), subsystem, cls._get_fields(kwargs), compact, console))
+
+    @classmethod
+    def event(cls, subsystem: str, message: str, level: str = "INFO", **fields: Union[int, float]) -> None:
+        """
+        Writes a record to the structured log only, e.g. a timing to aggregate.
+        """
+        if cls.levels[level] >= cls.level:
+            cls._enqueue(LogRecord(level, message, time.time(), subsystem, cls._get_fields(fields), to_log_file=False))
+
+    @classmethod
+    @contextmanager
+    def timed(cls, subsystem: str, message: str, **fields: Union[int, float]) -> Iterator[Dict[str, Union[int, float]]]:
+        """
+        Writes an event with the duration_ms of the with block. The yielded fields
+        can be filled inside the block, e.g. with the number of objects processed.
+        """
+        start: float = time.perf_counter()
+        yield fields
+        cls.event(subsystem, message, duration_ms=(time.perf_counter() - start) * 1000, **fields)
+
+    @staticmethod
+    def _get_fields(kwargs: Dict) -> Dict[str, Union[int, float]]:
+        return {key: value for key, value in kwargs.items() if isinstance(value, (int, float)) and not isinstance(value, bool)}
+
+    @classmethod
+    def _enqueue(cls, record: LogRecord) -> None:
+        if cls._writer == None:
+            with cls._writer_lock:
+                if cls._writer == None:
+                    cls._writer = threading.Thread(target=cls._write_loop, name="Logger", daemon=True)
+                    cls._writer.start()
+                    atexit.register(cls.close)
+        cls._queue.put(record)
+
+    @classmethod
+    def _write_loop(cls) -> None:
+        while True:
+            records: List[Optional[LogRecord]] = [cls._queue.get()]
+            try:
+                while len(records) < cls.batch_size:
+                    records.append(cls._queue.get_nowait())
+            except queue.Empty:
+                pass
+            try:
+                cls._write([record for record in records if record != None])
+            finally:
+                for _ in records:
+                    cls._queue.task_done()
+            if None in records:
+                return
+
+    @classmethod
+    def _write(cls, records: List[LogRecord]) -> None:
+        # Console lines are grouped by stream, so a batch is one write per stream
+        console_lines: Dict[TextIO, List[str]] = {}
+        for record in records:
+            if record.console != None:
+                console_lines.setdefault(record.console, []).extend(
+                    [cls._format_compact(record.level, record.message)] if record.compact else cls._format_table(record.level, record.message)
+                )
+        for console, lines in console_lines.items():
+            try:
+                console.write("\n".join(lines) + "\n")
+                console.flush()
+            except (OSError, ValueError):
+                pass
+
+        # --- File Logging ---
+        log_file_records: List[LogRecord] = [record for record in records if record.to_log_file]
+        if cls._log_file and log_file_records: # Check if the class attribute log file is set
+            try:
+                if cls._file == None:
+                    # Open the file in append mode, create if it doesn't exist, and keep it open
+                    cls._file = open(cls._log_file, 'a')
+                # Write the simple log message format
+                cls._file.write("".join(f"{record.level.upper()}: {record.message}\n" for record in log_file_records))
+                cls._file.flush()
+            except IOError as e:
+                # Use the console directly to avoid recursion in the logger itself
+                sys.stderr.write(f"[ERROR] Could not write to log file {cls._log_file}: {e}\n")
+
+        event_log_records: List[LogRecord] = [record for record in records if record.to_event_log]
+        if cls._event_log_file and event_log_records:
+            try:
+                cls._write_event_log([json.dumps({
+                    "timestamp": datetime.fromtimestamp(record.timestamp, timezone.utc).isoformat(timespec="milliseconds"),
+                    "level": record.level,
+                    "subsystem": record.subsystem,
+                    "message": record.message,
+                    "host": cls._host,
+                    "session": cls._session,
+                    **record.fields
+                }) + "\n" for record in event_log_records])
+            except IOError as e:
+                sys.stderr.write(f"[ERROR] Could not write to event log {cls._event_log_file}: {e}\n")
+
+    @classmethod
+    def _write_event_log(cls, lines: List[str]) -> None:
+        if cls._event_file == None:
+            cls._event_file = open(cls._event_log_file, 'a')
+        size: int = cls._event_file.tell()
+        chunk: List[str] = []
+        for line in lines:
+            if size and size + len(line) > cls.event_log_max_bytes:
+                cls._event_file.write("".join(chunk))
+                cls._rotate_event_log()
+                cls._event_file = open(cls._event_log_file, 'a')
+                size = 0
+                chunk = []
+            chunk.append(line)
+            size += len(line)
+        cls._event_file.write("".join(chunk))
+        cls._event_file.flush()
+
+    @classmethod
+    def _rotate_event_log(cls) -> None:
+        """
+        events.jsonl becomes events.1.jsonl, events.1.jsonl becomes events.2.jsonl, and so on,
+        the oldest file past event_log_backups is dropped.
+        """
+        cls._event_file.close()
+        cls._event_file = None
+        base, extension = os.path.splitext(cls._event_log_file)
+        for i in range(cls.event_log_backups - 1, 0, -1):
+            if os.path.exists(f"{base}.{i}{extension}"):
+                os.replace(f"{base}.{i}{extension}", f"{base}.{i + 1}{extension}")
+        if cls.event_log_backups > 0:
+            os.replace(cls._event_log_file, f"{base}.1{extension}")
+        else:
+            os.remove(cls._event_log_file)
+
+    @classmethod
+    def _get_suppressed_record(cls) -> LogRecord:
+        return LogRecord(
+            "INFO", f"{cls._suppressed} messages were only written to {cls._log_file}", time.time(),
+            compact=True, console=cls._suppressed_console, to_log_file=False, to_event_log=False
+        )
+
+    @staticmethod
+    def _format_compact(level: str, message: str) -> str:
+        return f"{level:<10}| {message}"
+
+    @classmethod
+    def _format_table(cls, level: str, message: str) -> List[str]:
         # --- Console Logging (Table Format) ---
-        # Get terminal width, default to a reasonable size if not available
-        try:
-            terminal_width = shutil.get_terminal_size().columns
-        except:
-            terminal_width = 80 # Default width
+        # Get terminal width once, default to a reasonable size if not available
+        if cls._terminal_width == None:
+            try:
+                cls._terminal_width = shutil.get_terminal_size().columns
+            except:
+                cls._terminal_width = 80 # Default width
 
         # Define column widths (Level | Message)
         # We reserve some space for borders and padding
         level_col_width = 10 # Fixed width for the level column
-        message_col_width = terminal_width - level_col_width - 5 # Adjust for borders and padding
+        message_col_width = cls._terminal_width - level_col_width - 5 # Adjust for borders and padding
 
         # Ensure message column is not too small
         if message_col_width < 10:
@@ -53,10 +290,10 @@ class Logger(ABC):
         corner = '+'
         padding = ' '
 
-        # Print the top border
-        log(f"{corner}{horizontal_border * (level_col_width + 2)}{corner}{horizontal_border * (message_col_width + 2)}{corner}")
+        border = f"{corner}{horizontal_border * (level_col_width + 2)}{corner}{horizontal_border * (message_col_width + 2)}{corner}"
+        lines: List[str] = [border]
 
-        # Print the table rows
+        # Table rows
         for i in range(table_height):
             # Get the current line of the message, or empty string if no more lines
             current_message_line = wrapped_message_lines[i] if i < len(wrapped_message_lines) else ""
@@ -70,23 +307,47 @@ class Logger(ABC):
             # Format the message cell
             message_cell = f"{padding}{current_message_line:<{message_col_width}}{padding}" # Left-align message
 
-            # Print the row
-            log(f"{vertical_border}{level_cell}{vertical_border}{message_cell}{vertical_border}")
+            lines.append(f"{vertical_border}{level_cell}{vertical_border}{message_cell}{vertical_border}")
 
-        # Print the bottom border
-        log(f"{corner}{horizontal_border * (level_col_width + 2)}{corner}{horizontal_border * (message_col_width + 2)}{corner}")
+        lines.append(border)
+        return lines
 
-        # --- File Logging ---
-        if cls._log_file: # Check if the class attribute log file is set
-            try:
-                # Open the file in append mode, create if it doesn't exist
-                with open(cls._log_file, 'a') as f:
-                    # Write the simple log message format
-                    f.write(f"{level.upper()}: {message}\n")
-            except IOError as e:
-                # Log an error to the console if file writing fails
-                # Use print here to avoid potential recursion or issues with the logger itself
-                log(f"[ERROR] Could not write to log file {cls._log_file}: {e}")
+    @classmethod
+    def flush(cls) -> None:
+        """
+        Blocks until every enqueued message has been written.
+        """
+        if cls._writer != None:
+            cls._queue.join()
+
+    @classmethod
+    def close(cls) -> None:
+        """
+        Writes the pending messages, stops the writer thread and closes the log file.
+        """
+        with cls._writer_lock:
+            if cls._writer != None:
+                with cls._rate_lock:
+                    if cls._suppressed:
+                        cls._queue.put(cls._get_suppressed_record())
+                        cls._suppressed = 0
+                cls._queue.put(None)
+                cls._writer.join()
+                cls._writer = None
+            if cls._file != None:
+                cls._file.close()
+                cls._file = None
+            if cls._event_file != None:
+                cls._event_file.close()
+                cls._event_file = None
+
+
+    @classmethod
+    def debug(cls, *args, **kwargs):
+      """
+      Logs a debug message, shown only when the log level is DEBUG.
+      """
+      cls._log("DEBUG", *args, **kwargs)
 
 
     @classmethod
@@ -113,4 +374,4 @@ class Logger(ABC):
       Logs a success message using the formatted table log function
       and optionally writes to the class-defined log file.
       """
-      cls._log("SUCCESS", *args, **kwargs)
\ No newline at end of file
+      cls._log("SUCCESS", *args, **kwargs)
@@ -0,0 +1,111 @@
+import json
+import tracemalloc
+from datetime import datetime
+from os import path
+from typing import Any, Dict, List, Optional
+from .Logger import Logger
+
+class MemoryProfiler:
+    # ANCHOR - MemoryProfiler
+    """
+    Memory used by each subsystem, and Python heap diffs between dumps.
+
+    Subsystem figures are the pixel bytes of the surfaces each one holds (plus
+    numpy buffers), which is where most of the editor's memory goes and which
+    tracemalloc cannot see. tracemalloc covers the Python heap, but slows down
+    every allocation, so it only starts with the first dump, or at startup when
+    a report file is given on the command line.
+    """
+    _instance = None
+
+    top_allocations: int = 15
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, report_file_path: Optional[str] = None) -> None:
+        if self._initialized:
+            return
+        self._initialized = True
+
+        # Next to logs.log unless given
+        self.report_file_path: str = report_file_path or path.join(path.dirname(Logger._log_file), "memory_report.json")
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.dumps: List[Dict[str, Any]] = []
+
+    def is_tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        if not self.is_tracing():
+            tracemalloc.start()
+            self.snapshot = self.take_snapshot()
+            Logger.info("Memory profiling started")
+
+    @staticmethod
+    def take_snapshot() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ])
+
+    def get_heap_diff(self) -> Dict[str, Any]:
+        """
+            Python heap in use, and the lines that allocated the most since the previous dump
+        """
+        snapshot: tracemalloc.Snapshot = self.take_snapshot()
+        statistics: List[tracemalloc.StatisticDiff] = snapshot.compare_to(self.snapshot, "lineno")
+        self.snapshot = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "current_bytes": current,
+            "peak_bytes": peak,
+            "top_allocations": [
+                {
+                    "location": f"{statistic.traceback[0].filename}:{statistic.traceback[0].lineno}",
+                    "size_bytes": statistic.size,
+                    "size_diff_bytes": statistic.size_diff,
+                    "count": statistic.count,
+                    "count_diff": statistic.count_diff,
+                }
+                for statistic in statistics[:self.top_allocations]
+            ]
+        }
+
+    def dump(self, label: str, subsystems: Dict[str, Dict[str, int]]) -> Dict[str, Any]:
+        """
+            Records subsystems (each with its total under "bytes") and the heap diff
+            since the previous dump, logs a summary and rewrites the report file.
+        """
+        self.start()
+        report: Dict[str, Any] = {
+            "label": label,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "subsystems": subsystems,
+            "total_bytes": sum(subsystem.get("bytes", 0) for subsystem in subsystems.values()),
+            "heap": self.get_heap_diff(),
+        }
+        self.dumps.append(report)
+
+        Logger.info("\n".join([
+            f"Memory dump '{label}': {report['total_bytes'] / 1048576:.1f} MB in surfaces, "
+            f"{report['heap']['current_bytes'] / 1048576:.1f} MB Python heap (peak {report['heap']['peak_bytes'] / 1048576:.1f} MB)"
+        ] + [
+            f"{name}: {subsystem['bytes'] / 1048576:.1f} MB" for name, subsystem in subsystems.items() if "bytes" in subsystem
+        ] + [
+            f"{allocation['size_diff_bytes'] / 1024:+.0f} KB {allocation['location']}"
+            for allocation in report["heap"]["top_allocations"][:5]
+        ]))
+        self.write_report()
+        return report
+
+    def write_report(self) -> None:
+        try:
+            with open(self.report_file_path, "w") as f:
+                json.dump({"dumps": self.dumps}, f, indent=4)
+        except IOError as e:
+            Logger.error(f"Error writing memory report to {self.report_file_path}: {e}")
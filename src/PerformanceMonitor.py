@@ -0,0 +1,115 @@
+from collections import deque
+from time import perf_counter
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+class PerformanceMonitor:
+    # ANCHOR - PerformanceMonitor
+    """
+    Frame time and per-phase timings for the performance HUD.
+
+    Measured methods are wrapped on their instances only while the monitor is
+    enabled, and the wrappers are removed when it is disabled, so a disabled
+    monitor adds no work to the frame.
+    """
+    history_length: int = 240
+    refresh_interval: float = 0.25
+
+    def __init__(self) -> None:
+        self.enabled: bool = False
+        self.phases: List[Tuple[object, str, str]] = []
+        self.counters: List[Tuple[object, str, str]] = []
+        self.frame_times: Deque[float] = deque(maxlen=self.history_length)
+        self.phase_times: Dict[str, Deque[float]] = {}
+        self.counts: Dict[str, int] = {}
+        self.last_frame_end: Optional[float] = None
+        self.last_refresh: float = 0
+        self.hud_lines: List[str] = []
+
+    def add_phase(self, obj: object, method_name: str, label: str) -> None:
+        self.phases.append((obj, method_name, label))
+
+    def add_counter(self, obj: object, method_name: str, label: str) -> None:
+        self.counters.append((obj, method_name, label))
+
+    def is_enabled(self) -> bool:
+        return self.enabled
+
+    def toggle(self) -> None:
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def enable(self) -> None:
+        if not self.enabled:
+            self.enabled = True
+            self.frame_times.clear()
+            self.last_frame_end = None
+            self.last_refresh = 0
+            for obj, method_name, label in self.phases:
+                self.phase_times[label] = deque(maxlen=self.history_length)
+                setattr(obj, method_name, self._timed(getattr(obj, method_name), self.phase_times[label]))
+            for obj, method_name, label in self.counters:
+                self.counts[label] = 0
+                setattr(obj, method_name, self._counted(getattr(obj, method_name), label))
+
+    def disable(self) -> None:
+        if self.enabled:
+            self.enabled = False
+            for obj, method_name, _ in self.phases + self.counters:
+                # Drop the instance attribute so the class method shows through again
+                obj.__dict__.pop(method_name, None)
+
+    def _timed(self, method: Callable, times: Deque[float]) -> Callable:
+        def timed(*args, **kwargs) -> Any:
+            start: float = perf_counter()
+            result: Any = method(*args, **kwargs)
+            times.append(perf_counter() - start)
+            return result
+        return timed
+
+    def _counted(self, method: Callable, label: str) -> Callable:
+        def counted(*args, **kwargs) -> Any:
+            self.counts[label] += 1
+            return method(*args, **kwargs)
+        return counted
+
+    def end_frame(self) -> None:
+        now: float = perf_counter()
+        if self.last_frame_end != None:
+            self.frame_times.append(now - self.last_frame_end)
+        self.last_frame_end = now
+
+    @staticmethod
+    def percentile(values: List[float], q: float) -> float:
+        return values[min(int(len(values) * q), len(values) - 1)] if len(values) else 0
+
+    def get_hud_lines(self, get_stats: Callable[[], List[str]]) -> List[str]:
+        """
+            Lines are rebuilt at most every refresh_interval seconds, get_stats
+            returns the extra lines (object counts, cache stats) to append.
+        """
+        now: float = perf_counter()
+        if now - self.last_refresh < self.refresh_interval:
+            return self.hud_lines
+        elapsed: float = now - self.last_refresh
+        self.last_refresh = now
+
+        frame_times: List[float] = sorted(self.frame_times)
+        mean_frame_time: float = sum(frame_times) / len(frame_times) if len(frame_times) else 0
+        self.hud_lines = [
+            f"FPS {1 / mean_frame_time if mean_frame_time else 0:.1f}"
+            f"  frame p50 {self.percentile(frame_times, 0.5) * 1000:.2f} ms"
+            f"  p95 {self.percentile(frame_times, 0.95) * 1000:.2f} ms"
+            f"  p99 {self.percentile(frame_times, 0.99) * 1000:.2f} ms"
+            f"  max {(frame_times[-1] if len(frame_times) else 0) * 1000:.2f} ms"
+        ] + [
+            f"{label} {sum(times) / len(times) * 1000 if len(times) else 0:.2f} ms"
+            f"  p95 {self.percentile(sorted(times), 0.95) * 1000:.2f} ms"
+            for label, times in self.phase_times.items()
+        ] + [
+            f"{label} {count / elapsed:.0f}/s" for label, count in self.counts.items()
+        ] + get_stats()
+        for label in self.counts:
+            self.counts[label] = 0
+        return self.hud_lines
@@ -0,0 +1,156 @@
+from uuid import uuid4 as u4
+from typing import List, Optional, Tuple
+from .utility import *
+from .ImageCache import ImageCache
+from .SpriteData import SpriteData
+from .HitBoxData import HitBoxData
+from .HitBox import HitBox
+from .PrefabData import PrefabData
+from .PrefabInstanceData import PrefabInstanceData
+
+class Prefab:
+    # ANCHOR - Prefab
+    """
+    A group of sprites and hitboxes stamped as instances (prefab id and top
+    left) instead of copies of every entry. All the instances are drawn from
+    one surface, composited again only when the prefab is edited, so editing a
+    prefab updates every instance at once.
+
+    Instances are flattened into plain sprite and hitbox entries (with ids
+    derived from the instance's) for games that do not read prefabs.
+    """
+    def __init__(self, data: PrefabData) -> None:
+        self.id: str = data.get("id") or str(u4())
+        self.size: Coords = tuple(data.get("size", (0, 0)))
+        self.sprites: List[SpriteData] = data.get("sprites", [])
+        self.hitboxes: List[HitBoxData] = data.get("hitboxes", [])
+        self.version: int = 0
+
+        # Composited on first draw, and after every edit
+        self.surface: Optional[Surface] = None
+        self.ghost_surface: Optional[Surface] = None
+        self.hitbox_surface: Optional[Surface] = None
+        self.hitbox_surface_key: Optional[Tuple] = None
+
+    @classmethod
+    def from_objects(cls, sprites: List[SpriteData], hitboxes: List[HitBoxData], _id: Optional[str] = None) -> Tuple["Prefab", Coords]:
+        """
+            sprites and hitboxes in canvas coordinates. Returns the prefab, cropped to
+            what they cover, and the canvas coordinates of its top left.
+        """
+        rects: List[Rect] = [cls.get_sprite_rect(sprite) for sprite in sprites] + [Rect(hitbox["rect"]) for hitbox in hitboxes]
+        bounds: Rect = rects[0].unionall(rects[1:])
+        return cls({
+            "id": _id,
+            "size": bounds.size,
+            "sprites": [
+                {**sprite, "coordinates": [sprite["coordinates"][0] - bounds.x, sprite["coordinates"][1] - bounds.y]}
+                for sprite in sprites
+            ],
+            "hitboxes": [
+                {**hitbox, "rect": [hitbox["rect"][0] - bounds.x, hitbox["rect"][1] - bounds.y, *hitbox["rect"][2:]]}
+                for hitbox in hitboxes
+            ],
+        }), list(bounds.topleft)
+
+    # ANCHOR[id=PrefabGetters]
+    @staticmethod
+    def get_sprite_rect(sprite: SpriteData) -> Rect:
+        image: Optional[Surface] = ImageCache().get_image(sprite["file_name"])
+        return Rect(sprite["coordinates"], image.get_size() if image != None else (0, 0))
+
+    @staticmethod
+    def get_flattened_id(instance_id: str, content_id: str) -> str:
+        return f"{instance_id}/{content_id}"
+
+    @staticmethod
+    def get_instance_id(flattened_id: str) -> Optional[str]:
+        return flattened_id.split("/", 1)[0] if "/" in flattened_id else None
+
+    def get_id(self) -> str:
+        return self.id
+
+    def get_size(self) -> Coords:
+        return self.size
+
+    def get_version(self) -> int:
+        return self.version
+
+    def get_data(self) -> PrefabData:
+        return {
+            "id": self.id,
+            "size": list(self.size),
+            "sprites": self.sprites,
+            "hitboxes": self.hitboxes,
+        }
+
+    def get_surface(self) -> Surface:
+        if self.surface == None:
+            self.surface = Surface((max(self.size[0], 1), max(self.size[1], 1)), pygame.SRCALPHA)
+            self.surface.blits([
+                (image, sprite["coordinates"])
+                for sprite, image in zip(self.sprites, map(lambda sprite : ImageCache().get_image(sprite["file_name"]), self.sprites))
+                if image != None
+            ], doreturn=False)
+        return self.surface
+
+    def get_ghost_surface(self) -> Surface:
+        """
+            Translucent copy, to preview where the prefab will be stamped
+        """
+        if self.ghost_surface == None:
+            self.ghost_surface = self.get_surface().copy()
+            self.ghost_surface.set_alpha(128)
+        return self.ghost_surface
+
+    def get_hitbox_surface(self) -> Optional[Surface]:
+        if not len(self.hitboxes):
+            return None
+        hitbox_surface_key: Tuple = (self.version, tuple(HitBox.color))
+        if hitbox_surface_key != self.hitbox_surface_key:
+            self.hitbox_surface_key = hitbox_surface_key
+            self.hitbox_surface = Surface((max(self.size[0], 1), max(self.size[1], 1)), pygame.SRCALPHA)
+            self.hitbox_surface.blits([
+                (HitBox.get_surface(*hitbox["rect"][2:]), hitbox["rect"][:2]) for hitbox in self.hitboxes
+            ], doreturn=False)
+        return self.hitbox_surface
+
+    def get_surface_bytes(self) -> int:
+        return sum(map(get_surface_bytes, [self.surface, self.ghost_surface, self.hitbox_surface]))
+
+    # ANCHOR[id=PrefabSetters]
+    def set_content(self, prefab: "Prefab") -> None:
+        """
+            Takes the content of prefab, every instance is drawn with it from the next frame
+        """
+        self.size = prefab.size
+        self.sprites = prefab.sprites
+        self.hitboxes = prefab.hitboxes
+        self.version += 1
+        self.surface = None
+        self.ghost_surface = None
+
+    # ANCHOR[id=PrefabFlatten]
+    def flatten(self, instance: PrefabInstanceData, keep_ids: bool = True) -> Tuple[List[SpriteData], List[HitBoxData]]:
+        """
+            Sprite and hitbox entries of instance, in canvas coordinates. Their ids are
+            derived from the instance's, or new ones if not keep_ids.
+        """
+        x, y = instance["coordinates"]
+        return (
+            [
+                {
+                    "id": self.get_flattened_id(instance["id"], sprite["id"]) if keep_ids else str(u4()),
+                    "file_name": sprite["file_name"],
+                    "coordinates": [sprite["coordinates"][0] + x, sprite["coordinates"][1] + y]
+                }
+                for sprite in self.sprites
+            ],
+            [
+                {
+                    "id": self.get_flattened_id(instance["id"], hitbox["id"]) if keep_ids else str(u4()),
+                    "rect": [hitbox["rect"][0] + x, hitbox["rect"][1] + y, *hitbox["rect"][2:]]
+                }
+                for hitbox in self.hitboxes
+            ]
+        )
@@ -0,0 +1,11 @@
+from typing import List, Tuple, TypedDict
+from .utility import *
+from .SpriteData import SpriteData
+from .HitBoxData import HitBoxData
+
+class PrefabData(TypedDict):
+    id: str
+    size: Tuple[int, int]
+    # Coordinates relative to the top left of the prefab
+    sprites: List[SpriteData]
+    hitboxes: List[HitBoxData]
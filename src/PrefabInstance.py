@@ -0,0 +1,44 @@
+from uuid import uuid4 as u4
+from typing import Optional, Tuple
+from .utility import *
+from .Prefab import Prefab
+from .PrefabInstanceData import PrefabInstanceData
+
+class PrefabInstance:
+    # ANCHOR - PrefabInstance
+    """
+    One placement of a prefab. It owns no surface, it is drawn with the prefab's.
+    """
+    def __init__(self, prefab: Prefab, x: int, y: int, _id: Optional[str] = None) -> None:
+        self.id: str = _id or str(u4())
+        self.prefab: Prefab = prefab
+        self.topleft: Coords = [x, y]
+
+    def get_id(self) -> str:
+        return self.id
+
+    def get_prefab(self) -> Prefab:
+        return self.prefab
+
+    def get_data(self) -> PrefabInstanceData:
+        return {
+            "id": self.id,
+            "prefab_id": self.prefab.get_id(),
+            "coordinates": list(self.topleft)
+        }
+
+    def get_rect(self) -> Rect:
+        # The size follows the prefab's edits
+        return Rect(self.topleft, self.prefab.get_size())
+
+    def set_top_left(self, topleft: Coords) -> None:
+        self.topleft = list(topleft)
+
+    def get_blit(self, offset: Coords = (0, 0)) -> Tuple[Surface, Coords]:
+        return (self.prefab.get_surface(), (self.topleft[0] + offset[0], self.topleft[1] + offset[1]))
+
+    def get_hitbox_blit(self, offset: Coords = (0, 0)) -> Optional[Tuple[Surface, Coords]]:
+        hitbox_surface: Optional[Surface] = self.prefab.get_hitbox_surface()
+        if hitbox_surface == None:
+            return None
+        return (hitbox_surface, (self.topleft[0] + offset[0], self.topleft[1] + offset[1]))
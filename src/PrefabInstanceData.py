@@ -0,0 +1,7 @@
+from typing import Tuple, TypedDict
+from .utility import *
+
+class PrefabInstanceData(TypedDict):
+    id: str
+    prefab_id: str
+    coordinates: Tuple[int, int]
@@ -0,0 +1,163 @@
+import cProfile
+import json
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from os import path
+from statistics import median
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+from .Logger import Logger
+
+Stack = Tuple[str, ...]
+
+class Profiler:
+    # ANCHOR - Profiler
+    """
+    cProfile plus a sampler thread that records the main thread's stack every
+    sample_interval seconds, started and stopped around App.run.
+
+    On stop, next to logs.log:
+    - <name>.collapsed: sampled stacks in the collapsed format of flamegraph.pl,
+      speedscope or inferno
+    - <name>.slow.collapsed: only the samples taken during slow frames (over
+      twice the median frame time)
+    - <name>.frames.json: one marker per main loop iteration (start, duration
+      and number of samples), so samples can be lined up with frames
+    - <name>.prof: the cProfile stats, for pstats, snakeviz or flameprof
+    """
+    _instance = None
+
+    sample_interval: float = 0.005
+    slow_frame_factor: float = 2
+
+    def __new__(cls, *args, **kwargs):
+        if not cls._instance:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self) -> None:
+        if self._initialized:
+            return
+        self._initialized = True
+
+        self.running: bool = False
+        self.profile: Optional[cProfile.Profile] = None
+        self.sampler_thread: Optional[threading.Thread] = None
+        self.stop_event: threading.Event = threading.Event()
+        self.main_thread_id: int = threading.main_thread().ident
+
+        self.start_time: float = 0
+        self.frame_starts: List[float] = []
+        # Number of samples per (index of the frame being run, stack from the root)
+        self.samples: Counter = Counter()
+        # Label per code object, so each sample only builds a tuple of shared strings
+        self.labels: Dict[object, str] = {}
+
+    def is_running(self) -> bool:
+        return self.running
+
+    def toggle(self) -> None:
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.running = True
+        self.start_time = perf_counter()
+        self.frame_starts = []
+        self.samples = Counter()
+        self.labels = {}
+        self.stop_event.clear()
+        self.sampler_thread = threading.Thread(target=self.sample, name="Profiler", daemon=True)
+        self.sampler_thread.start()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        Logger.info("Profiler started")
+
+    def begin_frame(self) -> None:
+        if self.running:
+            self.frame_starts.append(perf_counter())
+
+    def get_stack(self, frame) -> Stack:
+        stack: List[str] = []
+        while frame != None:
+            code = frame.f_code
+            label: Optional[str] = self.labels.get(code)
+            if label == None:
+                label = self.labels[code] = f"{code.co_name} ({path.basename(code.co_filename)}:{code.co_firstlineno})"
+            stack.append(label)
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def sample(self) -> None:
+        while not self.stop_event.wait(self.sample_interval):
+            frame = sys._current_frames().get(self.main_thread_id)
+            if frame != None:
+                self.samples[(len(self.frame_starts) - 1, self.get_stack(frame))] += 1
+
+    @staticmethod
+    def write_collapsed(file_path: str, stacks: List[Tuple[Stack, int]]) -> None:
+        collapsed: Counter = Counter()
+        for stack, count in stacks:
+            collapsed[";".join(stack)] += count
+        with open(file_path, "w") as f:
+            for stack, count in collapsed.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def stop(self) -> Optional[str]:
+        """
+            Returns the path of the written files, without extension
+        """
+        if not self.running:
+            return None
+        self.profile.disable()
+        self.stop_event.set()
+        self.sampler_thread.join()
+        self.running = False
+        stop_time: float = perf_counter()
+
+        frame_durations: List[float] = [
+            end - start for start, end in zip(self.frame_starts, self.frame_starts[1:] + [stop_time])
+        ]
+        samples_per_frame: Counter = Counter()
+        for (frame_index, _), count in self.samples.items():
+            samples_per_frame[frame_index] += count
+        slow_frame_duration: float = median(frame_durations) * self.slow_frame_factor if frame_durations else 0
+
+        file_path: str = path.join(path.dirname(Logger._log_file), f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        try:
+            self.write_collapsed(f"{file_path}.collapsed", [(stack, count) for (_, stack), count in self.samples.items()])
+            self.write_collapsed(f"{file_path}.slow.collapsed", [
+                (stack, count) for (frame_index, stack), count in self.samples.items()
+                if frame_index >= 0 and frame_durations[frame_index] > slow_frame_duration
+            ])
+            with open(f"{file_path}.frames.json", "w") as f:
+                json.dump({
+                    "sample_interval_ms": self.sample_interval * 1000,
+                    "slow_frame_ms": slow_frame_duration * 1000,
+                    "frames": [
+                        {
+                            "frame": frame_index,
+                            "start_ms": (start - self.start_time) * 1000,
+                            "duration_ms": duration * 1000,
+                            "samples": samples_per_frame[frame_index],
+                        }
+                        for frame_index, (start, duration) in enumerate(zip(self.frame_starts, frame_durations))
+                    ]
+                }, f, indent=4)
+            self.profile.dump_stats(f"{file_path}.prof")
+        except IOError as e:
+            Logger.error(f"Error writing profile to {file_path}: {e}")
+            return None
+
+        Logger.info(
+            f"Profiler stopped after {stop_time - self.start_time:.1f} s, {len(self.frame_starts)} frames, "
+            f"{sum(self.samples.values())} samples, written to {file_path}.collapsed, .slow.collapsed, .frames.json and .prof"
+        )
+        return file_path
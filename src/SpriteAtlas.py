@@ -0,0 +1,288 @@
+import json
+from hashlib import sha1
+import re
+from os import listdir, makedirs, path, remove, stat
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from .utility import *
+from .Logger import Logger
+
+# page index, rect in the page
+AtlasEntry = Tuple[int, Rect]
+
+class SkylinePacker:
+    # ANCHOR - SkylinePacker
+    """
+    Bottom-left skyline packing of rects into one page: the top edge of what is
+    already packed is kept as (x, y, width) segments, and each rect goes where
+    its bottom ends up the lowest.
+    """
+    def __init__(self, width: int, height: int) -> None:
+        self.width: int = width
+        self.height: int = height
+        self.skyline: List[Tuple[int, int, int]] = [(0, 0, width)]
+        self.used_width: int = 0
+        self.used_height: int = 0
+
+    def get_fit_y(self, index: int, width: int, height: int) -> Optional[int]:
+        x: int = self.skyline[index][0]
+        if x + width > self.width:
+            return None
+        y: int = 0
+        width_left: int = width
+        while width_left > 0:
+            y = max(y, self.skyline[index][1])
+            if y + height > self.height:
+                return None
+            width_left -= self.skyline[index][2]
+            index += 1
+        return y
+
+    def insert(self, width: int, height: int) -> Optional[Coords]:
+        best: Optional[Tuple[int, int, int, int]] = None
+        for index, (x, _, segment_width) in enumerate(self.skyline):
+            y: Optional[int] = self.get_fit_y(index, width, height)
+            # Lowest bottom, then narrowest segment
+            if y != None and (best == None or (y + height, segment_width) < best[:2]):
+                best = (y + height, segment_width, index, y)
+        if best == None:
+            return None
+        _, _, index, y = best
+        x: int = self.skyline[index][0]
+        self.add_level(index, x, y, width, height)
+        self.used_width = max(self.used_width, x + width)
+        self.used_height = max(self.used_height, y + height)
+        return (x, y)
+
+    def add_level(self, index: int, x: int, y: int, width: int, height: int) -> None:
+        self.skyline.insert(index, (x, y + height, width))
+        # Segments under the new one are cut
+        next_index: int = index + 1
+        while next_index < len(self.skyline):
+            segment_x, segment_y, segment_width = self.skyline[next_index]
+            overlap: int = x + width - segment_x
+            if overlap <= 0:
+                break
+            if overlap >= segment_width:
+                del self.skyline[next_index]
+            else:
+                self.skyline[next_index] = (segment_x + overlap, segment_y, segment_width - overlap)
+                break
+        # Neighbours at the same height become one segment
+        merged: List[Tuple[int, int, int]] = [self.skyline[0]]
+        for segment in self.skyline[1:]:
+            if segment[1] == merged[-1][1]:
+                merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + segment[2])
+            else:
+                merged.append(segment)
+        self.skyline = merged
+
+class SpriteAtlas:
+    # ANCHOR - SpriteAtlas
+    """
+    The PNG images of a directory packed into a few large pages, so that
+    drawing blits sub-rects of a handful of surfaces, and the game can load one
+    texture instead of one file per sprite.
+
+    Atlases are cached in .cache/, next to logs.log, keyed on a hash of the
+    directory listing (file names, sizes and mtimes), and can be exported with
+    a JSON index of the rects and UVs of every image.
+    """
+    version: int = 2
+    page_size: int = 2048
+    # Transparent pixels around every image, so that texture filtering in the game does not bleed
+    padding: int = 1
+
+    def __init__(self, pages: List[Surface], entries: Dict[str, AtlasEntry]) -> None:
+        self.pages: List[Surface] = pages
+        self.entries: Dict[str, AtlasEntry] = entries
+        # Identical images share their rect, and their subsurface
+        shared_images: Dict[Tuple[int, Tuple[int, int, int, int]], Surface] = {}
+        self.images: Dict[str, Surface] = {}
+        for name, (page_index, rect) in entries.items():
+            image_key: Tuple[int, Tuple[int, int, int, int]] = (page_index, tuple(rect))
+            if image_key not in shared_images:
+                shared_images[image_key] = pages[page_index].subsurface(rect)
+            self.images[name] = shared_images[image_key]
+        self.key: Optional[str] = None
+
+    # ANCHOR[id=SpriteAtlasGetters]
+    def get_images(self) -> Dict[str, Surface]:
+        """
+            Subsurfaces of the pages, they share the pages' pixels
+        """
+        return self.images
+
+    def get_duplicates(self) -> Dict[str, List[str]]:
+        """
+            Names of the images packed once for several file names, by the first of them
+        """
+        names_by_image: Dict[int, List[str]] = {}
+        for name in sorted(self.images):
+            names_by_image.setdefault(id(self.images[name]), []).append(name)
+        return {names[0]: names[1:] for names in names_by_image.values() if len(names) > 1}
+
+    def get_stats(self) -> Dict[str, int]:
+        page_bytes: int = sum(map(get_surface_bytes, self.pages))
+        packed_rects: Set[Tuple[int, Tuple[int, int, int, int]]] = set((page_index, tuple(rect)) for page_index, rect in self.entries.values())
+        image_bytes: int = sum(width * height * 4 for _, (_, _, width, height) in packed_rects)
+        return {
+            "pages": len(self.pages),
+            "images": len(self.entries),
+            "packed_images": len(packed_rects),
+            "bytes": page_bytes,
+            "unused_bytes": page_bytes - image_bytes,
+        }
+
+    @staticmethod
+    def get_png_file_names(directory: str) -> List[str]:
+        return sorted(f for f in listdir(directory) if f.lower().endswith(".png"))
+
+    @classmethod
+    def get_directory_key(cls, directory: str) -> str:
+        h = sha1(f"{cls.version} {cls.page_size} {cls.padding}".encode())
+        for file_name in cls.get_png_file_names(directory):
+            file_stat = stat(path.join(directory, file_name))
+            h.update(f"\n{file_name} {file_stat.st_size} {file_stat.st_mtime_ns}".encode())
+        return h.hexdigest()[:16]
+
+    @staticmethod
+    def get_cache_prefix(key: str) -> str:
+        return path.join(path.dirname(Logger._log_file), ".cache", f"atlas-{key}")
+
+    # ANCHOR[id=SpriteAtlasBuild]
+    @classmethod
+    def build(cls, images: Dict[str, Surface]) -> "SpriteAtlas":
+        """
+            Tallest images first. Images larger than a page get a page of their own,
+            and pixel-identical images are packed once.
+        """
+        packers: List[SkylinePacker] = []
+        placements: Dict[str, Tuple[int, Coords]] = {}
+        aliases: Dict[str, str] = {}
+        names_by_hash: Dict[str, str] = {}
+        for name in sorted(images):
+            image_hash: str = get_pixel_hash(images[name])
+            if image_hash in names_by_hash:
+                aliases[name] = names_by_hash[image_hash]
+            else:
+                names_by_hash[image_hash] = name
+        unique_images: Dict[str, Surface] = {name: image for name, image in images.items() if name not in aliases}
+        for name, image in sorted(unique_images.items(), key=lambda item : (-item[1].get_height(), -item[1].get_width(), item[0])):
+            width: int = image.get_width() + cls.padding
+            height: int = image.get_height() + cls.padding
+            position: Optional[Coords] = None
+            for page_index, packer in enumerate(packers):
+                position = packer.insert(width, height)
+                if position != None:
+                    break
+            if position == None:
+                packers.append(SkylinePacker(max(cls.page_size, width), max(cls.page_size, height)))
+                page_index = len(packers) - 1
+                position = packers[page_index].insert(width, height)
+            placements[name] = (page_index, position)
+
+        # Pages are cropped to what was packed in them
+        pages: List[Surface] = [Surface((max(packer.used_width, 1), max(packer.used_height, 1)), pygame.SRCALPHA) for packer in packers]
+        entries: Dict[str, AtlasEntry] = {}
+        for name, (page_index, position) in placements.items():
+            image: Surface = images[name]
+            # MAX over the transparent page copies the pixels as they are, alpha included
+            pages[page_index].blit(image, position, special_flags=pygame.BLEND_RGBA_MAX)
+            entries[name] = (page_index, Rect(position, image.get_size()))
+        for name, canonical_name in aliases.items():
+            entries[name] = entries[canonical_name]
+        return cls(cls.convert_pages(pages), entries)
+
+    @staticmethod
+    def convert_pages(pages: List[Surface]) -> List[Surface]:
+        # The display format blits faster, there is none when exporting from the command line
+        if pygame.display.get_surface() != None:
+            return [page.convert_alpha() for page in pages]
+        return pages
+
+    @classmethod
+    def load_or_build(cls, directory: str, load_image: Callable[[str], Surface]) -> "SpriteAtlas":
+        key: str = cls.get_directory_key(directory)
+        atlas: Optional[SpriteAtlas] = cls.load(cls.get_cache_prefix(key))
+        if atlas == None:
+            images: Dict[str, Optional[Surface]] = {
+                file_name: load_image(path.join(directory, file_name)) for file_name in cls.get_png_file_names(directory)
+            }
+            atlas = cls.build({name: image for name, image in images.items() if image != None})
+            if atlas.save(cls.get_cache_prefix(key)):
+                cls.prune_cache(key)
+        atlas.key = key
+        return atlas
+
+    @classmethod
+    def prune_cache(cls, key: str) -> None:
+        """
+            Deletes the cached atlases of other keys, left by earlier versions of the sprite directory
+        """
+        cache_directory: str = path.dirname(cls.get_cache_prefix(key))
+        for file_name in listdir(cache_directory):
+            match: Optional[re.Match] = re.fullmatch(r"atlas-([0-9a-f]+)(_\d+\.png|\.json)", file_name)
+            if match and match.group(1) != key:
+                try:
+                    remove(path.join(cache_directory, file_name))
+                except OSError as e:
+                    Logger.error(f"Error deleting cached sprite atlas {file_name}: {e}")
+
+    # ANCHOR[id=SpriteAtlasFiles]
+    def get_index(self, page_file_names: List[str]) -> Dict:
+        return {
+            "version": self.version,
+            "padding": self.padding,
+            "pages": [
+                {"file_name": file_name, "size": list(page.get_size())}
+                for file_name, page in zip(page_file_names, self.pages)
+            ],
+            "sprites": {
+                name: {
+                    "page": page_index,
+                    "rect": [rect.x, rect.y, rect.width, rect.height],
+                    # Normalized, origin at the top left
+                    "uv": [
+                        rect.left / self.pages[page_index].get_width(),
+                        rect.top / self.pages[page_index].get_height(),
+                        rect.right / self.pages[page_index].get_width(),
+                        rect.bottom / self.pages[page_index].get_height(),
+                    ],
+                }
+                for name, (page_index, rect) in sorted(self.entries.items())
+            },
+        }
+
+    def save(self, file_path_prefix: str) -> Optional[str]:
+        """
+            Writes <prefix>_<page>.png and <prefix>.json, returns the path of the index
+        """
+        page_file_names: List[str] = [f"{path.basename(file_path_prefix)}_{i}.png" for i in range(len(self.pages))]
+        try:
+            makedirs(path.dirname(file_path_prefix) or ".", exist_ok=True)
+            for file_name, page in zip(page_file_names, self.pages):
+                pygame.image.save(page, path.join(path.dirname(file_path_prefix), file_name))
+            with open(f"{file_path_prefix}.json", "w") as f:
+                json.dump(self.get_index(page_file_names), f, indent=4)
+        except (IOError, pygame.error) as e:
+            Logger.error(f"Error writing sprite atlas to {file_path_prefix}: {e}")
+            return None
+        return f"{file_path_prefix}.json"
+
+    @classmethod
+    def load(cls, file_path_prefix: str) -> Optional["SpriteAtlas"]:
+        index: Optional[Dict] = None
+        try:
+            with open(f"{file_path_prefix}.json", "r") as f:
+                index = json.load(f)
+            pages: List[Surface] = [
+                pygame.image.load(path.join(path.dirname(file_path_prefix), page["file_name"]))
+                for page in index["pages"]
+            ]
+        except (IOError, ValueError, KeyError, pygame.error):
+            return None
+        if index.get("version") != cls.version:
+            return None
+        return cls(cls.convert_pages(pages), {
+            name: (sprite["page"], Rect(sprite["rect"])) for name, sprite in index["sprites"].items()
+        })
@@ -125,6 +125,16 @@ class SpritePanel(SubSurfaceRect):
 
     def get_sprites(self):
         return self.sprites
+
+    def get_memory_stats(self) -> Dict[str, int]:
+        sprite_surface_bytes: int = sum(map(get_surface_bytes, self.sprites))
+        canvas_bytes: int = get_surface_bytes(self.canvas)
+        return {
+            "sprites": len(self.sprites),
+            "sprite_surface_bytes": sprite_surface_bytes,
+            "canvas_bytes": canvas_bytes,
+            "bytes": sprite_surface_bytes + canvas_bytes
+        }
     
     def get_sprites_intersecting_rectangle(self, rect: Rect) -> List[Sprite]:
         return list(filter(lambda sprite: rect.colliderect(sprite.get_sprite_rect()), self.sprites))
@@ -1,4 +1,5 @@
 from .utility import *
+from .InputSession import InputSession
 
 class SubSurfaceRect():
     
@@ -56,7 +57,7 @@ class SubSurfaceRect():
 
     
     def update(self, *args, **kwargs):
-        mouse_pos: Coords = pygame.mouse.get_pos()
+        mouse_pos: Coords = InputSession().get_mouse_pos()
         self._update(mouse_pos, *args, **kwargs)
     
     def _update(self, mouse_pos: Coords, *args, **kwargs):
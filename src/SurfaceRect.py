@@ -1,4 +1,5 @@
 from .utility import *
+from .InputSession import InputSession
 
 class SurfaceRect(Surface):
     
@@ -10,7 +11,7 @@ class SurfaceRect(Surface):
         self.screen: Surface = screen
     
     def update(self, *args, **kwargs):
-        mouse_pos: Coords = pygame.mouse.get_pos()
+        mouse_pos: Coords = InputSession().get_mouse_pos()
         self._update(mouse_pos, *args, **kwargs)
     
     def _update(self, mouse_pos: Coords, *args, **kwargs):
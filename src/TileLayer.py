@@ -0,0 +1,361 @@
+from math import ceil
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
+from .utility import *
+from .SpriteData import SpriteData
+
+TileLayerState = Tuple[np.ndarray, List[str]]
+
+class TileLayer:
+    # ANCHOR - TileLayer
+    """
+    Grid-aligned tiles of exactly one grid cell, stored as a 2D array of
+    palette indices instead of one Sprite per tile.
+
+    Tiles are exported as plain sprite entries so saved maps stay compatible,
+    and grid-aligned entries are absorbed back into the layer when a map is
+    loaded. A tile keeps the id it was loaded with as long as its cell holds
+    the same image; new tiles get ids derived from their cell.
+    """
+    EMPTY: int = -1
+
+    def __init__(self, cell_size: int, columns: int, rows: int) -> None:
+        self.cell_size: int = cell_size
+        self.grid: np.ndarray = np.full((rows, columns), TileLayer.EMPTY, dtype=np.int32)
+        self.palette: List[str] = []
+        self.palette_indices: Dict[str, int] = {}
+        self.nb_tiles: int = 0
+        self.version: int = 0
+        # (id, file name) of the entries absorbed by load_sprite_data, by (column, row)
+        self.loaded_ids: Dict[Tuple[int, int], Tuple[str, str]] = {}
+
+    # ANCHOR[id=TileLayerGetters]
+    def get_size(self) -> Coords:
+        return [self.grid.shape[1], self.grid.shape[0]]
+
+    def get_version(self) -> int:
+        return self.version
+
+    def get_nb_tiles(self) -> int:
+        return self.nb_tiles
+
+    def is_empty(self) -> bool:
+        return self.nb_tiles == 0
+
+    def is_in_bounds(self, column: int, row: int) -> bool:
+        return 0 <= column < self.grid.shape[1] and 0 <= row < self.grid.shape[0]
+
+    def is_tile_image(self, image: Surface) -> bool:
+        return self.cell_size > 0 and image.get_width() == self.cell_size and image.get_height() == self.cell_size
+
+    def is_tile(self, image: Surface, coords: Coords) -> bool:
+        """
+            Only images of exactly one cell, placed on a grid point, become tiles.
+        """
+        return (
+            self.is_tile_image(image)
+            and coords[0] % self.cell_size == 0
+            and coords[1] % self.cell_size == 0
+            and self.is_in_bounds(coords[0] // self.cell_size, coords[1] // self.cell_size)
+        )
+
+    def get_cell(self, coords: Coords) -> Tuple[int, int]:
+        if self.cell_size <= 0:
+            return (-1, -1)
+        return (int(coords[0] // self.cell_size), int(coords[1] // self.cell_size))
+
+    def get_cell_rect(self, column: int, row: int) -> Rect:
+        return Rect(column * self.cell_size, row * self.cell_size, self.cell_size, self.cell_size)
+
+    def get_name_at(self, column: int, row: int) -> Optional[str]:
+        if self.is_in_bounds(column, row):
+            index: int = self.grid[row, column]
+            if index != TileLayer.EMPTY:
+                return self.palette[index]
+        return None
+
+    def get_tile_id(self, column: int, row: int, name: str) -> str:
+        """
+            Id of the tile name at the cell: the one it was loaded with if the cell still
+            holds it, so that ids are stable across load and save
+        """
+        loaded_id: Optional[Tuple[str, str]] = self.loaded_ids.get((column, row))
+        if loaded_id != None and loaded_id[1] == name:
+            return loaded_id[0]
+        return f"tile-{column}-{row}"
+
+    def get_cell_bounds_within_rectangle(self, rect: Rect) -> Tuple[int, int, int, int]:
+        """
+            (column, row, width, height) of the cells fully contained in rect, clipped to the grid
+        """
+        if self.cell_size <= 0:
+            return (0, 0, 0, 0)
+        column: int = max(ceil(rect.left / self.cell_size), 0)
+        row: int = max(ceil(rect.top / self.cell_size), 0)
+        right: int = min(rect.right // self.cell_size, self.grid.shape[1])
+        bottom: int = min(rect.bottom // self.cell_size, self.grid.shape[0])
+        return (column, row, max(right - column, 0), max(bottom - row, 0))
+
+    def get_cell_bounds_intersecting_rectangle(self, rect: Rect) -> Tuple[int, int, int, int]:
+        """
+            (column, row, width, height) of the cells overlapped by rect, clipped to the grid
+        """
+        if self.cell_size <= 0:
+            return (0, 0, 0, 0)
+        column: int = max(rect.left // self.cell_size, 0)
+        row: int = max(rect.top // self.cell_size, 0)
+        right: int = min(ceil(rect.right / self.cell_size), self.grid.shape[1])
+        bottom: int = min(ceil(rect.bottom / self.cell_size), self.grid.shape[0])
+        return (column, row, max(right - column, 0), max(bottom - row, 0))
+
+    def get_nb_tiles_intersecting_rectangle(self, rect: Rect) -> int:
+        column, row, width, height = self.get_cell_bounds_intersecting_rectangle(rect)
+        return int(np.count_nonzero(self.grid[row:row + height, column:column + width] != TileLayer.EMPTY))
+
+    def get_cells_within_rectangle(self, rect: Rect) -> Tuple[np.ndarray, np.ndarray]:
+        """
+            (columns, rows) of the tiles fully contained in rect
+        """
+        column, row, width, height = self.get_cell_bounds_within_rectangle(rect)
+        rows, columns = np.nonzero(self.grid[row:row + height, column:column + width] != TileLayer.EMPTY)
+        return (columns + column, rows + row)
+
+    def get_tile_rects_within_rectangle(self, rect: Rect) -> List[Rect]:
+        column, row, width, height = self.get_cell_bounds_within_rectangle(rect)
+        rows, columns = np.nonzero(self.grid[row:row + height, column:column + width] != TileLayer.EMPTY)
+        return [self.get_cell_rect(column + c, row + r) for r, c in zip(rows.tolist(), columns.tolist())]
+
+    def get_cells_mask(self, rects: List[Rect]) -> np.ndarray:
+        """
+            Cells overlapped by any of rects
+        """
+        mask: np.ndarray = np.zeros(self.grid.shape, dtype=bool)
+        if self.cell_size > 0:
+            for rect in rects:
+                mask[
+                    max(rect.top // self.cell_size, 0):max(ceil(rect.bottom / self.cell_size), 0),
+                    max(rect.left // self.cell_size, 0):max(ceil(rect.right / self.cell_size), 0)
+                ] = True
+        return mask
+
+    def get_flood_fill_mask(self, column: int, row: int, blocked: np.ndarray) -> np.ndarray:
+        """
+            Cells connected to (column, row) holding the same tile (or no tile) without
+            crossing a blocked cell. Scanline fill: every popped seed fills its whole run
+            at once, and only pushes one seed per run found in the rows above and below.
+        """
+        filled: np.ndarray = np.zeros(self.grid.shape, dtype=bool)
+        if not self.is_in_bounds(column, row) or blocked[row, column]:
+            return filled
+        fillable: np.ndarray = (self.grid == self.grid[row, column]) & ~blocked
+        height, width = self.grid.shape
+        walls: Dict[int, np.ndarray] = {}
+        seeds: List[Tuple[int, int]] = [(row, column)]
+        while seeds:
+            r, c = seeds.pop()
+            if filled[r, c]:
+                continue
+            if r not in walls:
+                walls[r] = np.flatnonzero(~fillable[r])
+            i: int = int(np.searchsorted(walls[r], c))
+            left: int = int(walls[r][i - 1]) + 1 if i > 0 else 0
+            right: int = int(walls[r][i]) if i < len(walls[r]) else width
+            filled[r, left:right] = True
+            for neighbour in (r - 1, r + 1):
+                if 0 <= neighbour < height:
+                    candidates: np.ndarray = fillable[neighbour, left:right] & ~filled[neighbour, left:right]
+                    run_starts: np.ndarray = np.flatnonzero(candidates & ~np.concatenate(([False], candidates[:-1])))
+                    seeds += [(neighbour, left + s) for s in run_starts.tolist()]
+        return filled
+
+    def get_rect_fill_mask(self, start_cell: Tuple[int, int], end_cell: Tuple[int, int], blocked: np.ndarray) -> np.ndarray:
+        mask: np.ndarray = np.zeros(self.grid.shape, dtype=bool)
+        mask[
+            max(min(start_cell[1], end_cell[1]), 0):max(max(start_cell[1], end_cell[1]) + 1, 0),
+            max(min(start_cell[0], end_cell[0]), 0):max(max(start_cell[0], end_cell[0]) + 1, 0)
+        ] = True
+        return mask & ~blocked
+
+    def get_palette_index(self, name: str) -> int:
+        if name not in self.palette_indices:
+            self.palette_indices[name] = len(self.palette)
+            self.palette.append(name)
+        return self.palette_indices[name]
+
+    # ANCHOR[id=TileLayerSetters]
+    def place(self, column: int, row: int, name: str) -> None:
+        if self.is_in_bounds(column, row):
+            self.nb_tiles += int(self.grid[row, column] == TileLayer.EMPTY)
+            self.grid[row, column] = self.get_palette_index(name)
+            self.version += 1
+
+    def erase(self, column: int, row: int) -> None:
+        if self.is_in_bounds(column, row) and self.grid[row, column] != TileLayer.EMPTY:
+            self.grid[row, column] = TileLayer.EMPTY
+            self.nb_tiles -= 1
+            self.version += 1
+
+    def _set_region(self, column: int, row: int, width: int, height: int, index: int) -> None:
+        region: np.ndarray = self.grid[max(row, 0):max(row + height, 0), max(column, 0):max(column + width, 0)]
+        if region.size:
+            self.nb_tiles -= int(np.count_nonzero(region != TileLayer.EMPTY))
+            region[...] = index
+            self.nb_tiles += int(np.count_nonzero(region != TileLayer.EMPTY))
+            self.version += 1
+
+    def fill_rect(self, column: int, row: int, width: int, height: int, name: str) -> None:
+        self._set_region(column, row, width, height, self.get_palette_index(name))
+
+    def clear_rect(self, column: int, row: int, width: int, height: int) -> None:
+        self._set_region(column, row, width, height, TileLayer.EMPTY)
+
+    def lift_cells(self, columns: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """
+            Empties the cells, returns the palette indices they held
+        """
+        indices: np.ndarray = self.grid[rows, columns].copy()
+        if len(indices):
+            self.grid[rows, columns] = TileLayer.EMPTY
+            self.nb_tiles -= int(np.count_nonzero(indices != TileLayer.EMPTY))
+            self.version += 1
+        return indices
+
+    def place_cells(self, columns: np.ndarray, rows: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        """
+            Sets the palette indices of the empty cells in one go, returns which cells were set.
+            Cells out of bounds or holding a tile are left as they are.
+        """
+        placed: np.ndarray = (columns >= 0) & (columns < self.grid.shape[1]) & (rows >= 0) & (rows < self.grid.shape[0])
+        placed[placed] = self.grid[rows[placed], columns[placed]] == TileLayer.EMPTY
+        if placed.any():
+            self.grid[rows[placed], columns[placed]] = indices[placed]
+            self.nb_tiles = int(np.count_nonzero(self.grid != TileLayer.EMPTY))
+            self.version += 1
+        return placed
+
+    def fill_mask(self, mask: np.ndarray, name: str) -> None:
+        if mask.any():
+            self.grid[mask] = self.get_palette_index(name)
+            self.nb_tiles = int(np.count_nonzero(self.grid != TileLayer.EMPTY))
+            self.version += 1
+
+    def resize(self, columns: int, rows: int) -> None:
+        grid: np.ndarray = np.full((rows, columns), TileLayer.EMPTY, dtype=np.int32)
+        kept_rows: int = min(rows, self.grid.shape[0])
+        kept_columns: int = min(columns, self.grid.shape[1])
+        grid[:kept_rows, :kept_columns] = self.grid[:kept_rows, :kept_columns]
+        self.grid = grid
+        self.nb_tiles = int(np.count_nonzero(self.grid != TileLayer.EMPTY))
+        self.version += 1
+
+    def clear(self) -> None:
+        self.grid[...] = TileLayer.EMPTY
+        self.nb_tiles = 0
+        self.version += 1
+
+    def get_state(self) -> TileLayerState:
+        return (self.grid.copy(), list(self.palette))
+
+    def set_state(self, state: TileLayerState) -> None:
+        grid, palette = state
+        self.grid = grid.copy()
+        self.palette = list(palette)
+        self.palette_indices = {name: i for i, name in enumerate(self.palette)}
+        self.nb_tiles = int(np.count_nonzero(self.grid != TileLayer.EMPTY))
+        self.version += 1
+
+    # ANCHOR[id=TileLayerData]
+    def to_sprite_data(self, bounds: Optional[Tuple[int, int, int, int]] = None) -> List[SpriteData]:
+        """
+            Every tile, or the tiles within bounds, a (column, row, width, height) of cells
+        """
+        column, row, width, height = bounds or (0, 0, self.grid.shape[1], self.grid.shape[0])
+        rows, columns = np.nonzero(self.grid[row:row + height, column:column + width] != TileLayer.EMPTY)
+        return self.cells_to_sprite_data(columns + column, rows + row)
+
+    def cells_to_sprite_data(self, columns: np.ndarray, rows: np.ndarray, indices: Optional[np.ndarray] = None) -> List[SpriteData]:
+        """
+            Tiles of the cells, with the palette indices they hold or indices
+        """
+        indices = self.grid[rows, columns] if indices is None else indices
+        return [
+            {
+                "id": self.get_tile_id(column, row, self.palette[index]),
+                "file_name": self.palette[index],
+                "coordinates": [column * self.cell_size, row * self.cell_size]
+            }
+            for row, column, index in zip(rows.tolist(), columns.tolist(), indices.tolist())
+        ]
+
+    def diff_sprite_data(self, state: TileLayerState) -> Tuple[List[SpriteData], List[str]]:
+        """
+            Tiles placed or replaced since state was taken, and the ids of the erased ones
+        """
+        grid, palette = state
+        # Previous grid, in the current palette and shape
+        remap: np.ndarray = np.array([self.palette_indices.get(name, -2) for name in palette] + [TileLayer.EMPTY], dtype=np.int32)
+        previous: np.ndarray = np.full(self.grid.shape, TileLayer.EMPTY, dtype=np.int32)
+        kept_rows: int = min(grid.shape[0], self.grid.shape[0])
+        kept_columns: int = min(grid.shape[1], self.grid.shape[1])
+        previous[:kept_rows, :kept_columns] = remap[grid[:kept_rows, :kept_columns]]
+
+        changed: np.ndarray = previous != self.grid
+        rows, columns = np.nonzero(changed & (self.grid != TileLayer.EMPTY))
+        placed: List[SpriteData] = [
+            {
+                "id": self.get_tile_id(column, row, self.palette[self.grid[row, column]]),
+                "file_name": self.palette[self.grid[row, column]],
+                "coordinates": [column * self.cell_size, row * self.cell_size]
+            }
+            for row, column in zip(rows.tolist(), columns.tolist())
+        ]
+        # Replaced tiles are erased too when their id changes with their image
+        rows, columns = np.nonzero(changed & (previous != TileLayer.EMPTY))
+        placed_ids: Set[str] = set(sprite["id"] for sprite in placed)
+        erased: List[str] = [
+            tile_id for tile_id in (
+                self.get_tile_id(column, row, palette[grid[row, column]]) for row, column in zip(rows.tolist(), columns.tolist())
+            )
+            if tile_id not in placed_ids
+        ]
+        # Tiles cut off by a resize
+        cut_off: np.ndarray = grid != TileLayer.EMPTY
+        cut_off[:kept_rows, :kept_columns] = False
+        rows, columns = np.nonzero(cut_off)
+        erased += [self.get_tile_id(column, row, palette[grid[row, column]]) for row, column in zip(rows.tolist(), columns.tolist())]
+        return (placed, erased)
+
+    def load_sprite_data(self, data: List[SpriteData], get_image: Callable[[str], Surface]) -> List[SpriteData]:
+        """
+            Clears the layer, absorbs every entry that fits on an empty cell, and
+            returns the entries that have to stay free sprites.
+        """
+        self.clear()
+        self.loaded_ids = {}
+        free_sprite_data: List[SpriteData] = []
+        for sprite_data in data:
+            coords: Coords = sprite_data.get("coordinates")
+            image: Surface = get_image(sprite_data.get("file_name"))
+            if image != None and self.is_tile(image, coords) and self.get_name_at(*self.get_cell(coords)) == None:
+                self.place(*self.get_cell(coords), sprite_data.get("file_name"))
+                if sprite_data.get("id"):
+                    self.loaded_ids[self.get_cell(coords)] = (sprite_data["id"], sprite_data["file_name"])
+            else:
+                free_sprite_data.append(sprite_data)
+        return free_sprite_data
+
+    # ANCHOR[id=TileLayerDraw]
+    def draw(self, surface: Surface, viewport_rect: Rect, get_image: Callable[[str], Surface]) -> None:
+        """
+            Only the slice of the grid under viewport_rect is visited.
+        """
+        if not self.nb_tiles:
+            return
+        column, row, width, height = self.get_cell_bounds_intersecting_rectangle(viewport_rect)
+        visible: np.ndarray = self.grid[row:row + height, column:column + width]
+        rows, columns = np.nonzero(visible != TileLayer.EMPTY)
+        images: List[Surface] = [get_image(name) for name in self.palette]
+        surface.blits([
+            (images[index], ((column + c) * self.cell_size, (row + r) * self.cell_size))
+            for r, c, index in zip(rows.tolist(), columns.tolist(), visible[rows, columns].tolist())
+        ], doreturn=False)
@@ -2,9 +2,10 @@ from functools import reduce
 import sys
 from typing import Dict, List, Optional, Tuple
 import pygame
-import yaml
 import re
 import os
+import marshal
+from hashlib import sha1
 from .Logger import Logger
 from json import load, JSONDecodeError
 
@@ -29,6 +30,7 @@ class KeyboardKeys:
     ESCAPE = pygame.K_ESCAPE
     LEFT_ALT = pygame.K_LALT
     LEFT_CONTROL = pygame.K_LCTRL
+    LEFT_SHIFT = pygame.K_LSHIFT
     Q = pygame.K_q
     S = pygame.K_s
     W = pygame.K_w
@@ -38,6 +40,16 @@ class KeyboardKeys:
     D = pygame.K_d
     P = pygame.K_p
     M = pygame.K_m
+    A = pygame.K_a
+    Z = pygame.K_z
+    G = pygame.K_g
+    E = pygame.K_e
+    C = pygame.K_c
+    V = pygame.K_v
+    F3 = pygame.K_F3
+    F4 = pygame.K_F4
+    F6 = pygame.K_F6
+    F7 = pygame.K_F7
 
 def load_json_to_dict(filepath: str) -> Dict:
     if not os.path.exists(filepath):
@@ -47,7 +59,7 @@ def load_json_to_dict(filepath: str) -> Dict:
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             data = load(f)
-        Logger.success("Json data loded successfully")
+        Logger.success("Json data loded successfully", compact=True)
         return data
     except JSONDecodeError:
         Logger.error(f"Error: Could not decode JSON from {filepath}. Check file format.")
@@ -95,24 +107,75 @@ def multiply_int(n: int, c1: Optional[List[int]] = None) -> List[int]:
       temp_c[i] *= n
   return list(temp_c)
 
+def get_surface_bytes(surface: Optional[pygame.Surface]) -> int:
+  """
+      pixel bytes owned by surface, subsurfaces share their parent's pixels
+  """
+  if surface == None or surface.get_parent() != None:
+      return 0
+  return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+def get_pixel_hash(surface: pygame.Surface) -> str:
+  """
+      Same for pixel-identical surfaces, whatever their pixel format
+  """
+  return sha1(b"%dx%d" % surface.get_size() + pygame.image.tobytes(surface, "RGBA")).hexdigest()
+
 def get_resource_path(relative_path):
     """Get absolute path to resource, works for dev and for PyInstaller."""
     if hasattr(sys, '_MEIPASS'):
         return os.path.join(sys._MEIPASS, relative_path)
     return os.path.join(os.path.abspath("."), relative_path)
 
+def get_yaml_cache_path(file_path: str) -> str:
+    # Next to logs.log, bundled files can be read-only
+    return os.path.join(
+        os.path.dirname(Logger._log_file), ".cache",
+        f"{os.path.basename(file_path)}-{sha1(os.path.abspath(file_path).encode()).hexdigest()[:12]}.marshal"
+    )
+
+def load_yaml_file(file_path: str):
+    """
+        Parsed files are cached with marshal, keyed on their size and mtime, so
+        PyYAML is only imported and run when a file changed
+    """
+    stat: os.stat_result = os.stat(file_path)
+    key: Tuple = (sys.version, os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    cache_path: str = get_yaml_cache_path(file_path)
+    try:
+        with open(cache_path, "rb") as f:
+            cached_key, data = marshal.load(f)
+        if cached_key == key:
+            return data
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    import yaml
+    with open(file_path, 'r', encoding='utf8') as f:
+        try:
+            data = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise ValueError(e) from e
+    try:
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        with open(f"{cache_path}.tmp", "wb") as f:
+            marshal.dump((key, data), f)
+        os.replace(f"{cache_path}.tmp", cache_path)
+    except (OSError, ValueError) as e:
+        Logger.debug(f"Could not cache {file_path}: {e}")
+    return data
+
 def load_internal_yaml_to_dict(filename: str):
     """
         Loads internal (Bundled) paths
     """
     config_path = get_resource_path(filename)
     try:
-        with open(config_path, 'r', encoding='utf8') as f:
-            return yaml.safe_load(f)
+        return load_yaml_file(config_path)
     except FileNotFoundError:
         Logger.error(f"Error: {filename} not found at {config_path}")
         return None
-    except yaml.YAMLError as e:
+    except ValueError as e:
         Logger.error(f"Error parsing {filename}: {e}")
         return None
 
@@ -121,16 +184,16 @@ def load_yaml_to_dict(filename: str):
         Loads unbundled apths
     """
     try:
-        with open(filename, 'r', encoding='utf8') as f:
-            return yaml.safe_load(f)
+        return load_yaml_file(filename)
     except FileNotFoundError:
         Logger.error(f"Error: {filename} not found at {filename}")
         return None
-    except yaml.YAMLError as e:
+    except ValueError as e:
         Logger.error(f"Error parsing {filename}: {e}")
         return None
 
 def save_dict_to_yaml(data: dict, filename: str):
+    import yaml
     try:
         with open(filename, "w", encoding="utf-8") as file:
             yaml.dump(data, file, default_flow_style=False)
@@ -0,0 +1,130 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from os import path
+from time import perf_counter, sleep
+from typing import Dict
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+# Sets up a headless pygame before the editor is imported
+from benchmark import create_app
+from generate_random_sprite import generate_random_png_pygame
+from live_link_receiver import LiveLevel, connect, receive
+from src.utility import *
+from src.App import App
+from src.HitBox import HitBox
+from src.ImageCache import ImageCache
+from src.Sprite import Sprite
+
+class TestLiveLink(unittest.TestCase):
+    """
+    Edits made through the same App and DrawingArea calls as the editor's event
+    handlers, checked against the level kept by live_link_receiver.LiveLevel
+    """
+    timeout: float = 5
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temporary_directory = tempfile.TemporaryDirectory()
+        sprite_directory: str = path.join(cls.temporary_directory.name, "sprites")
+        os.makedirs(sprite_directory)
+        generate_random_png_pygame(output_path_prefix=path.join(sprite_directory, "sprite"), nb_images=2)
+        cls.app: App = create_app(sprite_directory, cls.temporary_directory.name)
+        cls.sprite_names = sorted(os.listdir(sprite_directory))
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        pygame.quit()
+        cls.temporary_directory.cleanup()
+
+    def setUp(self) -> None:
+        self.live_level: LiveLevel = LiveLevel()
+        self.live_level_lock: threading.Lock = threading.Lock()
+        address: str = self.app.live_link.start()
+        self.assertIsNotNone(address)
+        self.receiver_thread: threading.Thread = threading.Thread(target=self.receive, args=(address,), daemon=True)
+        self.receiver_thread.start()
+        self.wait_until(self.app.live_link.is_connected, send_snapshots=True)
+
+    def tearDown(self) -> None:
+        self.app.live_link.stop()
+        self.receiver_thread.join(self.timeout)
+
+    def receive(self, address: str) -> None:
+        for message in receive(connect(address)):
+            with self.live_level_lock:
+                self.live_level.apply(message)
+
+    def wait_until(self, condition, send_snapshots: bool = False) -> bool:
+        start: float = perf_counter()
+        while perf_counter() - start < self.timeout:
+            if send_snapshots:
+                self.app.update_live_link()
+            if condition():
+                return True
+            sleep(0.01)
+        return False
+
+    def get_level(self) -> Dict:
+        # Coordinates are sent as JSON arrays, whatever the sequence type in map_data
+        export_map_data: Dict = json.loads(json.dumps(self.app.get_export_map_data(flatten_prefabs=True)))
+        return {
+            "sprites": {sprite["id"]: sprite for sprite in export_map_data["sprites"]},
+            "hitboxes": {hitbox["id"]: hitbox for hitbox in export_map_data["hitboxes"]},
+            "starting_position": export_map_data.get("starting_position"),
+        }
+
+    def get_live_level(self) -> Dict:
+        with self.live_level_lock:
+            return json.loads(json.dumps({key: self.live_level.level[key] for key in ("sprites", "hitboxes", "starting_position")}))
+
+    def assert_synced(self, edit: str) -> None:
+        # Tile edits are diffed once per frame, in fixed_update
+        self.app.update_live_link()
+        self.wait_until(lambda : self.get_live_level() == self.get_level())
+        self.assertEqual(self.get_live_level(), self.get_level(), f"out of sync after {edit}")
+
+    def test_edits_match_export(self) -> None:
+        app: App = self.app
+        drawing_area = app.drawing_area
+        cell_size: int = drawing_area.tile_layer.cell_size
+        image: Surface = ImageCache().get_image(self.sprite_names[0])
+
+        sprite: Sprite = Sprite(10, 20, drawing_area.canvas, image, self.sprite_names[0])
+        drawing_area.place_sprite(sprite, app.add_data)
+        drawing_area.place_sprite(Sprite(cell_size * 2, 0, drawing_area.canvas, image, self.sprite_names[1]), app.add_data)
+        hitbox: HitBox = HitBox(10, 20, 30, 10)
+        drawing_area.add_hitbox(hitbox)
+        app.add_data(hitbox.get_data(), "hitbox")
+        self.assertEqual(drawing_area.tile_layer.get_nb_tiles(), 1)
+        self.assert_synced("add")
+
+        sprite.set_top_left([cell_size + 10, 20])
+        app.move_sprite(sprite.get_id(), [cell_size + 10, 20])
+        self.assert_synced("move")
+
+        drawing_area.delete_hitbox(hitbox.get_id())
+        app.delete_data(hitbox.get_id(), "hitbox")
+        drawing_area.tile_layer.erase(2, 0)
+        self.assert_synced("delete")
+
+        app.set_player_position([5, 5])
+        self.assert_synced("starting_position")
+
+        prefab_hitbox: HitBox = HitBox(cell_size + 10, 20, 20, 20)
+        drawing_area.add_hitbox(prefab_hitbox)
+        app.add_data(prefab_hitbox.get_data(), "hitbox")
+        app.capture_prefab(Rect(0, 0, cell_size * 3, cell_size * 3))
+        self.assertEqual(len(app.map_data["prefab_instances"]), 1)
+        self.assert_synced("prefab capture")
+
+        drawing_area.place_prefab_instance([cell_size * 4, cell_size * 4], app.add_data)
+        self.assertEqual(len(app.map_data["prefab_instances"]), 2)
+        self.assert_synced("prefab stamp")
+
+if __name__ == "__main__":
+    unittest.main()